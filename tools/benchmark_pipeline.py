@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmarks for Vyoma
+Times the hot paths of the data and image tools on synthetic inputs
+
+Each benchmark builds its input with synthetic_data.py (untimed), then
+times the real tool code on it: .ascii parsing in DataIngestion,
+AstronomyDataMigrator.migrate_all_data, the catalog writers,
+compress_and_convert and create_radial_gradient. Catalog benchmarks
+are sized in objects and image benchmarks in pixels, from 1k to 10M.
+
+The best of --repeat runs is compared with a baseline file; a run more
+than --threshold slower than its baseline is a regression and the tool
+exits non-zero, so a change to a hot path can be checked offline:
+
+  python tools/benchmark_pipeline.py --save-baseline   # before the change
+  python tools/benchmark_pipeline.py                   # after it
+
+Baselines are machine-specific; compare runs on the same machine.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from comprehensive_data_migration import AstronomyDataMigrator, write_catalog
+from generate_placeholder_images import PLACEHOLDERS, create_radial_gradient, radial_distance_field
+from imaging import compress_and_convert
+from ingest_data import DataIngestion, data_paths
+from instrumentation import add_arguments, configure_from_args, session, stage
+from synthetic_data import (format_count, parse_count, synthetic_catalog, synthetic_image, write_messier_ascii,
+                            write_migration_data, write_stars_ascii)
+from update_data_with_local_images import save_data
+
+# Configuration
+BASELINE_FILE = Path("Data/benchmark_baseline.json")
+DEFAULT_SIZES = "1k,10k,100k"
+REPEAT = 3
+REGRESSION_THRESHOLD = 0.25  # fail when the best run is this much slower than the baseline
+MIN_REGRESSION_SECONDS = 0.005  # smaller slowdowns are timer noise, whatever the ratio
+MESSIER_FRACTION = 0.01  # messier.ascii sources per stars.ascii source
+
+def bench_ingest_ascii(count, workdir):
+    """Parse a stars.ascii of count sources and its messier.ascii"""
+    root = workdir / "ingest"
+    stardroid = Path(data_paths(root)["stardroid"])
+    write_stars_ascii(stardroid / "stars.ascii", count)
+    write_messier_ascii(stardroid / "messier.ascii", max(1, int(count * MESSIER_FRACTION)))
+
+    def run():
+        ingestion = DataIngestion(root)
+        ingestion.process_stars_ascii()
+        ingestion.process_messier_ascii()
+    return run
+
+def bench_migrate(count, workdir):
+    """Migrate astronomy_data/*.json files holding count objects"""
+    data_dir = workdir / "astronomy_data"
+    write_migration_data(data_dir, count)
+    return lambda: AstronomyDataMigrator().migrate_all_data(data_dir, write=False)
+
+def bench_write_migration(count, workdir):
+    """Write astronomy_objects.json, image_gallery.json and categories.json for count objects"""
+    data_dir = workdir / "astronomy_data"
+    write_migration_data(data_dir, count)
+    migrator = AstronomyDataMigrator()
+    migrator.migrate_all_data(data_dir, write=False)
+    return lambda: write_catalog(migrator, workdir / "assets")
+
+def bench_write_initial_data(count, workdir):
+    """Write an initial_data.json of count objects"""
+    catalog = synthetic_catalog(count)
+    return lambda: save_data(catalog, workdir / "initial_data.json")
+
+def bench_compress(pixels, workdir):
+    """compress_and_convert a PNG starfield of the given pixel count to WebP"""
+    source = workdir / "source.png"
+    synthetic_image(pixels).save(source)
+
+    def run():
+        success, _, _ = compress_and_convert(source, workdir / "output.webp")
+        if not success:
+            raise RuntimeError(f"compress_and_convert failed on {source}")
+    return run
+
+def bench_radial_gradient(pixels, workdir):
+    """Render a square placeholder gradient of the given pixel count, distance field cached"""
+    side = max(1, int(pixels ** 0.5))
+    colors = PLACEHOLDERS['sun']['colors']
+    radial_distance_field(side, side)
+    return lambda: create_radial_gradient((side, side), colors)
+
+def bench_distance_field(pixels, workdir):
+    """Compute the distance field of a square placeholder, as the first gradient of a size does"""
+    side = max(1, int(pixels ** 0.5))
+
+    def run():
+        radial_distance_field.cache_clear()
+        radial_distance_field(side, side)
+    return run
+
+# name -> (setup, unit the size counts)
+BENCHMARKS = {
+    'ingest_ascii': (bench_ingest_ascii, 'objects'),
+    'migrate': (bench_migrate, 'objects'),
+    'write_migration': (bench_write_migration, 'objects'),
+    'write_initial_data': (bench_write_initial_data, 'objects'),
+    'compress_and_convert': (bench_compress, 'pixels'),
+    'radial_gradient': (bench_radial_gradient, 'pixels'),
+    'distance_field': (bench_distance_field, 'pixels'),
+}
+
+def machine_info():
+    """What a baseline was measured on"""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+def run_benchmark(name, count, repeat, workdir):
+    """Set up one benchmark and time it; returns its result record"""
+    setup, unit = BENCHMARKS[name]
+    # The tools report progress on stdout; only the table below is wanted
+    with contextlib.redirect_stdout(io.StringIO()):
+        run = setup(count, workdir)
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - started)
+    best = min(times)
+    return {
+        'benchmark': name,
+        'count': count,
+        'unit': unit,
+        'best_s': best,
+        'median_s': statistics.median(times),
+        'runs': repeat,
+        'per_item_us': best / count * 1e6,
+    }
+
+def result_key(result):
+    return f"{result['benchmark']}/{format_count(result['count'])}"
+
+def load_baseline(path):
+    """The saved baseline, or None"""
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_baseline(path, results, previous=None):
+    """Write results as the baseline, keeping entries this run did not measure"""
+    baseline = {'machine': machine_info(), 'results': dict((previous or {}).get('results', {}))}
+    for result in results:
+        baseline['results'][result_key(result)] = result
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+def compare(result, baseline, threshold):
+    """(change ratio, is regression) against the baseline, or (None, False)"""
+    base = (baseline or {}).get('results', {}).get(result_key(result))
+    if not base:
+        return None, False
+    ratio = result['best_s'] / base['best_s'] - 1
+    regression = ratio > threshold and result['best_s'] - base['best_s'] > MIN_REGRESSION_SECONDS
+    return ratio, regression
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark the data and image tools on synthetic inputs")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"comma-separated object/pixel counts, e.g. 1k,10k,1M,10M (default {DEFAULT_SIZES})")
+    parser.add_argument('--only', help=f"comma-separated benchmarks to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help=f"timed runs per benchmark (default {REPEAT})")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE, help=f"baseline file (default {BASELINE_FILE})")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help=f"allowed slowdown before a run counts as a regression (default {REGRESSION_THRESHOLD})")
+    parser.add_argument('--output', type=Path, help="also write this run's results as JSON")
+    parser.add_argument('--workdir', type=Path, help="where to build the synthetic inputs (default: a temp dir)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    sizes = [parse_count(s) for s in args.sizes.split(',')]
+
+    print("=" * 70)
+    print("⏱️  Vyoma Pipeline Benchmarks")
+    print("=" * 70)
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline.get('machine') != machine_info():
+        print(f"⚠️  {args.baseline} was measured on another machine or Python; expect differences")
+
+    print(f"\n{'Benchmark':<22s} {'Size':>6s} {'Best ms':>10s} {'Median ms':>10s} {'µs/item':>9s} "
+          f"{'Base ms':>10s} {'Change':>8s}")
+    print("-" * 82)
+    results = []
+    regressions = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as tmp:
+        for name in names:
+            for count in sizes:
+                workdir = Path(tmp) / f"{name}_{count}"
+                workdir.mkdir(parents=True)
+                with stage(name, size=count):
+                    result = run_benchmark(name, count, args.repeat, workdir)
+                results.append(result)
+                ratio, regression = compare(result, baseline, args.threshold)
+                if ratio is None:
+                    base, change = "-", "-"
+                else:
+                    base = f"{baseline['results'][result_key(result)]['best_s'] * 1000:.2f}"
+                    change = f"{ratio:+.0%}" + (" ❌" if regression else "")
+                print(f"{name:<22s} {format_count(count):>6s} {result['best_s'] * 1000:>10.2f} "
+                      f"{result['median_s'] * 1000:>10.2f} {result['per_item_us']:>9.3f} {base:>10s} {change:>8s}")
+                if regression:
+                    regressions.append(result_key(result))
+    print("-" * 82)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'machine': machine_info(), 'results': results}, f, indent=2, sort_keys=True)
+        print(f"📋 Results: {args.output}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    if baseline:
+        print(f"\n✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    with session("benchmark_pipeline"):
+        main()
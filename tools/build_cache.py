@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Parameter-Aware Build Cache for Vyoma Image Tools
+Remembers how every generated asset was produced so only stale ones are rebuilt
+
+Each output is recorded with a key: a hash of its source (file content,
+URL or spec), the tool name and version, and the encoding parameters
+(MAX_WIDTH, WEBP_QUALITY, ...). A tool rebuilds an output only when that
+key changes, so editing a parameter re-encodes exactly the images it
+affects instead of forcing a full rebuild.
+
+The manifest is shared by all tools and may be written by several
+processes at once: saves take a file lock, merge with what is on disk and
+replace the file atomically.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Configuration
+MANIFEST_FILE = Path("Data/build_cache.json")
+CHUNK_SIZE = 1024 * 1024
+KEY_LENGTH = 16
+
+def hash_file(path):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_key(source, tool, version, params):
+    """
+    Key identifying one way of producing an output
+
+    Args:
+        source: Source identity, e.g. a content hash or a URL
+        tool: Name of the producing tool
+        version: Tool version; bump it when output-affecting code changes
+        params: Dict of encoding parameters (must be JSON serializable)
+
+    Returns:
+        str: Hex key
+    """
+    payload = json.dumps([source, tool, version, params], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:KEY_LENGTH]
+
+def _stat_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+@contextmanager
+def file_lock(lock_path):
+    """Exclusive inter-process lock held for the duration of the block"""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class BuildCache:
+    """Manifest of generated outputs and the keys they were built with"""
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        # outputs: path -> {key, tool, params, size, mtime_ns}
+        # sources: path -> {size, mtime_ns, sha256}
+        self.outputs, self.sources = self._read()
+        self._changed_outputs = set()
+        self._changed_sources = set()
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get('outputs', {}), data.get('sources', {})
+        except (OSError, ValueError):
+            return {}, {}
+
+    def source_hash(self, path):
+        """
+        Content hash of a source file
+
+        Hashes are remembered with the file's size and mtime, so unchanged
+        sources are not re-read on every run.
+        """
+        name = Path(path).as_posix()
+        size, mtime_ns = _stat_signature(path)
+        with self._lock:
+            known = self.sources.get(name)
+        if known and known['size'] == size and known['mtime_ns'] == mtime_ns:
+            return known['sha256']
+        sha256 = hash_file(path)
+        with self._lock:
+            self.sources[name] = {'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256}
+            self._changed_sources.add(name)
+        return sha256
+
+    def lookup(self, output_path):
+        """
+        Entry recorded for an output, or None
+
+        An output that is missing, or was modified after it was recorded
+        (e.g. overwritten by another tool), has no valid entry.
+        """
+        name = Path(output_path).as_posix()
+        with self._lock:
+            entry = self.outputs.get(name)
+        if entry is None:
+            return None
+        try:
+            if _stat_signature(output_path) != (entry['size'], entry['mtime_ns']):
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def is_fresh(self, output_path, key):
+        """True if the output exists and was built with this key"""
+        entry = self.lookup(output_path)
+        return entry is not None and entry['key'] == key
+
+    def needs_build(self, output_path, key, tool):
+        """
+        Whether a tool that must not clobber other files should build an output
+
+        Missing outputs are built, and outputs this tool recorded are rebuilt
+        when their key changed. Existing outputs it did not record (added by
+        hand, written by another tool, or made before the cache existed)
+        are left alone.
+        """
+        if not Path(output_path).exists():
+            return True
+        entry = self.lookup(output_path)
+        return entry is not None and entry['tool'] == tool and entry['key'] != key
+
+    def record(self, output_path, key, tool, params=None):
+        """Remember that an output was just built with this key"""
+        name = Path(output_path).as_posix()
+        size, mtime_ns = _stat_signature(output_path)
+        with self._lock:
+            self.outputs[name] = {
+                'key': key,
+                'tool': tool,
+                'params': params or {},
+                'size': size,
+                'mtime_ns': mtime_ns,
+            }
+            self._changed_outputs.add(name)
+
+    def save(self):
+        """
+        Merge this process's changes into the manifest on disk
+
+        Entries recorded meanwhile by other processes are kept; the file is
+        replaced atomically so readers never see a partial manifest.
+        """
+        with self._lock, file_lock(self.lock_path):
+            outputs, sources = self._read()
+            outputs.update({name: self.outputs[name] for name in self._changed_outputs})
+            sources.update({name: self.sources[name] for name in self._changed_sources})
+
+            fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'outputs': outputs, 'sources': sources}, f, indent=2, sort_keys=True)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+
+            self.outputs, self.sources = outputs, sources
+            self._changed_outputs.clear()
+            self._changed_sources.clear()
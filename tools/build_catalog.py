@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Full Catalog Build for Vyoma
+Runs ingestion, migration, gallery download and the image path update in memory
+
+Run separately, each tool writes its JSON and the next one parses it
+again: image_gallery.json is re-read by the gallery downloader, and
+initial_data.json is written by ingest_data.py only to be re-read and
+rewritten by update_data_with_local_images.py. Here the catalogs are
+passed between the stages as Python objects and every file is written
+once, at the end.
+"""
+
+import argparse
+import os
+import time
+
+from comprehensive_data_migration import migrate_catalog, write_catalog
+from ingest_data import ROOT_DIR, DataIngestion
+from instrumentation import add_arguments, configure_from_args, session, stage
+from update_data_with_local_images import (DATA_FILE, apply_local_images, load_placeholders, local_image_ids,
+                                           save_data)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build every catalog file in one pass")
+    parser.add_argument('--root', default=ROOT_DIR, help=f"project root (default $VYOMA_ROOT or {ROOT_DIR})")
+    parser.add_argument('--skip-download', action='store_true',
+                        help="keep object_images.json as is instead of fetching the gallery")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    # The tools resolve their paths from the project root
+    os.chdir(args.root)
+    started = time.perf_counter()
+
+    print("=" * 70)
+    print("🏗️  Vyoma Catalog Build")
+    print("=" * 70)
+
+    print("\n📥 Ingesting raw data...")
+    with stage("ingest"):
+        ingestion = DataIngestion(args.root)
+        initial_data = ingestion.ingest()
+
+    with stage("migrate"):
+        migrator = migrate_catalog()
+        gallery = migrator.gallery()
+
+    object_image_map = None
+    if not args.skip_download and gallery:
+        # Imported here so --skip-download never loads Pillow
+        from download_all_gallery_images import download_gallery
+        with stage("download gallery"):
+            object_image_map, _, _ = download_gallery(gallery)
+
+    print("\n🖼️  Pointing objects at local images...")
+    with stage("local images"):
+        updated_count, placeholder_count = apply_local_images(initial_data, local_image_ids(), load_placeholders())
+
+    # Disk output, once per file
+    print("\n" + "=" * 70)
+    print("💾 Writing Catalog Files")
+    print("=" * 70)
+    with stage("write"):
+        if migrator.objects:
+            write_catalog(migrator)
+        if object_image_map is not None:
+            from download_all_gallery_images import MAPPING_FILE, save_object_images
+            save_object_images(object_image_map)
+            print(f"\n✓ Created {MAPPING_FILE}")
+        if initial_data:
+            save_data(initial_data)
+            print(f"\n✓ Created {DATA_FILE}")
+            print(f"  Total objects: {len(initial_data)}")
+            print(f"  Local images: {updated_count}, catalog placeholders: {placeholder_count}")
+
+    print(f"\n✅ Catalog built in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    with session("build_catalog"):
+        main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Canonical JSON Output for Vyoma
+Writes the catalog assets reproducibly and records their content hashes
+
+The same data should give the same bytes, whatever order the sources
+were merged in. write_json() serializes with sorted keys, two-space
+indent, raw UTF-8 and a final newline, and normalizes floats: they are
+rounded to FLOAT_DIGITS significant digits, so arithmetic noise such as
+0.30000000000000004 does not reach the file, and -0.0 becomes 0.0.
+Lists keep their order: it carries meaning (gallery images are in
+priority order, and the app lists objects in catalog order) and is
+fixed by the order of the sources.
+
+Each write also updates catalog_manifest.json next to the file, with
+the SHA-256 and size of every asset and one hash over all of them:
+
+  {"catalog": "<sha256>", "files": {"initial_data.json": {"bytes": ..., "sha256": ...}}, "format": 1}
+
+A file's hash is content_hash() of its data, so the app can compare it
+with the hash it seeded from, and catalog_delta.py uses the same hash
+to identify builds. Pipeline stages running in parallel share the
+manifest, so updates take a file lock and, like the files themselves,
+are written to a temporary file that replaces the old one atomically.
+
+Run directly, the tool rewrites the existing assets canonically and
+refreshes the manifest; --check only reports what is out of date.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from build_cache import file_lock
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+ASSETS_DIR = Path("app/src/main/assets")
+MANIFEST_NAME = "catalog_manifest.json"
+CATALOG_ASSETS = ["initial_data.json", "astronomy_objects.json", "image_gallery.json", "categories.json",
+                  "object_images.json", "object_ids.json", "initial_data_compact.json", "placeholder_images.json",
+                  "image_manifest.json", "image_derivatives.json", "sprite_atlas.json"]
+FLOAT_DIGITS = 12
+MANIFEST_FORMAT = 1
+
+def canonicalize(value):
+    """value with floats normalized and tuples as lists; raises ValueError on NaN or infinity"""
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"{value} has no JSON form")
+        return float(format(value, f".{FLOAT_DIGITS}g")) + 0.0  # + 0.0 turns -0.0 into 0.0
+    if isinstance(value, dict):
+        return {str(key): canonicalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    return value
+
+def dumps(value):
+    """The canonical JSON text of value"""
+    return json.dumps(canonicalize(value), indent=2, sort_keys=True, ensure_ascii=False) + "\n"
+
+def content_hash(value):
+    """SHA-256 of the canonical JSON of value, the hash write_json() records for it"""
+    return hashlib.sha256(dumps(value).encode('utf-8')).hexdigest()
+
+def _manifest_entry(data):
+    return {'bytes': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+
+def load_manifest(manifest_file):
+    """A manifest, empty when there is none"""
+    if not manifest_file.exists():
+        return {'catalog': None, 'files': {}, 'format': MANIFEST_FORMAT}
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def catalog_digest(files):
+    """One hash over the per-file hashes"""
+    text = "".join(f"{name} {entry['sha256']}\n" for name, entry in sorted(files.items()))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _replace(path, data):
+    """Write data to path atomically, so readers never see a partial file"""
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def _manifest_lock(manifest_file):
+    # Kept out of the assets directory, which is packaged into the app
+    name = hashlib.sha256(str(manifest_file.resolve()).encode('utf-8')).hexdigest()[:16]
+    return file_lock(Path(tempfile.gettempdir()) / f"vyoma_manifest_{name}.lock")
+
+def update_manifest(path, data):
+    """Record the bytes written to path in the manifest of its directory"""
+    manifest_file = Path(path).parent / MANIFEST_NAME
+    with _manifest_lock(manifest_file):
+        manifest = load_manifest(manifest_file)
+        manifest['files'][Path(path).name] = _manifest_entry(data)
+        manifest['catalog'] = catalog_digest(manifest['files'])
+        _replace(manifest_file, dumps(manifest).encode('utf-8'))
+
+def write_json(path, value):
+    """Write value to path as canonical JSON and record its hash in the manifest"""
+    data = dumps(value).encode('utf-8')
+    _replace(Path(path), data)
+    update_manifest(path, data)
+
+def stale_assets(assets_dir, names=CATALOG_ASSETS):
+    """Problems with the assets and their manifest, [] when everything is canonical and recorded"""
+    manifest = load_manifest(assets_dir / MANIFEST_NAME)
+    problems = []
+    for name in names:
+        path = assets_dir / name
+        if not path.exists():
+            if name in manifest['files']:
+                problems.append(f"{name} is in the manifest but missing")
+            continue
+        data = path.read_bytes()
+        if data.decode('utf-8') != dumps(json.loads(data)):
+            problems.append(f"{name} is not canonical")
+        if manifest['files'].get(name) != _manifest_entry(data):
+            problems.append(f"{name} does not match its manifest entry")
+    if manifest['files'] and manifest['catalog'] != catalog_digest(manifest['files']):
+        problems.append("the catalog hash does not match the file hashes")
+    return problems
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Rewrite the catalog assets canonically and hash them")
+    parser.add_argument('--dir', type=Path, default=ASSETS_DIR, help=f"assets directory (default {ASSETS_DIR})")
+    parser.add_argument('--check', action='store_true', help="only report assets or manifest entries out of date")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    print("=" * 70)
+    print("🧾 Vyoma Canonical Catalog")
+    print("=" * 70)
+
+    if args.check:
+        with stage("check"):
+            problems = stale_assets(args.dir)
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        if problems:
+            print(f"\n❌ {len(problems)} problems; run python tools/canonical_json.py")
+            sys.exit(1)
+        manifest = load_manifest(args.dir / MANIFEST_NAME)
+        print(f"\n✅ Assets canonical, catalog {manifest['catalog']}")
+        return
+
+    with stage("rewrite"):
+        for name in CATALOG_ASSETS:
+            path = args.dir / name
+            if not path.exists():
+                continue
+            before = path.read_bytes()
+            write_json(path, json.loads(before))
+            print(f"  {'✓ rewrote' if path.read_bytes() != before else '· unchanged'} {name}")
+    manifest = load_manifest(args.dir / MANIFEST_NAME)
+    print(f"\n✅ Catalog {manifest['catalog']}")
+    print(f"📁 Manifest: {args.dir / MANIFEST_NAME}")
+
+if __name__ == "__main__":
+    with session("canonical_json"):
+        main()
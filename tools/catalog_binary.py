@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Quantized Binary Catalog for Vyoma
+Encodes initial_data.json as fixed-point records plus a string table
+
+Coordinates and magnitudes are stored as integers instead of JSON text
+doubles:
+  - right ascension: uint32, in units of ANGLE_UNIT = 360 / 2^32 degrees
+  - declination: int32, in the same units
+  - magnitude: int16, in centi-magnitudes
+  - distanceLy, distanceAu, radiusKm: float32
+  - type, category, constellation: uint8 codes into enum tables stored
+    in the file (0 = absent)
+  - id, name, description, imageUrl, parentId: uint32 indexes into a
+    deduplicated, offset-indexed UTF-8 string table
+  - any other fields: one JSON object, also in the string table
+
+Error bounds, checked by verify() after every encode:
+  - RA/Dec: at most ANGLE_UNIT, 8.4e-8 degrees (0.30 milliarcseconds).
+    Decoding returns the shortest decimal that re-encodes to the same
+    integer, so values with up to 7 decimals usually come back exactly.
+  - magnitude: at most 0.005 mag
+  - float32 fields: relative error at most 2^-23
+  - everything else: exact
+
+File layout (little-endian, sections 8-byte aligned):
+  header   magic "VYQC", version, record count, record size, then the
+           offsets of the records, id index, string table and enums
+  records  RECORD_DTYPE, one per object, in catalog order
+  index    uint32 record numbers sorted by id, for binary search
+  strings  uint32 count, count + 1 uint32 offsets, UTF-8 blob
+  enums    per enum: uint16 count, then uint32 string indexes
+
+CatalogReader maps the file and views the records, offsets and blob in
+place (numpy views over the mmap): opening costs no parsing or
+copying, and an object is only decoded when it is read.
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ NumPy not installed. Run: pip install numpy")
+    sys.exit(1)
+
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+CATALOG_FILE = Path("app/src/main/assets/initial_data.json")
+OUTPUT_FILE = Path("app/src/main/assets/initial_data.bin")
+MAGIC = b"VYQC"
+VERSION = 1
+ANGLE_UNIT = 360 / 2**32  # degrees per RA/Dec step
+MAGNITUDE_UNIT = 0.01
+FLOAT32_REL_ERROR = 2**-23
+NO_STRING = 0xFFFFFFFF
+HEADER = struct.Struct("<4sHHIIQQQQ")  # magic, version, reserved, count, record size, 4 section offsets
+
+RECORD_DTYPE = np.dtype([
+    ('ra', '<u4'), ('dec', '<i4'),
+    ('id', '<u4'), ('name', '<u4'), ('description', '<u4'), ('image_url', '<u4'), ('parent_id', '<u4'),
+    ('extras', '<u4'),
+    ('distance_ly', '<f4'), ('distance_au', '<f4'), ('radius_km', '<f4'),
+    ('magnitude', '<i2'), ('flags', '<u2'),
+    ('type', 'u1'), ('category', 'u1'), ('constellation', 'u1'), ('reserved', 'u1'),
+])
+
+# Presence bits in 'flags' for the numeric fields, which have no spare value to mark absence
+HAS_RA, HAS_DEC, HAS_MAGNITUDE, HAS_DISTANCE_LY, HAS_DISTANCE_AU, HAS_RADIUS = (1 << n for n in range(6))
+
+# JSON field -> record field, per kind
+STRING_FIELDS = {'id': 'id', 'name': 'name', 'description': 'description', 'imageUrl': 'image_url',
+                 'parentId': 'parent_id'}
+FLOAT_FIELDS = {'distanceLy': ('distance_ly', HAS_DISTANCE_LY), 'distanceAu': ('distance_au', HAS_DISTANCE_AU),
+                'radiusKm': ('radius_km', HAS_RADIUS)}
+ENUM_FIELDS = ['type', 'category', 'constellation']
+FIELD_POSITIONS = {name: i for i, name in enumerate(RECORD_DTYPE.names)}
+KNOWN_FIELDS = set(STRING_FIELDS) | set(FLOAT_FIELDS) | set(ENUM_FIELDS) | {'rightAscension', 'declination',
+                                                                          'magnitude'}
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+def quantize_ra(degrees):
+    """RA in degrees -> uint32 steps, wrapping at 360"""
+    return round((degrees % 360) / ANGLE_UNIT) % 2**32
+
+def quantize_dec(degrees):
+    """Dec in degrees -> int32 steps"""
+    if not -90 <= degrees <= 90:
+        raise ValueError(f"declination {degrees} outside [-90, 90]")
+    return round(degrees / ANGLE_UNIT)
+
+def quantize_magnitude(magnitude):
+    """Magnitude -> int16 centi-magnitudes"""
+    steps = round(magnitude / MAGNITUDE_UNIT)
+    if not -32768 <= steps <= 32767:
+        raise ValueError(f"magnitude {magnitude} outside the int16 centi-magnitude range")
+    return steps
+
+def _shortest(steps, unit, quantize, max_decimals=10):
+    """The shortest decimal that quantizes back to steps"""
+    value = steps * unit
+    for decimals in range(max_decimals):
+        candidate = round(value, decimals)
+        if quantize(candidate) == steps:
+            return candidate
+    return value
+
+def dequantize_ra(steps):
+    return _shortest(int(steps), ANGLE_UNIT, quantize_ra)
+
+def dequantize_dec(steps):
+    return _shortest(int(steps), ANGLE_UNIT, quantize_dec)
+
+def dequantize_magnitude(steps):
+    return round(int(steps) * MAGNITUDE_UNIT, 2)
+
+def _float32_value(value):
+    # str() of a float32 is its shortest round-tripping decimal, so 4.367 comes back as 4.367
+    return float(str(np.float32(value)))
+
+def encode(catalog):
+    """Encode a list of catalog objects as the quantized binary format; returns bytes"""
+    strings = {}
+    def string_index(text):
+        return strings.setdefault(text, len(strings))
+
+    enums = {field: {} for field in ENUM_FIELDS}
+    records = np.zeros(len(catalog), dtype=RECORD_DTYPE)
+    for number, obj in enumerate(catalog):
+        record = records[number]
+        for key, field in STRING_FIELDS.items():
+            value = obj.get(key)
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"{obj.get('id')}: {key} is not a string")
+            record[field] = NO_STRING if value is None else string_index(value)
+        if record['id'] == NO_STRING:
+            raise ValueError(f"object {number} has no id")
+
+        flags = 0
+        if obj.get('rightAscension') is not None:
+            record['ra'] = quantize_ra(obj['rightAscension'])
+            flags |= HAS_RA
+        if obj.get('declination') is not None:
+            record['dec'] = quantize_dec(obj['declination'])
+            flags |= HAS_DEC
+        if obj.get('magnitude') is not None:
+            record['magnitude'] = quantize_magnitude(obj['magnitude'])
+            flags |= HAS_MAGNITUDE
+        for key, (field, bit) in FLOAT_FIELDS.items():
+            if obj.get(key) is not None:
+                record[field] = obj[key]
+                flags |= bit
+        record['flags'] = flags
+
+        for field in ENUM_FIELDS:
+            value = obj.get(field)
+            if value is None:
+                continue
+            codes = enums[field]
+            if value not in codes:
+                if len(codes) == 255:
+                    raise ValueError(f"more than 255 distinct {field} values")
+                codes[value] = len(codes) + 1
+            record[field] = codes[value]
+
+        extras = {k: v for k, v in obj.items() if k not in KNOWN_FIELDS and v is not None}
+        record['extras'] = (string_index(json.dumps(extras, ensure_ascii=False, sort_keys=True))
+                            if extras else NO_STRING)
+
+    enum_section = bytearray()
+    for field in ENUM_FIELDS:
+        names = list(enums[field])
+        enum_section += struct.pack(f"<H{len(names)}I", len(names), *(string_index(n) for n in names))
+
+    # Python orders str by code point, which is also UTF-8 byte order
+    ids = [obj['id'] for obj in catalog]
+    index = np.array(sorted(range(len(ids)), key=ids.__getitem__), dtype='<u4')
+
+    blob = bytearray()
+    offsets = [0]
+    for text in strings:
+        blob += text.encode('utf-8')
+        offsets.append(len(blob))
+    string_section = struct.pack("<I", len(strings)) + np.array(offsets, dtype='<u4').tobytes() + bytes(blob)
+
+    records_offset = _align(HEADER.size)
+    index_offset = _align(records_offset + records.nbytes)
+    strings_offset = _align(index_offset + index.nbytes)
+    enums_offset = _align(strings_offset + len(string_section))
+    output = bytearray(enums_offset + len(enum_section))
+    HEADER.pack_into(output, 0, MAGIC, VERSION, 0, len(catalog), RECORD_DTYPE.itemsize,
+                     records_offset, index_offset, strings_offset, enums_offset)
+    output[records_offset:records_offset + records.nbytes] = records.tobytes()
+    output[index_offset:index_offset + index.nbytes] = index.tobytes()
+    output[strings_offset:strings_offset + len(string_section)] = string_section
+    output[enums_offset:] = enum_section
+    return bytes(output)
+
+class CatalogReader:
+    """
+    Zero-copy reader over an encoded catalog in any buffer
+
+    records is a numpy view of the record array, so whole columns can be
+    read without decoding objects, e.g. reader.records['magnitude'].
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        (magic, version, _, count, record_size,
+         records_offset, index_offset, strings_offset, enums_offset) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a Vyoma quantized catalog")
+        if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"unsupported catalog version {version}")
+        self.records = np.frombuffer(buffer, dtype=RECORD_DTYPE, count=count, offset=records_offset)
+        self._index = np.frombuffer(buffer, dtype='<u4', count=count, offset=index_offset)
+        (string_count,) = struct.unpack_from("<I", buffer, strings_offset)
+        self._offsets = np.frombuffer(buffer, dtype='<u4', count=string_count + 1, offset=strings_offset + 4)
+        self._blob = memoryview(buffer)[strings_offset + 4 + self._offsets.nbytes:enums_offset]
+
+        self.enums = {}
+        position = enums_offset
+        for field in ENUM_FIELDS:
+            (size,) = struct.unpack_from("<H", buffer, position)
+            indexes = struct.unpack_from(f"<{size}I", buffer, position + 2)
+            self.enums[field] = [None] + [self.string(i) for i in indexes]
+            position += 2 + 4 * size
+
+    @classmethod
+    def open(cls, path):
+        """Map a catalog file read-only; close() the reader when done"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        reader = cls(mapped)
+        reader._mapped = mapped
+        return reader
+
+    def close(self):
+        # The numpy views export the mmap's buffer and must go before it can close
+        mapped = getattr(self, '_mapped', None)
+        self.records = self._index = self._offsets = None
+        self._blob.release()
+        self._buffer = None
+        if mapped is not None:
+            mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.records)
+
+    def string(self, number):
+        """String table entry, or None for NO_STRING"""
+        if number == NO_STRING:
+            return None
+        start, end = self._offsets[number:number + 2].tolist()
+        return str(self._blob[start:end], 'utf-8')
+
+    def strings(self):
+        """Every string table entry, decoded"""
+        offsets = self._offsets.tolist()
+        blob = self._blob.tobytes()
+        return [blob[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+    def _object(self, record, string):
+        """Decode a record given as a tuple of Python values; string maps a string index to its text"""
+        obj = {}
+        for key, field in STRING_FIELDS.items():
+            number = record[FIELD_POSITIONS[field]]
+            if number != NO_STRING:
+                obj[key] = string(number)
+        for field in ENUM_FIELDS:
+            code = record[FIELD_POSITIONS[field]]
+            if code:
+                obj[field] = self.enums[field][code]
+        flags = record[FIELD_POSITIONS['flags']]
+        if flags & HAS_RA:
+            obj['rightAscension'] = dequantize_ra(record[FIELD_POSITIONS['ra']])
+        if flags & HAS_DEC:
+            obj['declination'] = dequantize_dec(record[FIELD_POSITIONS['dec']])
+        if flags & HAS_MAGNITUDE:
+            obj['magnitude'] = dequantize_magnitude(record[FIELD_POSITIONS['magnitude']])
+        for key, (field, bit) in FLOAT_FIELDS.items():
+            if flags & bit:
+                obj[key] = _float32_value(record[FIELD_POSITIONS[field]])
+        extras = record[FIELD_POSITIONS['extras']]
+        if extras != NO_STRING:
+            obj.update(json.loads(string(extras)))
+        return obj
+
+    def __getitem__(self, number):
+        """Decode one object, with the same fields as the source minus nulls"""
+        # One tuple of Python values is much cheaper than a numpy lookup per field
+        return self._object(self.records[number].item(), self.string)
+
+    def __iter__(self):
+        """Decode every object; the records and strings are converted in bulk first"""
+        strings = self.strings()
+        return (self._object(record, strings.__getitem__) for record in self.records.tolist())
+
+    def find(self, obj_id):
+        """The object with this id, by binary search of the id index, or None"""
+        target = obj_id.encode('utf-8')
+        low, high = 0, len(self._index)
+        while low < high:
+            middle = (low + high) // 2
+            number = int(self._index[middle])
+            string = int(self.records['id'][number])
+            start, end = self._offsets[string:string + 2].tolist()
+            found = self._blob[start:end].tobytes()
+            if found == target:
+                return self[number]
+            if found < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+def decode(data):
+    """Decode an encoded catalog back to a list of objects"""
+    reader = CatalogReader(data)
+    try:
+        return list(reader)
+    finally:
+        reader.close()
+
+def _angle_error(a, b, wrap=False):
+    error = abs(a - b)
+    return min(error, 360 - error) if wrap else error
+
+def verify(catalog, decoded):
+    """
+    Check a decoded catalog against its source within the error bounds
+
+    Returns a list of problems, empty when every field is exact or within
+    its bound. Null source fields must be absent.
+    """
+    problems = []
+    if len(catalog) != len(decoded):
+        return [f"{len(decoded)} objects decoded, {len(catalog)} expected"]
+    for expected, actual in zip(catalog, decoded):
+        expected = {k: v for k, v in expected.items() if v is not None}
+        obj_id = expected.get('id')
+        if set(expected) != set(actual):
+            problems.append(f"{obj_id}: fields {sorted(expected)} decoded as {sorted(actual)}")
+            continue
+        for key, value in expected.items():
+            got = actual[key]
+            if key in ('rightAscension', 'declination'):
+                error = _angle_error(value, got, wrap=key == 'rightAscension')
+                ok = error <= ANGLE_UNIT
+            elif key == 'magnitude':
+                error = abs(value - got)
+                ok = error <= MAGNITUDE_UNIT / 2 + 1e-9
+            elif key in FLOAT_FIELDS:
+                error = abs(value - got)
+                ok = error <= abs(value) * FLOAT32_REL_ERROR
+            else:
+                error = None
+                ok = value == got
+            if not ok:
+                detail = f" (error {error:.3g})" if error is not None else ""
+                problems.append(f"{obj_id}: {key} {value!r} decoded as {got!r}{detail}")
+    return problems
+
+def self_test():
+    """Round-trip the edge cases and a synthetic catalog, enforcing the error bounds"""
+    from synthetic_data import synthetic_catalog
+
+    edge_cases = [
+        {"id": "ra_zero", "name": "Zero", "type": "STAR", "rightAscension": 0.0, "declination": 0.0, "magnitude": 0.0},
+        {"id": "ra_wrap", "name": "Wrap", "type": "STAR", "rightAscension": 359.99999999, "declination": -90.0},
+        {"id": "ra_360", "name": "Full turn", "type": "STAR", "rightAscension": 360.0, "declination": 90.0},
+        {"id": "sun", "name": "Sun", "type": "STAR", "magnitude": -26.74, "radiusKm": 696350.0,
+         "description": None, "imageUrl": "images/sun.png"},
+        {"id": "faint", "name": "Faint", "type": "GALAXY", "magnitude": 327.67, "distanceLy": 2.537e6,
+         "constellation": "Andromeda"},
+        {"id": "bright", "name": "Bright", "type": "PLANET", "magnitude": -327.68, "distanceAu": 0.387,
+         "parentId": "sun", "category": "Solar System"},
+        {"id": "precise", "name": "Precise", "type": "NEBULA", "rightAscension": 189.20583,
+         "declination": -11.623056, "magnitude": 8.456},
+        {"id": "ünïcode_★", "name": "Ünïcode ★ 北斗", "type": "STAR", "description": "Émission ☄️"},
+        {"id": "extras", "name": "Extras", "type": "PLANET", "metadata": {"has_rings": True, "moons_count": 146}},
+        {"id": "bare", "name": "", "type": "BLACK_HOLE"},
+    ]
+    problems = verify(edge_cases, decode(encode(edge_cases)))
+    catalog = synthetic_catalog(20000)
+    problems += verify(catalog, decode(encode(catalog)))
+
+    reader = CatalogReader(encode(catalog))
+    for obj in catalog[::997]:
+        if reader.find(obj['id']) != reader[catalog.index(obj)]:
+            problems.append(f"find({obj['id']!r}) returned another object")
+    if reader.find("no_such_object") is not None:
+        problems.append("find() of a missing id returned an object")
+    reader.close()
+
+    for bad, expected_error in (({"id": "x", "declination": 90.5}, "declination"),
+                                ({"id": "x", "magnitude": 400.0}, "magnitude"),
+                                ({"name": "no id"}, "no id")):
+        try:
+            encode([bad])
+            problems.append(f"encode accepted {bad}")
+        except ValueError as e:
+            if expected_error not in str(e):
+                problems.append(f"encode rejected {bad} for the wrong reason: {e}")
+    return problems
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Encode the catalog as a quantized binary file")
+    parser.add_argument('--input', type=Path, default=CATALOG_FILE, help=f"catalog JSON (default {CATALOG_FILE})")
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE, help=f"binary catalog (default {OUTPUT_FILE})")
+    parser.add_argument('--verify', action='store_true', help="check an existing --output against --input and exit")
+    parser.add_argument('--decode', type=Path, metavar='JSON', help="decode --output into this JSON file and exit")
+    parser.add_argument('--self-test', action='store_true', help="round-trip edge cases and a synthetic catalog")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    print("=" * 70)
+    print("🗜️  Vyoma Quantized Catalog")
+    print("=" * 70)
+
+    if args.self_test:
+        with stage("self-test"):
+            problems = self_test()
+        for problem in problems[:20]:
+            print(f"  ✗ {problem}")
+        if problems:
+            print(f"\n❌ {len(problems)} round-trip problems")
+            sys.exit(1)
+        print(f"\n✅ Round trips within bounds: RA/Dec ≤ {ANGLE_UNIT:.2g}° "
+              f"({ANGLE_UNIT * 3.6e6:.2f} mas), magnitude ≤ {MAGNITUDE_UNIT / 2}, float32 ≤ 2^-23 relative")
+        return
+
+    if args.decode:
+        with stage("decode"), CatalogReader.open(args.output) as reader:
+            decoded = list(reader)
+        with open(args.decode, 'w', encoding='utf-8') as f:
+            json.dump(decoded, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Decoded {len(decoded)} objects to {args.decode}")
+        return
+
+    if not args.input.exists():
+        print(f"❌ Catalog not found: {args.input}")
+        sys.exit(1)
+    with open(args.input, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+
+    if not args.verify:
+        started = time.perf_counter()
+        with stage("encode"):
+            data = encode(catalog)
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_bytes(data)
+        print(f"\n✓ Encoded {len(catalog)} objects in {time.perf_counter() - started:.2f}s")
+        print(f"  {args.input}: {args.input.stat().st_size / 1024:.1f} KB")
+        print(f"  {args.output}: {len(data) / 1024:.1f} KB")
+
+    with stage("verify"), CatalogReader.open(args.output) as reader:
+        problems = verify(catalog, list(reader))
+    for problem in problems[:20]:
+        print(f"  ✗ {problem}")
+    if problems:
+        print(f"\n❌ {len(problems)} objects outside the error bounds")
+        sys.exit(1)
+    print(f"\n✅ All {len(catalog)} objects within the error bounds")
+
+if __name__ == "__main__":
+    with session("catalog_binary"):
+        main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Catalog Deltas for Vyoma
+Diffs two catalog builds into a small versioned patch, and applies it
+
+DatabaseInitializer re-reads initial_data.json and inserts every row
+again, although a catalog update usually touches a handful of objects.
+A delta lists only what changed between two builds, by object id:
+  delete     ids of the objects that are gone
+  insert     the objects that are new, whole
+  insert_at  their positions in the new catalog; absent when they are
+             all appended
+  update     per object, the fields whose value changed ("set") and the
+             fields that were removed ("unset")
+  order      the full id order, present only when objects moved rather
+             than were inserted or deleted
+
+Each delta carries the content hash of the build it applies to and of
+the build it produces, as catalog_manifest.json records it for
+initial_data.json (canonical_json.content_hash). apply() refuses a base
+with another hash, or a delta naming ids or fields the base lacks, and
+checks its result against the target hash, so a device that missed an
+update or holds edited data is sent the full catalog instead of a patch
+that does not fit. The app side maps onto Room directly: delete by id,
+insert, then update the listed columns.
+"""
+
+import argparse
+import copy
+import gzip
+import json
+import random
+import sys
+from pathlib import Path
+
+from canonical_json import content_hash, write_json
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+DATA_FILE = Path("app/src/main/assets/initial_data.json")
+OUTPUT_FILE = Path("Data/catalog_delta.json")
+DELTA_FORMAT = 1
+
+def _json(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+def _by_id(catalog):
+    objects = {}
+    for obj in catalog:
+        if obj['id'] in objects:
+            raise ValueError(f"id {obj['id']!r} occurs twice")
+        objects[obj['id']] = obj
+    return objects
+
+def _default_order(base_ids, deleted, inserted, positions=None):
+    """The base order without deleted ids, with inserted ids placed at their positions"""
+    order = [obj_id for obj_id in base_ids if obj_id not in deleted]
+    if positions is None:
+        return order + inserted
+    for position, obj_id in zip(positions, inserted):
+        order.insert(position, obj_id)
+    return order
+
+def diff(base, new):
+    """The delta that turns catalog base into catalog new"""
+    base_objects = _by_id(base)
+    new_objects = _by_id(new)
+    deleted = [obj_id for obj_id in base_objects if obj_id not in new_objects]
+    inserted = [obj for obj in new if obj['id'] not in base_objects]
+    updated = []
+    for obj in new:
+        old = base_objects.get(obj['id'])
+        # Compared as JSON, so 1 -> 1.0 counts as a change
+        if old is None or _json(old) == _json(obj):
+            continue
+        change = {'id': obj['id']}
+        changed = {field: value for field, value in obj.items()
+                   if field not in old or _json(old[field]) != _json(value)}
+        removed = [field for field in old if field not in obj]
+        if changed:
+            change['set'] = changed
+        if removed:
+            change['unset'] = removed
+        updated.append(change)
+
+    delta = {
+        'format': DELTA_FORMAT,
+        'base': content_hash(base),
+        'target': content_hash(new),
+        'delete': deleted,
+        'insert': inserted,
+        'update': updated,
+    }
+    order = [obj['id'] for obj in new]
+    inserted_ids = [obj['id'] for obj in inserted]
+    positions = [i for i, obj in enumerate(new) if obj['id'] not in base_objects]
+    if positions != list(range(len(new) - len(inserted), len(new))):
+        delta['insert_at'] = positions
+    if order != _default_order(base_objects, set(deleted), inserted_ids, delta.get('insert_at')):
+        delta['order'] = order
+    return delta
+
+def apply(base, delta):
+    """
+    Catalog base with delta applied
+
+    Raises ValueError when base is not the build the delta was made
+    from, when the delta names an id or field that is not there, or
+    when the result does not hash to the delta's target.
+    """
+    if delta.get('format') != DELTA_FORMAT:
+        raise ValueError(f"unsupported delta format {delta.get('format')!r}")
+    if content_hash(base) != delta['base']:
+        raise ValueError("the catalog is not the base this delta was made from")
+
+    objects = {obj_id: dict(obj) for obj_id, obj in _by_id(base).items()}
+    deleted = set(delta['delete'])
+    for obj_id in deleted:
+        if obj_id not in objects:
+            raise ValueError(f"deleted id {obj_id!r} is not in the catalog")
+        del objects[obj_id]
+    for change in delta['update']:
+        obj = objects.get(change['id'])
+        if obj is None:
+            raise ValueError(f"updated id {change['id']!r} is not in the catalog")
+        for field in change.get('unset', ()):
+            if field not in obj:
+                raise ValueError(f"unset field {field!r} is not in object {change['id']!r}")
+            del obj[field]
+        obj.update(copy.deepcopy(change.get('set', {})))
+    inserted = []
+    for obj in delta['insert']:
+        if obj['id'] in objects:
+            raise ValueError(f"inserted id {obj['id']!r} is already in the catalog")
+        objects[obj['id']] = copy.deepcopy(obj)
+        inserted.append(obj['id'])
+
+    order = delta.get('order') or _default_order((obj['id'] for obj in base), deleted, inserted,
+                                                 delta.get('insert_at'))
+    unknown = [obj_id for obj_id in order if obj_id not in objects]
+    if unknown:
+        raise ValueError(f"the delta's order names {len(unknown)} unknown ids, e.g. {unknown[0]!r}")
+    result = [objects[obj_id] for obj_id in order]
+    if len(result) != len(objects) or len(set(order)) != len(order):
+        raise ValueError("the delta's order does not list every object")
+    if content_hash(result) != delta['target']:
+        raise ValueError("applying the delta did not produce its target catalog")
+    return result
+
+def serialize(delta):
+    """The delta as compact UTF-8 JSON"""
+    return json.dumps(delta, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def _mutated(catalog, rng, deletes, inserts, updates):
+    """A copy of catalog with some objects deleted, inserted and edited"""
+    new = [copy.deepcopy(obj) for obj in catalog if rng.random() >= deletes / max(1, len(catalog))]
+    for obj in rng.sample(new, min(updates, len(new))):
+        edit = rng.randrange(5)
+        if edit == 0:
+            obj['magnitude'] = round(rng.uniform(-1, 12), 2)
+        elif edit == 1:
+            obj['description'] = "Revised ★ description."
+        elif edit == 2:
+            obj.pop('name')
+        elif edit == 3:
+            obj['constellation'] = None
+        else:
+            obj['metadata'] = {'revision': rng.randint(1, 9), 'tags': ["a", "b"]}
+    for i in range(inserts):
+        new.insert(rng.randrange(len(new) + 1) if i % 2 else len(new),
+                   {"id": f"inserted_{i}", "name": f"Inserted {i}", "type": "STAR", "magnitude": 5.0})
+    return new
+
+def self_test():
+    """Check apply(base, diff(base, new)) == new over edge cases and a synthetic catalog"""
+    from synthetic_data import synthetic_catalog
+
+    rng = random.Random(0)
+    base = synthetic_catalog(5000)
+    one = {"id": "sun", "name": "Sun", "type": "STAR", "magnitude": -26.74}
+    cases = {
+        'identical': (base, copy.deepcopy(base)),
+        'edited': (base, _mutated(base, rng, deletes=50, inserts=20, updates=100)),
+        'appended only': (base, base + [dict(one, id="appended")]),
+        'reordered': (base, base[::-1]),
+        'empty base': ([], base[:100]),
+        'emptied': (base[:100], []),
+        'int and float': ([dict(one, magnitude=1)], [dict(one, magnitude=1.0)]),
+        'null and absent': ([dict(one, imageUrl=None)], [one]),
+        'nested': ([dict(one, metadata={'moons': [1, 2]})], [dict(one, metadata={'moons': [1, 2, 3]})]),
+    }
+    problems = []
+    for name, (old, new) in cases.items():
+        snapshot = copy.deepcopy(old)
+        delta = json.loads(serialize(diff(old, new)))
+        try:
+            result = apply(old, delta)
+        except ValueError as e:
+            problems.append(f"{name}: apply failed: {e}")
+            continue
+        if result != new:
+            problems.append(f"{name}: apply(base, delta) != new")
+        if old != snapshot:
+            problems.append(f"{name}: apply modified the base catalog")
+
+    edited = cases['edited'][1]
+    delta = diff(base, edited)
+    if len(serialize(delta)) * 10 > len(serialize(edited)):
+        problems.append("a 170-object delta is not much smaller than the catalog")
+    if 'order' in delta:
+        problems.append("an edit without moves carried a full order")
+    for bad_base, reason in ((edited, "wrong base"), (base[1:], "missing object")):
+        try:
+            apply(bad_base, delta)
+            problems.append(f"apply accepted a {reason}")
+        except ValueError:
+            pass
+    # Malformed deltas over the right base must fail with ValueError, not KeyError
+    malformed = {
+        'unknown deleted id': dict(delta, delete=delta['delete'] + ["no_such_id"]),
+        'unknown updated id': dict(delta, update=delta['update'] + [{'id': "no_such_id", 'set': {'name': "x"}}]),
+        'missing unset field': dict(delta, update=[{'id': base[0]['id'], 'unset': ["no_such_field"]}]),
+        'unknown id in order': dict(delta, order=[obj['id'] for obj in edited] + ["no_such_id"]),
+    }
+    for reason, bad_delta in malformed.items():
+        try:
+            apply(base, bad_delta)
+            problems.append(f"apply accepted a delta with a {reason}")
+        except ValueError:
+            pass
+        except KeyError:
+            problems.append(f"apply raised KeyError for a delta with a {reason}")
+    try:
+        diff(base + base[:1], edited)
+        problems.append("diff accepted a duplicate id")
+    except ValueError:
+        pass
+    return problems
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Diff two catalog builds into a delta, or apply one")
+    parser.add_argument('--base', type=Path, help="catalog the delta starts from")
+    parser.add_argument('--new', type=Path, default=DATA_FILE, help=f"catalog the delta produces (default {DATA_FILE})")
+    parser.add_argument('--apply', type=Path, metavar='DELTA', help="apply this delta to --base instead of diffing")
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE,
+                        help=f"delta, or with --apply the patched catalog (default {OUTPUT_FILE})")
+    parser.add_argument('--self-test', action='store_true', help="check apply(base, diff(base, new)) == new")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    print("=" * 70)
+    print("🧩 Vyoma Catalog Delta")
+    print("=" * 70)
+
+    if args.self_test:
+        problems = self_test()
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        if problems:
+            print(f"\n❌ {len(problems)} delta problems")
+            sys.exit(1)
+        print("\n✅ Every delta applies back to its target catalog")
+        return
+
+    if not args.base:
+        parser.error("--base is required")
+    inputs = [args.base, args.apply] if args.apply else [args.base, args.new]
+    for path in inputs:
+        if not path.exists():
+            print(f"❌ Not found: {path}")
+            sys.exit(1)
+    with open(args.base, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+
+    if args.apply:
+        with open(args.apply, 'r', encoding='utf-8') as f:
+            delta = json.load(f)
+        try:
+            with stage("apply"):
+                new = apply(base, delta)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        write_json(args.output, new)
+        print(f"\n✅ {len(new)} objects, matching target {delta['target'][:12]}")
+        print(f"📁 Saved to {args.output}")
+        return
+
+    with open(args.new, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+    with stage("diff"):
+        delta = diff(base, new)
+        data = serialize(delta)
+    with stage("apply"):
+        applied = apply(base, json.loads(data))
+    if applied != new:
+        print("❌ The delta does not apply back to the new catalog")
+        sys.exit(1)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_bytes(data)
+
+    full = serialize(new)
+    print(f"\n📊 {args.base} ({delta['base'][:12]}) -> {args.new} ({delta['target'][:12]})")
+    print(f"  Deleted: {len(delta['delete'])}, inserted: {len(delta['insert'])}, "
+          f"updated: {len(delta['update'])}{', reordered' if 'order' in delta else ''}")
+    print(f"  Delta:        {len(data) / 1024:8.1f} KB, gzipped {len(gzip.compress(data, 9)) / 1024:8.1f} KB")
+    print(f"  Full catalog: {len(full) / 1024:8.1f} KB, gzipped {len(gzip.compress(full, 9)) / 1024:8.1f} KB")
+    print(f"\n✅ Delta applies back to {args.new}")
+    print(f"📁 Saved to {args.output}")
+
+if __name__ == "__main__":
+    with session("catalog_delta"):
+        main()
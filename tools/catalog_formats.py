@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Catalog Format Shoot-out for Vyoma
+Writes initial_data.json in candidate asset formats and measures each
+
+The app parses the whole of initial_data.json at first launch. This
+harness writes the same catalog as pretty JSON (as the tools write it
+today), minified JSON, zlib- and gzip-compressed JSON, a packed binary
+layout, the quantized layout of catalog_binary.py and a SQLite
+database, and measures for each:
+  - file size, and its size as a deflated APK entry
+  - full load: parse every object
+  - first object: open the file cold and fetch one object by id
+  - lookup: fetch a random object by id from an already open file
+
+Every format is read back and checked against the source: exactly,
+or within catalog_binary's error bounds for the quantized layout. Null
+fields are treated as absent, as DatabaseInitializer does.
+
+Packed binary layout (little-endian):
+  header   magic "VYCT", version, column count, record count, record
+           size, then the offsets of the records, id index and strings
+  columns  per column: kind byte, name length byte, UTF-8 name
+  records  fixed-size: a presence bitmap, then per column an f64, an
+           i64, or a u32 index into the string table (strings and
+           JSON-encoded values)
+  id index record numbers as u32, sorted by id, for binary search
+  strings  count, count + 1 u32 offsets, UTF-8 blob
+"""
+
+import argparse
+import gzip
+import io
+import json
+import mmap
+import random
+import sqlite3
+import struct
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+from pathlib import Path
+
+from catalog_binary import CatalogReader
+from catalog_binary import decode as decode_quantized
+from catalog_binary import encode as encode_quantized
+from catalog_binary import verify as verify_quantized
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+CATALOG_FILE = Path("app/src/main/assets/initial_data.json")
+REPEAT = 5
+LOOKUPS = 1000
+MAGIC = b"VYCT"
+BINARY_VERSION = 1
+HEADER = struct.Struct("<4sHHIIQQQ")
+KIND_STR, KIND_FLOAT, KIND_INT, KIND_JSON = range(4)
+VALUE_FORMATS = {KIND_STR: "I", KIND_FLOAT: "d", KIND_INT: "q", KIND_JSON: "I"}
+SQL_TYPES = {KIND_STR: "TEXT", KIND_FLOAT: "REAL", KIND_INT: "INTEGER", KIND_JSON: "TEXT"}
+
+def without_nulls(catalog):
+    """The catalog with null fields dropped, which is how the app reads it"""
+    return [{k: v for k, v in obj.items() if v is not None} for obj in catalog]
+
+def column_kinds(catalog):
+    """Field name -> value kind, over every object, in first-seen order"""
+    kinds = {}
+    for obj in catalog:
+        for key, value in obj.items():
+            if value is None:
+                kinds.setdefault(key, None)
+                continue
+            if isinstance(value, str):
+                kind = KIND_STR
+            elif isinstance(value, float):
+                kind = KIND_FLOAT
+            elif isinstance(value, int) and not isinstance(value, bool):
+                kind = KIND_INT
+            else:
+                kind = KIND_JSON
+            previous = kinds.get(key)
+            if previous is None or previous == kind:
+                kinds[key] = kind
+            else:
+                # Mixed ints and floats, or anything else mixed: store as JSON text
+                kinds[key] = KIND_JSON
+    kinds = {key: KIND_STR if kind is None else kind for key, kind in kinds.items()}
+    if kinds.get('id') != KIND_STR:
+        raise ValueError("every object needs a string id")
+    return kinds
+
+# JSON
+
+def write_pretty_json(catalog, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, indent=2, ensure_ascii=False)
+
+def write_minified_json(catalog, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False, separators=(',', ':'))
+
+def _minified_bytes(catalog):
+    return json.dumps(catalog, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def write_zlib_json(catalog, path):
+    Path(path).write_bytes(zlib.compress(_minified_bytes(catalog), 9))
+
+def write_gzip_json(catalog, path):
+    # mtime=0 keeps the file identical between runs
+    Path(path).write_bytes(gzip.compress(_minified_bytes(catalog), 9, mtime=0))
+
+def load_json(path):
+    with open(path, 'rb') as f:
+        return json.loads(f.read())
+
+def load_zlib_json(path):
+    return json.loads(zlib.decompress(Path(path).read_bytes()))
+
+def load_gzip_json(path):
+    return json.loads(gzip.decompress(Path(path).read_bytes()))
+
+def json_opener(load):
+    """A JSON file has no index: opening it parses everything"""
+    def open_catalog(path):
+        by_id = {obj['id']: obj for obj in load(path)}
+        return by_id.get, None
+    return open_catalog
+
+# Packed binary
+
+def write_binary(catalog, path):
+    kinds = column_kinds(catalog)
+    names = list(kinds)
+    bitmap_size = (len(names) + 7) // 8
+    record = struct.Struct("<" + f"{bitmap_size}s" + "".join(VALUE_FORMATS[kinds[n]] for n in names))
+
+    strings = {}
+    def string_index(text):
+        return strings.setdefault(text, len(strings))
+
+    records = bytearray()
+    for obj in catalog:
+        bitmap = bytearray(bitmap_size)
+        values = []
+        for i, name in enumerate(names):
+            value = obj.get(name)
+            kind = kinds[name]
+            if value is not None:
+                bitmap[i // 8] |= 1 << (i % 8)
+            if kind == KIND_STR:
+                values.append(string_index(value) if value is not None else 0)
+            elif kind == KIND_JSON:
+                values.append(string_index(json.dumps(value, ensure_ascii=False, sort_keys=True))
+                              if value is not None else 0)
+            elif kind == KIND_FLOAT:
+                values.append(float(value) if value is not None else 0.0)
+            else:
+                values.append(value if value is not None else 0)
+        records += record.pack(bytes(bitmap), *values)
+
+    order = sorted(range(len(catalog)), key=lambda n: catalog[n]['id'])
+    index = struct.pack(f"<{len(order)}I", *order)
+
+    blob = bytearray()
+    offsets = [0]
+    for text in strings:
+        blob += text.encode('utf-8')
+        offsets.append(len(blob))
+    string_table = struct.pack(f"<I{len(offsets)}I", len(strings), *offsets) + bytes(blob)
+
+    columns = bytearray()
+    for name in names:
+        encoded = name.encode('utf-8')
+        columns += struct.pack("<BB", kinds[name], len(encoded)) + encoded
+
+    records_offset = HEADER.size + len(columns)
+    index_offset = records_offset + len(records)
+    strings_offset = index_offset + len(index)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, BINARY_VERSION, len(names), len(catalog), record.size,
+                            records_offset, index_offset, strings_offset))
+        f.write(columns)
+        f.write(records)
+        f.write(index)
+        f.write(string_table)
+
+class BinaryCatalog:
+    """Reader for the packed binary layout over any buffer (bytes or mmap)"""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        (magic, version, column_count, self.count, record_size,
+         self.records_offset, self.index_offset, strings_offset) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != BINARY_VERSION:
+            raise ValueError("not a packed catalog")
+        self.columns = []
+        position = HEADER.size
+        for _ in range(column_count):
+            kind, length = struct.unpack_from("<BB", buffer, position)
+            self.columns.append((buffer[position + 2:position + 2 + length].decode('utf-8'), kind))
+            position += 2 + length
+        bitmap_size = (column_count + 7) // 8
+        self.record = struct.Struct("<" + f"{bitmap_size}s" +
+                                    "".join(VALUE_FORMATS[kind] for _, kind in self.columns))
+        if self.record.size != record_size:
+            raise ValueError("record size mismatch")
+        self.id_column = [name for name, _ in self.columns].index('id')
+        (string_count,) = struct.unpack_from("<I", buffer, strings_offset)
+        self.string_offsets = strings_offset + 4
+        self.blob_offset = self.string_offsets + 4 * (string_count + 1)
+
+    def string(self, number):
+        start, end = struct.unpack_from("<II", self.buffer, self.string_offsets + 4 * number)
+        return self.buffer[self.blob_offset + start:self.blob_offset + end].decode('utf-8')
+
+    def object(self, number):
+        bitmap, *values = self.record.unpack_from(self.buffer, self.records_offset + number * self.record.size)
+        obj = {}
+        for i, ((name, kind), value) in enumerate(zip(self.columns, values)):
+            if not bitmap[i // 8] & (1 << (i % 8)):
+                continue
+            if kind == KIND_STR:
+                value = self.string(value)
+            elif kind == KIND_JSON:
+                value = json.loads(self.string(value))
+            obj[name] = value
+        return obj
+
+    def all(self):
+        return [self.object(n) for n in range(self.count)]
+
+    def record_id(self, number):
+        values = self.record.unpack_from(self.buffer, self.records_offset + number * self.record.size)
+        return self.string(values[1 + self.id_column])
+
+    def find(self, obj_id):
+        """The object with this id, by binary search of the id index, or None"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            (number,) = struct.unpack_from("<I", self.buffer, self.index_offset + 4 * middle)
+            found = self.record_id(number)
+            if found == obj_id:
+                return self.object(number)
+            if found < obj_id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+def load_binary(path):
+    return BinaryCatalog(Path(path).read_bytes()).all()
+
+def open_binary(path):
+    f = open(path, 'rb')
+    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    def close():
+        buffer.close()
+        f.close()
+    return BinaryCatalog(buffer).find, close
+
+# SQLite
+
+def write_sqlite(catalog, path):
+    kinds = column_kinds(catalog)
+    Path(path).unlink(missing_ok=True)
+    db = sqlite3.connect(path)
+    columns = ", ".join(f'"{name}" {SQL_TYPES[kind]}' + (" PRIMARY KEY" if name == 'id' else "")
+                        for name, kind in kinds.items())
+    db.execute(f"CREATE TABLE objects ({columns}) WITHOUT ROWID")
+    db.execute("CREATE TABLE columns (position INTEGER, name TEXT, kind INTEGER)")
+    db.executemany("INSERT INTO columns VALUES (?, ?, ?)",
+                   [(i, name, kind) for i, (name, kind) in enumerate(kinds.items())])
+    # WITHOUT ROWID tables are ordered by id, so keep the catalog order in a column
+    db.execute('ALTER TABLE objects ADD COLUMN "_position" INTEGER')
+    rows = []
+    for position, obj in enumerate(catalog):
+        row = []
+        for name, kind in kinds.items():
+            value = obj.get(name)
+            if kind == KIND_JSON and value is not None:
+                value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+            row.append(value)
+        rows.append(row + [position])
+    db.executemany(f"INSERT INTO objects VALUES ({', '.join('?' * (len(kinds) + 1))})", rows)
+    db.commit()
+    db.execute("VACUUM")
+    db.close()
+
+def _sqlite_row_reader(db):
+    kinds = [kind for _, kind in db.execute("SELECT name, kind FROM columns ORDER BY position")]
+    names = [name for name, _ in db.execute("SELECT name, kind FROM columns ORDER BY position")]
+    def to_object(row):
+        return {name: json.loads(value) if kind == KIND_JSON else value
+                for name, kind, value in zip(names, kinds, row) if value is not None}
+    select = "SELECT " + ", ".join(f'"{name}"' for name in names) + " FROM objects"
+    return select, to_object
+
+def load_sqlite(path):
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    select, to_object = _sqlite_row_reader(db)
+    catalog = [to_object(row) for row in db.execute(select + ' ORDER BY "_position"')]
+    db.close()
+    return catalog
+
+def open_sqlite(path):
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    select, to_object = _sqlite_row_reader(db)
+    query = select + " WHERE id = ?"
+    def find(obj_id):
+        row = db.execute(query, (obj_id,)).fetchone()
+        return to_object(row) if row else None
+    return find, db.close
+
+# Quantized binary (see catalog_binary.py)
+
+def write_quantized(catalog, path):
+    Path(path).write_bytes(encode_quantized(catalog))
+
+def load_quantized(path):
+    return decode_quantized(Path(path).read_bytes())
+
+def open_quantized(path):
+    reader = CatalogReader.open(path)
+    return reader.find, reader.close
+
+def exactly_equal(expected, actual):
+    return without_nulls(actual) == without_nulls(expected)
+
+def within_quantized_bounds(expected, actual):
+    return not verify_quantized(expected, actual)
+
+# name -> (file name, write, load, open, read-back check); open returns (find by id, close or None)
+FORMATS = {
+    'pretty JSON': ("catalog.json", write_pretty_json, load_json, json_opener(load_json), exactly_equal),
+    'minified JSON': ("catalog.min.json", write_minified_json, load_json, json_opener(load_json), exactly_equal),
+    'zlib JSON': ("catalog.json.zz", write_zlib_json, load_zlib_json, json_opener(load_zlib_json), exactly_equal),
+    'gzip JSON': ("catalog.json.gz", write_gzip_json, load_gzip_json, json_opener(load_gzip_json), exactly_equal),
+    'packed binary': ("catalog.bin", write_binary, load_binary, open_binary, exactly_equal),
+    'quantized binary': ("catalog.qbin", write_quantized, load_quantized, open_quantized, within_quantized_bounds),
+    'SQLite': ("catalog.db", write_sqlite, load_sqlite, open_sqlite, exactly_equal),
+}
+
+def apk_entry_size(path):
+    """Bytes the file takes as a deflated zip entry, as assets are stored in an APK"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as apk:
+        apk.write(path, f"assets/{Path(path).name}")
+        return apk.getinfo(f"assets/{Path(path).name}").compress_size
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+def measure(name, catalog, output_dir, repeat=REPEAT, lookups=LOOKUPS, seed=0):
+    """Write one format, check it reads back, and time it"""
+    file_name, write, load, open_catalog, same = FORMATS[name]
+    path = Path(output_dir) / file_name
+    write(catalog, path)
+
+    round_trip = same(catalog, load(path))
+    ids = random.Random(seed).choices([obj['id'] for obj in catalog], k=lookups)
+    expected_by_id = {obj['id']: obj for obj in catalog}
+
+    def first_object():
+        find, close = open_catalog(path)
+        find(ids[0])
+        if close:
+            close()
+
+    find, close = open_catalog(path)
+    started = time.perf_counter()
+    found = [find(obj_id) for obj_id in ids]
+    lookup_time = (time.perf_counter() - started) / lookups
+    if close:
+        close()
+    round_trip = round_trip and same([expected_by_id[obj_id] for obj_id in ids], found)
+
+    return {
+        'format': name,
+        'file': file_name,
+        'bytes': path.stat().st_size,
+        'apk_bytes': apk_entry_size(path),
+        'load_s': best_time(lambda: load(path), repeat),
+        'first_object_s': best_time(first_object, repeat),
+        'lookup_s': lookup_time,
+        'round_trip': round_trip,
+    }
+
+def print_report(results, objects):
+    print(f"\n{'Format':<17s} {'File KB':>9s} {'APK KB':>9s} {'Load ms':>9s} {'First ms':>9s} "
+          f"{'Lookup µs':>10s} {'OK':>3s}")
+    print("-" * 72)
+    baseline = results[0]
+    for r in results:
+        print(f"{r['format']:<17s} {r['bytes'] / 1024:>9.1f} {r['apk_bytes'] / 1024:>9.1f} "
+              f"{r['load_s'] * 1000:>9.2f} {r['first_object_s'] * 1000:>9.2f} {r['lookup_s'] * 1e6:>10.2f} "
+              f"{'✓' if r['round_trip'] else '✗':>3s}")
+    print("-" * 72)
+    print(f"{objects} objects. APK KB is the deflated entry size; First ms opens the file cold and reads one object.")
+    smallest = min(results, key=lambda r: r['apk_bytes'])
+    fastest = min(results, key=lambda r: r['load_s'])
+    print(f"Smallest in the APK: {smallest['format']} ({smallest['apk_bytes'] / baseline['apk_bytes']:.0%} of "
+          f"{baseline['format']}); fastest full load: {fastest['format']} "
+          f"({fastest['load_s'] / baseline['load_s']:.0%} of {baseline['format']})")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compare asset formats for the catalog")
+    parser.add_argument('--input', type=Path, default=CATALOG_FILE, help=f"catalog to convert (default {CATALOG_FILE})")
+    parser.add_argument('--synthetic', metavar='COUNT',
+                        help="use a synthetic catalog of COUNT objects (e.g. 100k) instead of --input")
+    parser.add_argument('--output-dir', type=Path, help="keep the written files here (default: a temp dir)")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help=f"timed runs per measurement (default {REPEAT})")
+    parser.add_argument('--report', type=Path, help="also write the results as JSON")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    print("=" * 70)
+    print("📦 Vyoma Catalog Format Shoot-out")
+    print("=" * 70)
+
+    if args.synthetic:
+        from synthetic_data import parse_count, synthetic_catalog
+        catalog = synthetic_catalog(parse_count(args.synthetic))
+        source = f"synthetic catalog ({args.synthetic})"
+    else:
+        if not args.input.exists():
+            print(f"❌ Catalog not found: {args.input}")
+            sys.exit(1)
+        with open(args.input, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+        source = str(args.input)
+    print(f"\n📂 {source}: {len(catalog)} objects")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = args.output_dir or Path(tmp)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        results = []
+        for name in FORMATS:
+            print(f"  ⏱  {name}...")
+            with stage(name):
+                results.append(measure(name, catalog, output_dir, repeat=args.repeat))
+
+    print_report(results, len(catalog))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'source': source, 'objects': len(catalog), 'results': results}, f, indent=2, sort_keys=True)
+        print(f"📋 Report: {args.report}")
+
+    failed = [r['format'] for r in results if not r['round_trip']]
+    if failed:
+        print(f"\n❌ Did not read back identically: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    with session("catalog_formats"):
+        main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Compact Object Ids for Vyoma
+Replaces string object ids with dense integers and a shared id table
+
+process_stars_ascii names most stars after their position
+(star_12_34_m5_67), and initial_data.json repeats those strings in every
+id and parentId, which Room then keys and indexes as TEXT. This stage
+numbers the objects densely instead: id and parentId become integers,
+and object_ids.json maps each number back to its string id, the number
+being the position in the list.
+
+object_ids.json is also the persisted mapping. It is only ever appended
+to: an id keeps its number on every rebuild, a new id gets the next free
+number, and an id that leaves the catalog keeps its slot so the number
+is never handed to another object. The first build, and each batch of
+new ids after it, is numbered brightest first (--order magnitude) or by
+declination band and right ascension (--order spatial), so neighbours
+in the table tend to be read together. Both files are written as
+canonical JSON and recorded in catalog_manifest.json, so --verify and
+canonical_json.py --check catch a hand-edited or stale id table.
+
+An INTEGER PRIMARY KEY is SQLite's rowid, so the separate index Room
+builds for a TEXT key disappears; the report compares both layouts of
+the astronomical_objects table.
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from canonical_json import stale_assets, write_json
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+DATA_FILE = Path("app/src/main/assets/initial_data.json")
+ID_TABLE_FILE = Path("app/src/main/assets/object_ids.json")
+OUTPUT_FILE = Path("app/src/main/assets/initial_data_compact.json")
+ORDERS = ('magnitude', 'spatial')
+DEC_BAND_DEGREES = 1.0  # height of the declination bands of the spatial order
+REPORT_REPEAT = 5
+
+# The astronomical_objects table as Room creates it
+ROOM_COLUMNS = ["name TEXT NOT NULL", "type TEXT NOT NULL", "description TEXT", "distanceAu REAL",
+                "distanceLy REAL", "radiusKm REAL", "magnitude REAL", "constellation TEXT", "imageUrl TEXT",
+                "rightAscension REAL", "declination REAL", "category TEXT"]
+
+def load_id_table(path):
+    """The persisted id table, [] when there is none yet"""
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    if len(set(table)) != len(table):
+        raise ValueError(f"{path} lists an id twice")
+    return table
+
+def save_id_table(path, table):
+    """Write the id table as canonical JSON, one id per line so rebuilds diff cleanly"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json(path, table)
+
+def sort_key(obj, order):
+    """Where an object goes among the ids numbered in the same build"""
+    magnitude = obj.get('magnitude')
+    magnitude = math.inf if magnitude is None else magnitude
+    ra = obj.get('rightAscension')
+    dec = obj.get('declination')
+    if ra is None or dec is None:
+        place = (math.inf, math.inf)
+    else:
+        place = (math.floor((dec + 90) / DEC_BAND_DEGREES), ra)
+    if order == 'spatial':
+        return place + (magnitude, obj['id'])
+    return (magnitude,) + place + (obj['id'],)
+
+def assign_ids(catalog, table, order='magnitude'):
+    """
+    Append the ids of catalog that table lacks, in order
+
+    Returns the new ids. Ids only named as a parent are numbered after
+    the objects, in name order.
+    """
+    known = set(table)
+    new_objects = sorted((obj for obj in catalog if obj['id'] not in known), key=lambda obj: sort_key(obj, order))
+    new_ids = [obj['id'] for obj in new_objects]
+    known.update(new_ids)
+    new_ids += sorted({obj['parentId'] for obj in catalog if obj.get('parentId') and obj['parentId'] not in known})
+    table.extend(new_ids)
+    return new_ids
+
+def compact_catalog(catalog, table):
+    """The catalog with id and parentId replaced by their numbers in table"""
+    numbers = {obj_id: number for number, obj_id in enumerate(table)}
+    compact = []
+    for obj in catalog:
+        obj = dict(obj, id=numbers[obj['id']])
+        if obj.get('parentId') is not None:
+            obj['parentId'] = numbers[obj['parentId']]
+        compact.append(obj)
+    return compact
+
+def expand_catalog(compact, table):
+    """compact_catalog undone"""
+    catalog = []
+    for obj in compact:
+        obj = dict(obj, id=table[obj['id']])
+        if obj.get('parentId') is not None:
+            obj['parentId'] = table[obj['parentId']]
+        catalog.append(obj)
+    return catalog
+
+def verify(catalog, compact, table, previous):
+    """Problems with a compaction, [] when it is sound"""
+    problems = []
+    if table[:len(previous)] != previous:
+        moved = sum(1 for old, new in zip(previous, table) if old != new) + max(0, len(previous) - len(table))
+        problems.append(f"{moved} previously assigned ids changed number")
+    if len(set(table)) != len(table):
+        problems.append("the id table lists an id twice")
+    if any(not isinstance(obj['id'], int) for obj in compact):
+        problems.append("some compact ids are not integers")
+    if expand_catalog(compact, table) != catalog:
+        problems.append("the compact catalog does not expand back to the original")
+    return problems
+
+def _room_table(catalog, integer_keys):
+    """An in-memory astronomical_objects table holding catalog"""
+    key_type = "INTEGER" if integer_keys else "TEXT"
+    db = sqlite3.connect(":memory:")
+    db.execute(f"CREATE TABLE astronomical_objects (id {key_type} NOT NULL PRIMARY KEY, "
+               f"{', '.join(ROOM_COLUMNS)}, parentId {key_type})")
+    names = ['id'] + [column.split()[0] for column in ROOM_COLUMNS] + ['parentId']
+    db.executemany(f"INSERT INTO astronomical_objects VALUES ({', '.join('?' * len(names))})",
+                   [tuple(obj.get(name) for name in names) for obj in catalog])
+    db.commit()
+    return db
+
+def _table_sizes(db):
+    """(table bytes, index bytes), or (database bytes, None) without the dbstat module"""
+    try:
+        sizes = dict(db.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+    except sqlite3.OperationalError:
+        page_size = db.execute("PRAGMA page_size").fetchone()[0]
+        return db.execute("PRAGMA page_count").fetchone()[0] * page_size, None
+    index = sum(size for name, size in sizes.items() if name.startswith('sqlite_autoindex_astronomical_objects'))
+    return sizes['astronomical_objects'], index
+
+def _best_time(run, repeat):
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def database_report(catalog, compact, repeat=REPORT_REPEAT):
+    """Table size, key index size, by-id lookup and join times for string and integer keys"""
+    report = {}
+    for label, rows, integer_keys in (('string', catalog, False), ('integer', compact, True)):
+        db = _room_table(rows, integer_keys)
+        table_bytes, index_bytes = _table_sizes(db)
+        keys = [obj['id'] for obj in rows]
+
+        def lookups():
+            for key in keys:
+                db.execute("SELECT * FROM astronomical_objects WHERE id = ?", (key,)).fetchone()
+
+        # A list of ids joined to the table, as a favourites or search results table would be
+        db.execute(f"CREATE TEMP TABLE picks (id {'INTEGER' if integer_keys else 'TEXT'} NOT NULL)")
+        db.executemany("INSERT INTO picks VALUES (?)", [(key,) for key in keys[::-1]])
+
+        def join():
+            db.execute("SELECT objects.name FROM picks "
+                       "JOIN astronomical_objects AS objects ON objects.id = picks.id").fetchall()
+
+        report[label] = {
+            'table_bytes': table_bytes,
+            'index_bytes': index_bytes,
+            'lookup_us': _best_time(lookups, repeat) / max(1, len(keys)) * 1e6,
+            'join_ms': _best_time(join, repeat) * 1000,
+        }
+        db.close()
+    return report
+
+def compact_ids(args):
+    """Compact the catalog named by the parsed arguments"""
+    if args.synthetic:
+        from synthetic_data import parse_count, synthetic_catalog
+        catalog = synthetic_catalog(parse_count(args.synthetic))
+    elif args.input.exists():
+        with open(args.input, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    else:
+        print(f"❌ {args.input} not found")
+        sys.exit(1)
+
+    if args.verify and args.id_table.exists():
+        problems = stale_assets(args.id_table.parent, [args.id_table.name])
+        if problems:
+            for problem in problems:
+                print(f"❌ {problem}")
+            sys.exit(1)
+    previous = [] if args.renumber else load_id_table(args.id_table)
+    table = list(previous)
+    new_ids = assign_ids(catalog, table, args.order)
+    if args.verify and new_ids:
+        print(f"❌ {len(new_ids)} ids are missing from {args.id_table}: {', '.join(new_ids[:10])}")
+        sys.exit(1)
+    with stage("compact"):
+        compact = compact_catalog(catalog, table)
+        problems = verify(catalog, compact, table, previous)
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+
+    present = {obj['id'] for obj in catalog}
+    retired = sum(1 for obj_id in previous if obj_id not in present)
+    print(f"\n📊 {len(catalog)} objects, {len(table)} numbered ids")
+    print(f"  Kept: {len(previous) - retired}, new: {len(new_ids)}, retired (slot kept): {retired}")
+    if args.verify:
+        print(f"\n✅ {args.id_table} covers the catalog and round-trips")
+        return
+
+    with stage("database report"):
+        report = database_report(catalog, compact)
+    print(f"\n{'Keys':<10s} {'Table KB':>10s} {'Key index KB':>13s} {'Lookup µs':>10s} {'Join ms':>9s}")
+    print("-" * 56)
+    for label, row in report.items():
+        index = "-" if row['index_bytes'] is None else f"{row['index_bytes'] / 1024:.1f}"
+        print(f"{label:<10s} {row['table_bytes'] / 1024:>10.1f} {index:>13s} "
+              f"{row['lookup_us']:>10.2f} {row['join_ms']:>9.3f}")
+    print("-" * 56)
+
+    with stage("write"):
+        save_id_table(args.id_table, table)
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        write_json(args.output, compact)
+    print("\n✅ Compact catalog round-trips through the id table")
+    print(f"📁 Ids: {args.id_table}")
+    print(f"📁 Catalog: {args.output}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Number object ids densely, keeping numbers stable across builds")
+    parser.add_argument('--input', type=Path, default=DATA_FILE, help=f"catalog to compact (default {DATA_FILE})")
+    parser.add_argument('--synthetic', metavar='COUNT',
+                        help="compact COUNT synthetic objects instead, into a temporary directory "
+                             "unless --id-table and --output are given")
+    parser.add_argument('--id-table', type=Path,
+                        help=f"persisted id table, read and extended (default {ID_TABLE_FILE})")
+    parser.add_argument('--output', type=Path, help=f"compact catalog (default {OUTPUT_FILE})")
+    parser.add_argument('--order', choices=ORDERS, default='magnitude', help="how new ids are numbered")
+    parser.add_argument('--renumber', action='store_true',
+                        help="discard the id table and number everything afresh; breaks stored references")
+    parser.add_argument('--verify', action='store_true',
+                        help="only check that the id table covers the catalog and round-trips; write nothing")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    print("=" * 70)
+    print("🔢 Vyoma Id Compaction")
+    print("=" * 70)
+
+    if not args.synthetic:
+        args.id_table = args.id_table or ID_TABLE_FILE
+        args.output = args.output or OUTPUT_FILE
+        compact_ids(args)
+        return
+    # The id table is append-only: synthetic ids written to the shipped one could never be taken back
+    with tempfile.TemporaryDirectory() as scratch:
+        args.id_table = args.id_table or Path(scratch) / ID_TABLE_FILE.name
+        args.output = args.output or Path(scratch) / OUTPUT_FILE.name
+        compact_ids(args)
+        if Path(scratch) in (args.id_table.parent, args.output.parent):
+            print("🗑  Synthetic output discarded with its temporary directory")
+
+if __name__ == "__main__":
+    with session("compact_ids"):
+        main()
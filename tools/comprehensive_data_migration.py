@@ -3,6 +3,10 @@
 Comprehensive Data Migration for Vyoma
 Extracts all astronomy data from Data folder, handles duplicates,
 creates gallery system with multiple images per object
+
+Importable as a library: migrate_catalog() returns the migrator with the
+objects, gallery and categories in memory, and write_catalog() saves
+them, so a full build can hand the gallery straight to the downloader.
 """
 
 import json
@@ -11,6 +15,13 @@ from pathlib import Path
 from collections import defaultdict
 from typing import Dict, List, Any, Set
 
+from canonical_json import write_json
+from instrumentation import session, stage
+
+# Paths
+DATA_DIR = Path("Data/astronomy_data")
+OUTPUT_DIR = Path("app/src/main/assets")
+
 # Coordinate mappings for objects (RA in degrees, Dec in degrees)
 COORDINATES = {
     # Planets (approximate - will need ephemeris for real-time)
@@ -555,17 +566,15 @@ class AstronomyDataMigrator:
         }
         return magnitudes.get(planet_id)
     
-    def migrate_all_data(self):
-        """Main migration function"""
+    def migrate_all_data(self, data_dir: Path = DATA_DIR, write: bool = True) -> bool:
+        """Main migration function; returns False if the data directory is missing"""
         print("=" * 70)
         print("🚀 Comprehensive Astronomy Data Migration")
         print("=" * 70)
         
-        data_dir = Path("Data/astronomy_data")
-        
         if not data_dir.exists():
             print(f"\n❌ Data directory not found: {data_dir}")
-            return
+            return False
         
         print(f"\n📂 Scanning {data_dir}...")
         
@@ -584,42 +593,44 @@ class AstronomyDataMigrator:
         for filename, processor in files_to_process.items():
             filepath = data_dir / filename
             if filepath.exists():
-                data = self.load_json(filepath)
-                if data:
-                    processor(data)
+                with stage(filename):
+                    data = self.load_json(filepath)
+                    if data:
+                        processor(data)
         
         # Generate output
-        self.generate_output()
+        if write:
+            self.generate_output()
+        return True
+    
+    def gallery(self) -> Dict[str, List[str]]:
+        """Image URLs per object, for objects that have any"""
+        return {
+            obj_id: images 
+            for obj_id, images in self.image_gallery.items() 
+            if images
+        }
     
-    def generate_output(self):
+    def generate_output(self, output_dir: Path = OUTPUT_DIR):
         """Generate final output files"""
         print("\n" + "=" * 70)
         print("📝 Generating Output Files")
         print("=" * 70)
         
-        output_dir = Path("app/src/main/assets")
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # 1. Main objects data
         objects_list = list(self.objects.values())
         objects_file = output_dir / "astronomy_objects.json"
-        
-        with open(objects_file, 'w', encoding='utf-8') as f:
-            json.dump(objects_list, f, indent=2, ensure_ascii=False)
+        write_json(objects_file, objects_list)
         
         print(f"\n✓ Created {objects_file}")
         print(f"  Total objects: {len(objects_list)}")
         
         # 2. Image gallery data
-        gallery_data = {
-            obj_id: images 
-            for obj_id, images in self.image_gallery.items() 
-            if images
-        }
+        gallery_data = self.gallery()
         gallery_file = output_dir / "image_gallery.json"
-        
-        with open(gallery_file, 'w', encoding='utf-8') as f:
-            json.dump(gallery_data, f, indent=2, ensure_ascii=False)
+        write_json(gallery_file, gallery_data)
         
         print(f"\n✓ Created {gallery_file}")
         print(f"  Objects with images: {len(gallery_data)}")
@@ -628,9 +639,7 @@ class AstronomyDataMigrator:
         
         # 3. Categories index
         categories_file = output_dir / "categories.json"
-        
-        with open(categories_file, 'w', encoding='utf-8') as f:
-            json.dump(self.categories, f, indent=2, ensure_ascii=False)
+        write_json(categories_file, self.categories)
         
         print(f"\n✓ Created {categories_file}")
         for cat, items in self.categories.items():
@@ -649,6 +658,16 @@ class AstronomyDataMigrator:
         print(f"  • {gallery_file}")
         print(f"  • {categories_file}")
 
+def migrate_catalog(data_dir: Path = DATA_DIR) -> AstronomyDataMigrator:
+    """Migrate the raw data in memory without writing anything"""
+    migrator = AstronomyDataMigrator()
+    migrator.migrate_all_data(data_dir, write=False)
+    return migrator
+
+def write_catalog(migrator: AstronomyDataMigrator, output_dir: Path = OUTPUT_DIR):
+    """Save a migrated catalog as astronomy_objects.json, image_gallery.json and categories.json"""
+    migrator.generate_output(output_dir)
+
 def main():
     migrator = AstronomyDataMigrator()
     migrator.migrate_all_data()
@@ -659,4 +678,5 @@ def main():
     print(f"  3. Enjoy comprehensive astronomy database!")
 
 if __name__ == "__main__":
-    main()
+    with session("comprehensive_data_migration"):
+        main()
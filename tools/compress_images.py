@@ -2,18 +2,36 @@
 """
 Image Compression Script for Vyoma
 Converts images to WebP format with compression
-"""
 
-try:
-    from PIL import Image
-except ImportError:
-    print("❌ Pillow not installed. Run: pip install Pillow")
-    exit(1)
+Images are encoded in parallel across a process pool; results are
+reported in input order, so output is the same for any worker count.
+
+With --target-kb, --min-ssim or --min-psnr the WebP quality is searched
+per image (see quality_search.py) instead of using WEBP_QUALITY for all.
 
+Outputs are tracked in the build cache (see build_cache.py): an image is
+re-encoded only when its content, the encoding parameters or this tool's
+version changed since it was last written.
+"""
+
+import argparse
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def compress_image(input_path, output_path, max_width=800, quality=75):
+from build_cache import BuildCache, build_key
+import imaging
+from imaging import MAX_WIDTH, MEMORY_LIMIT_MB, WEBP_METHOD, WEBP_QUALITY, convert_to_webp
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+TOOL_NAME = "compress_images"
+TOOL_VERSION = 1  # bump when a code change alters the encoded output
+
+def compress_image(input_path, output_path, max_width=MAX_WIDTH, quality=WEBP_QUALITY, target=None,
+                   memory_limit_mb=MEMORY_LIMIT_MB):
     """
     Compress and convert image to WebP format
     
@@ -22,47 +40,100 @@ def compress_image(input_path, output_path, max_width=800, quality=75):
         output_path: Destination WebP file
         max_width: Maximum width in pixels
         quality: WebP quality (0-100)
+        target: Optional dict with max_bytes, min_ssim and/or min_psnr;
+            when given, the quality is searched per image instead
+        memory_limit_mb: Largest bitmap to hold while decoding
+    
+    Returns:
+        tuple: (success, original_size_kb, compressed_size_kb, quality, error)
     """
     try:
-        img = Image.open(input_path)
-        
-        # Get original size
-        original_size = os.path.getsize(input_path) / 1024  # KB
-        
-        # Resize if needed
-        if img.width > max_width:
-            ratio = max_width / img.width
-            new_height = int(img.height * ratio)
-            img = img.resize((max_width, new_height), Image.LANCZOS)
-        
-        # Convert to RGB if necessary (WebP doesn't support all modes)
-        if img.mode in ('RGBA', 'LA'):
-            # Create white background for transparency
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[3])
-            else:
-                background.paste(img, mask=img.split()[1])
-            img = background
-        elif img.mode == 'P':
-            img = img.convert('RGB')
-        elif img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
-        
-        # Save as WebP
-        img.save(output_path, 'WEBP', quality=quality, method=6)
-        
-        # Get compressed size
-        compressed_size = os.path.getsize(output_path) / 1024  # KB
-        reduction = ((original_size - compressed_size) / original_size) * 100
-        
-        print(f"✓ {output_path.name:30s} {original_size:6.1f}KB → {compressed_size:6.1f}KB ({reduction:5.1f}% reduction)")
+        if target:
+            # Imported lazily: only targeted runs need NumPy
+            from quality_search import convert_to_webp_targeted
+            original_size, compressed_size, quality = convert_to_webp_targeted(
+                input_path, output_path, max_width, memory_limit_mb=memory_limit_mb, **target)
+        else:
+            original_size, compressed_size = convert_to_webp(
+                input_path, output_path, max_width, quality, memory_limit_mb)
+        return True, original_size, compressed_size, quality, None
         
     except Exception as e:
-        print(f"✗ {input_path.name}: {e}")
+        return False, 0, 0, None, str(e)
+
+def compress_job(job):
+    """Process pool entry point: compress one (input_path, output_path, target, memory_limit_mb) job"""
+    input_path, output_path, target, memory_limit_mb = job
+    return compress_image(input_path, output_path, target=target, memory_limit_mb=memory_limit_mb)
+
+def compress_batch(jobs, workers=None):
+    """
+    Compress many images across a process pool
+    
+    Args:
+        jobs: List of (input_path, output_path, target, memory_limit_mb) tuples
+        workers: Number of processes (default: all cores); 1 runs in-process
+    
+    Yields:
+        tuple: compress_image result for each job, in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        yield from map(compress_job, jobs)
+        return
+    
+    # Targeted jobs search with threads; split the cores between the processes
+    # instead of starting a full set of threads in each
+    search_workers = max(1, (os.cpu_count() or 1) // workers)
+    jobs = [(input_path, output_path, dict(target, workers=search_workers) if target else target, memory_limit_mb)
+            for input_path, output_path, target, memory_limit_mb in jobs]
+    
+    # Small chunks keep all cores busy when image sizes vary a lot
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(compress_job, jobs, chunksize=chunksize)
 
 def main():
     """Main compression function"""
+    parser = argparse.ArgumentParser(description="Compress images from Data/images to WebP")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="encoder processes (default: all cores)")
+    parser.add_argument('--target-kb', type=float, default=None,
+                        help="search the highest quality whose output fits this many KB")
+    parser.add_argument('--min-ssim', type=float, default=None,
+                        help="search the lowest quality with at least this SSIM, e.g. 0.97")
+    parser.add_argument('--min-psnr', type=float, default=None,
+                        help="search the lowest quality with at least this PSNR in dB, e.g. 38")
+    parser.add_argument('--memory-limit', type=int, default=MEMORY_LIMIT_MB,
+                        help=f"MB of bitmap each worker may decode at once (default {MEMORY_LIMIT_MB}); "
+                             "larger uncompressed sources are decoded in bands")
+    parser.add_argument('--force', action='store_true',
+                        help="re-encode every image, even if the cache says it is up to date")
+    parser.add_argument('--self-test', action='store_true',
+                        help="check that banded decodes resize exactly like whole ones")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    if args.self_test:
+        with stage("self-test"):
+            problems = imaging.self_test()
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        if problems:
+            print(f"\n❌ {len(problems)} banded decode problems")
+            sys.exit(1)
+        print("✅ Banded decodes match whole decodes")
+        return
+    
+    target = {}
+    if args.target_kb is not None:
+        target['max_bytes'] = int(args.target_kb * 1024)
+    if args.min_ssim is not None:
+        target['min_ssim'] = args.min_ssim
+    if args.min_psnr is not None:
+        target['min_psnr'] = args.min_psnr
+    
     # Define paths
     input_dir = Path("Data/images")
     output_dir = Path("app/src/main/assets/images")
@@ -71,14 +142,14 @@ def main():
     if not input_dir.exists():
         print(f"❌ Input directory not found: {input_dir}")
         print("\nPlease create 'Data/images/' and add your images there.")
-        print("Supported formats: JPG, JPEG, PNG, WebP")
+        print("Supported formats: JPG, JPEG, PNG, WebP, TIFF")
         return
     
     # Create output directory
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Supported image formats
-    image_extensions = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif'}
+    image_extensions = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tif', '.tiff'}
     
     # Find all images
     image_files = [
@@ -91,31 +162,65 @@ def main():
         print(f"\nSupported formats: {', '.join(image_extensions)}")
         return
     
-    print(f"Found {len(image_files)} images to compress\n")
-    print(f"{'Filename':<30s} {'Original':>10s} {'Compressed':>10s} {'Reduction':>10s}")
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Found {len(image_files)} images to compress ({workers} workers)\n")
+    print(f"{'Filename':<30s} {'Original':>10s} {'Compressed':>10s} {'Reduction':>10s}"
+          + (f" {'Quality':>8s}" if target else ""))
     print("-" * 70)
     
     # Process each image
     total_original = 0
     total_compressed = 0
+    compressed_count = 0
     
-    for img_file in sorted(image_files):
-        output_file = output_dir / f"{img_file.stem}.webp"
-        
-        original_size = os.path.getsize(img_file) / 1024
-        total_original += original_size
-        
-        compress_image(img_file, output_file)
-        
-        if output_file.exists():
-            compressed_size = os.path.getsize(output_file) / 1024
-            total_compressed += compressed_size
+    cache = BuildCache()
+    params = {'max_width': MAX_WIDTH, 'quality': WEBP_QUALITY, 'method': WEBP_METHOD, **target}
+    jobs = []
+    keys = {}
+    up_to_date = 0
+    with stage("check cache"):
+        for img_file in sorted(image_files):
+            output_file = output_dir / f"{img_file.stem}.webp"
+            key = build_key(cache.source_hash(img_file), TOOL_NAME, TOOL_VERSION, params)
+            if not args.force and cache.is_fresh(output_file, key):
+                up_to_date += 1
+                continue
+            keys[output_file] = key
+            jobs.append((img_file, output_file, target or None, args.memory_limit))
+    if up_to_date:
+        print(f"⊘ {up_to_date} images up to date, skipped\n")
+    started = time.perf_counter()
+    
+    try:
+        with stage("encode"):
+            for (img_file, output_file, _, _), result in zip(jobs, compress_batch(jobs, workers)):
+                success, original_size, compressed_size, quality, error = result
+                if not success:
+                    print(f"✗ {img_file.name}: {error}")
+                    continue
+            
+                cache.record(output_file, keys[output_file], TOOL_NAME, params)
+                reduction = ((original_size - compressed_size) / original_size) * 100
+                print(f"✓ {output_file.name:30s} {original_size:6.1f}KB → {compressed_size:6.1f}KB ({reduction:5.1f}% reduction)"
+                      + (f"  q{quality}" if target else ""))
+                total_original += original_size
+                total_compressed += compressed_size
+                compressed_count += 1
+    finally:
+        # Keep what was finished even if the run is interrupted
+        cache.save()
+    
+    elapsed = time.perf_counter() - started
     
     # Summary
     print("-" * 70)
-    total_reduction = ((total_original - total_compressed) / total_original) * 100
-    print(f"\n{'Total:':<30s} {total_original:6.1f}KB → {total_compressed:6.1f}KB ({total_reduction:5.1f}% reduction)")
-    print(f"\n✓ Compressed {len(image_files)} images")
+    if total_original > 0:
+        total_reduction = ((total_original - total_compressed) / total_original) * 100
+        print(f"\n{'Total:':<30s} {total_original:6.1f}KB → {total_compressed:6.1f}KB ({total_reduction:5.1f}% reduction)")
+    print(f"\n✓ Compressed {compressed_count}/{len(jobs)} images in {elapsed:.1f}s ({up_to_date} up to date)")
+    if compressed_count and elapsed > 0:
+        print(f"✓ Throughput: {compressed_count / elapsed:.1f} images/sec, "
+              f"{total_original / 1024 / elapsed:.2f} MB/sec")
     print(f"✓ Saved to {output_dir}")
     print(f"\nNext steps:")
     print("1. Build the app")
@@ -123,4 +228,5 @@ def main():
     print("3. Test in Airplane Mode to verify")
 
 if __name__ == "__main__":
-    main()
+    with session(TOOL_NAME):
+        main()
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Gallery Image Detection for Vyoma
+Finds visually near-identical images with perceptual hashes and keeps one per cluster
+
+Each image is reduced to a 64-bit pHash (low-frequency DCT signs) or
+dHash (horizontal gradient signs), computed for the whole gallery at once
+with NumPy. Neighbours within the Hamming-distance threshold are found via
+multi-index hashing, so clustering stays fast for tens of thousands of images.
+
+Removing an image also tells download_all_gallery_images.py where its
+URL now lives: the content index maps the URL to the surviving image, so
+the next download run skips it instead of fetching and encoding the
+duplicate again. Images saved under the legacy <object>_<url hash>.webp
+names predate the index and are matched to their URL through
+image_gallery.json.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    print("❌ Pillow not installed. Run: pip install Pillow")
+    sys.exit(1)
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ NumPy not installed. Run: pip install numpy")
+    sys.exit(1)
+
+from canonical_json import write_json
+import download_all_gallery_images as downloader
+from download_all_gallery_images import ContentStore, get_output_filename, hash_file, load_gallery
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+HASH_SIZE = 8  # 8x8 bits = 64-bit hashes
+PHASH_SAMPLE = 32  # pHash input size before the DCT
+DEFAULT_THRESHOLD = 6  # max differing bits for two images to count as duplicates
+ASPECT_TOLERANCE = 0.05  # hashes ignore aspect ratio, so compare it separately
+COLOR_TOLERANCE = 24.0  # hashes ignore hue, so also bound the mean RGB distance
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+IMAGES_DIR = Path("app/src/main/assets/images")
+DATA_FILE = Path("app/src/main/assets/initial_data.json")
+MAPPING_FILE = Path("app/src/main/assets/object_images.json")
+CONTENT_INDEX_FILE = Path("Data/gallery_cache/content_index.json")
+GALLERY_FILE = Path("app/src/main/assets/image_gallery.json")
+
+def load_thumbnail(path, size):
+    """Decode an image straight to a small RGB array"""
+    with Image.open(path) as img:
+        img.draft('RGB', size)
+        img = img.convert('RGB').resize(size, Image.BILINEAR)
+        return np.asarray(img, dtype=np.float32)
+
+def load_samples(paths, size, workers=None):
+    """Decode all images into one (N, height, width, 3) array"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        samples = list(pool.map(lambda p: load_thumbnail(p, size), paths))
+    return np.stack(samples) if samples else np.empty((0, size[1], size[0], 3), np.float32)
+
+def dct_matrix(n):
+    """Orthonormal DCT-II basis as an (n, n) matrix"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    basis = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+def pack_bits(bits):
+    """Pack an (N, 64) boolean array into N unsigned 64-bit hashes"""
+    return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
+
+def phash_batch(samples):
+    """pHash: sign of low-frequency DCT coefficients against their median"""
+    d = dct_matrix(samples.shape[1])
+    coeffs = d @ samples @ d.T
+    low = coeffs[:, :HASH_SIZE, :HASH_SIZE].reshape(len(samples), -1)
+    # Exclude the DC term, which only reflects overall brightness
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return pack_bits(low > median)
+
+def dhash_batch(samples):
+    """dHash: sign of the horizontal gradient between neighbouring pixels"""
+    bits = samples[:, :, 1:] > samples[:, :, :-1]
+    return pack_bits(bits.reshape(len(samples), -1))
+
+def compute_fingerprints(paths, method='phash', workers=None):
+    """
+    Perceptual hashes and mean colours for a list of image paths
+
+    Returns:
+        tuple: (hashes as Python ints, (N, 3) array of mean RGB values)
+    """
+    if method == 'dhash':
+        samples = load_samples(paths, (HASH_SIZE + 1, HASH_SIZE), workers)
+        hashes = dhash_batch(samples @ LUMA_WEIGHTS)
+    else:
+        samples = load_samples(paths, (PHASH_SAMPLE, PHASH_SAMPLE), workers)
+        hashes = phash_batch(samples @ LUMA_WEIGHTS)
+    return [int(h) for h in hashes], samples.mean(axis=(1, 2))
+
+def hamming(a, b):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
+
+# Set-bit counts for every byte value, for vectorized popcounts
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def hamming_many(value, others):
+    """Hamming distances from one hash to an array of uint64 hashes"""
+    diff = np.bitwise_xor(others, np.uint64(value))
+    return POPCOUNT_TABLE[diff.view(np.uint8)].reshape(len(others), 8).sum(axis=1)
+
+class MultiIndexHash:
+    """
+    Multi-index hashing for Hamming radius queries on 64-bit hashes
+
+    Hashes are split into radius + 1 disjoint bit ranges, each indexed in
+    its own table. By the pigeonhole principle two hashes within the radius
+    agree exactly on at least one range, so a query only has to check the
+    few hashes sharing a bucket with it instead of the whole set.
+    """
+
+    def __init__(self, hashes, radius):
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.radius = radius
+        chunks = min(radius + 1, 64)
+        bounds = np.linspace(0, 64, chunks + 1).astype(int)
+        self.ranges = list(zip(bounds[:-1], bounds[1:]))
+        self.tables = []
+        for start, stop in self.ranges:
+            keys = self._chunk(self.hashes, start, stop)
+            table = {}
+            for index, key in enumerate(keys.tolist()):
+                table.setdefault(key, []).append(index)
+            self.tables.append(table)
+
+    @staticmethod
+    def _chunk(values, start, stop):
+        """Extract bits [start, stop) of each hash"""
+        mask = np.uint64((1 << (stop - start)) - 1)
+        return (values >> np.uint64(start)) & mask
+
+    def query(self, value):
+        """Indices of all hashes within the radius of value"""
+        value = np.uint64(value)
+        candidates = set()
+        for (start, stop), table in zip(self.ranges, self.tables):
+            key = int(self._chunk(value, start, stop))
+            candidates.update(table.get(key, ()))
+        if not candidates:
+            return []
+        candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        distances = hamming_many(value, self.hashes[candidates])
+        return candidates[distances <= self.radius].tolist()
+
+def read_aspect_ratios(paths):
+    """Width / height of each image, read from headers only"""
+    ratios = []
+    for path in paths:
+        with Image.open(path) as img:
+            ratios.append(img.width / img.height)
+    return ratios
+
+def cluster_hashes(hashes, aspects=None, colors=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Group indices whose hashes lie within threshold of a cluster leader
+
+    Each still-unassigned image in turn becomes a leader and claims its
+    unassigned neighbours. Unlike transitive merging this cannot chain
+    dissimilar images together through a series of close pairs.
+    """
+    index = MultiIndexHash(hashes, threshold)
+
+    assigned = set()
+    clusters = []
+    for leader, value in enumerate(hashes):
+        if leader in assigned:
+            continue
+        members = [leader]
+        for other in sorted(index.query(value)):
+            if other == leader or other in assigned:
+                continue
+            if aspects and abs(aspects[other] / aspects[leader] - 1) > ASPECT_TOLERANCE:
+                continue
+            if colors is not None and np.abs(colors[other] - colors[leader]).max() > COLOR_TOLERANCE:
+                continue
+            members.append(other)
+        assigned.update(members)
+        if len(members) > 1:
+            clusters.append(members)
+    return clusters
+
+def load_pinned_images(data_file=DATA_FILE):
+    """
+    Image filenames the catalog relies on, which must never be removed
+
+    That is every images/ path in an imageUrl, plus {id}.webp for every
+    object, which update_data_with_local_images.py links by name.
+    """
+    if not data_file.exists():
+        return set()
+    with open(data_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    pinned = {f"{obj['id']}.webp" for obj in data if obj.get('id')}
+    pinned.update(
+        Path(obj['imageUrl']).name
+        for obj in data
+        if isinstance(obj.get('imageUrl'), str) and obj['imageUrl'].startswith('images/')
+    )
+    return pinned
+
+def choose_keepers(paths, pinned):
+    """
+    Pick which images of a cluster survive
+
+    Catalog-referenced images are always kept. Otherwise the image with the
+    most pixels wins, then the larger file, then the name for determinism.
+    """
+    pinned_paths = [p for p in paths if p.name in pinned]
+    if pinned_paths:
+        return pinned_paths
+
+    def rank(path):
+        with Image.open(path) as img:
+            return (img.width * img.height, os.path.getsize(path), path.name)
+
+    return [max(paths, key=rank)]
+
+def remap_object_images(mapping, replacements):
+    """Point object_images.json at surviving images, without repeats"""
+    remapped = {}
+    for obj_id, filenames in mapping.items():
+        kept = []
+        for filename in filenames:
+            filename = replacements.get(filename, filename)
+            if filename not in kept:
+                kept.append(filename)
+        remapped[obj_id] = kept
+    return remapped
+
+def choose_removals(paths, hashes, clusters, pinned):
+    """
+    Duplicates to remove
+
+    Returns:
+        tuple: (replacements, rows) where replacements maps each removed
+        filename to its surviving image and rows lists (keeper, removed,
+        bits) for the report
+    """
+    replacements = {}
+    rows = []
+    for members in clusters:
+        cluster_paths = [paths[i] for i in members]
+        keepers = choose_keepers(cluster_paths, pinned)
+        keeper = keepers[0]
+        keeper_hash = hashes[members[cluster_paths.index(keeper)]]
+        for index in members:
+            path = paths[index]
+            if path in keepers:
+                continue
+            replacements[path.name] = keeper.name
+            rows.append((keeper, path, hamming(hashes[index], keeper_hash)))
+    return replacements, rows
+
+def legacy_urls(gallery_data):
+    """Legacy <object>_<url hash>.webp filename -> the gallery URL it was downloaded from"""
+    first_object = {}
+    for obj_id, urls in gallery_data.items():
+        for url in urls:
+            first_object.setdefault(url, obj_id)
+    return {get_output_filename(url, [obj_id]): url for url, obj_id in first_object.items()}
+
+def apply_removals(replacements, images_dir=IMAGES_DIR, gallery_data=None):
+    """Repoint object_images.json and the download content index at the keepers, then delete the duplicates"""
+    if MAPPING_FILE.exists():
+        with open(MAPPING_FILE, 'r', encoding='utf-8') as f:
+            mapping = json.load(f)
+        write_json(MAPPING_FILE, remap_object_images(mapping, replacements))
+        print(f"\n✓ Updated {MAPPING_FILE}")
+
+    # Keep the downloader from fetching or re-encoding what was removed
+    store = ContentStore(CONTENT_INDEX_FILE)
+    for content_hash, filename in store.blobs.items():
+        store.blobs[content_hash] = replacements.get(filename, filename)
+    keeper_hashes = {filename: content_hash for content_hash, filename in store.blobs.items()}
+    legacy = legacy_urls(gallery_data or {})
+    for filename, keeper in replacements.items():
+        url = legacy.get(filename)
+        if url is None or url in store.urls:
+            continue
+        # The source bytes of a legacy file are unknown; the keeper's own hash stands in for them
+        content_hash = keeper_hashes.get(keeper) or hash_file(images_dir / keeper)
+        store.add(url, content_hash, keeper)
+        keeper_hashes[keeper] = content_hash
+    store.save()
+
+    for filename in replacements:
+        (images_dir / filename).unlink()
+    print(f"✓ Removed {len(replacements)} duplicate images")
+
+def _test_image(path, seed, size):
+    """A smooth random image, so that resized copies stay near-duplicates"""
+    rng = np.random.default_rng(seed)
+    small = Image.fromarray(rng.integers(0, 256, (6, 8, 3), dtype=np.uint8))
+    small.resize(size, Image.BICUBIC).save(path, 'WEBP', quality=80)
+
+def self_test():
+    """Dedupe a scratch gallery, then check a download run finds every image without the network"""
+    problems = []
+    fetched = []
+    original_download = downloader.download_image
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        os.chdir(root)
+        try:
+            IMAGES_DIR.mkdir(parents=True)
+            gallery = {
+                'earth': ["https://a.example/earth.jpg", "https://b.example/earth_small.jpg"],
+                'moon': ["https://a.example/moon.jpg", "https://c.example/moon_mirror.jpg"],
+            }
+            write_json(GALLERY_FILE, gallery)
+            # Legacy names for earth, a content-addressed blob for the moon mirror
+            earth, earth_small = (get_output_filename(url, ['earth']) for url in gallery['earth'])
+            moon = get_output_filename(gallery['moon'][0], ['moon'])
+            mirror_blob = "0123456789abcdef.webp"
+            _test_image(IMAGES_DIR / earth, 1, (400, 300))
+            _test_image(IMAGES_DIR / earth_small, 1, (200, 150))
+            _test_image(IMAGES_DIR / moon, 2, (300, 300))
+            _test_image(IMAGES_DIR / mirror_blob, 2, (150, 150))
+            store = ContentStore(CONTENT_INDEX_FILE)
+            store.add(gallery['moon'][1], "0123456789abcdef" * 4, mirror_blob)
+            store.save()
+            write_json(MAPPING_FILE, {'earth': [earth, earth_small], 'moon': [moon, mirror_blob]})
+
+            paths = sorted(IMAGES_DIR.glob("*.webp"))
+            hashes, colors = compute_fingerprints(paths)
+            clusters = cluster_hashes(hashes, read_aspect_ratios(paths), colors)
+            replacements, _ = choose_removals(paths, hashes, clusters, set())
+            if replacements != {earth_small: earth, mirror_blob: moon}:
+                problems.append(f"unexpected duplicates {replacements}")
+            with contextlib.redirect_stdout(io.StringIO()):
+                apply_removals(replacements, gallery_data=load_gallery(GALLERY_FILE))
+
+            def no_network(url, output_path, timeout=30):
+                fetched.append(url)
+                return downloader.DOWNLOAD_FAILED, None
+
+            downloader.download_image = no_network
+            with contextlib.redirect_stdout(io.StringIO()):
+                object_image_map, _, _ = downloader.download_gallery(load_gallery(GALLERY_FILE), output_dir=IMAGES_DIR,
+                                                                     fetch_workers=1, encode_workers=1)
+            if fetched:
+                problems.append(f"the download run fetched removed images again: {', '.join(fetched)}")
+            if object_image_map != {'earth': [earth], 'moon': [moon]}:
+                problems.append(f"the download run mapped objects to {object_image_map}")
+            if sorted(p.name for p in IMAGES_DIR.glob("*.webp")) != sorted([earth, moon]):
+                problems.append("the download run recreated removed images")
+        finally:
+            downloader.download_image = original_download
+            os.chdir(original_cwd)
+    return problems
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Find and remove near-duplicate gallery images")
+    parser.add_argument('--method', choices=('phash', 'dhash'), default='phash')
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help=f"max Hamming distance between duplicates (default {DEFAULT_THRESHOLD})")
+    parser.add_argument('--workers', type=int, default=None, help="decode threads")
+    parser.add_argument('--apply', action='store_true',
+                        help="delete duplicates and rewrite object_images.json (default: report only)")
+    parser.add_argument('--self-test', action='store_true',
+                        help="dedupe a scratch gallery and check the downloader does not fetch it again")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    print("=" * 70)
+    print("🔍 Vyoma Near-Duplicate Image Finder")
+    print("=" * 70)
+
+    if args.self_test:
+        with stage("self-test"):
+            problems = self_test()
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        if problems:
+            print(f"\n❌ {len(problems)} dedupe problems")
+            sys.exit(1)
+        print("\n✅ Removed duplicates stay removed across a download run")
+        return
+
+    if not IMAGES_DIR.exists():
+        print(f"\n❌ Images directory not found: {IMAGES_DIR}")
+        return
+
+    paths = sorted(IMAGES_DIR.glob("*.webp"))
+    print(f"\n📂 Hashing {len(paths)} images ({args.method}, threshold {args.threshold})...")
+    with stage("fingerprint"):
+        hashes, colors = compute_fingerprints(paths, args.method, args.workers)
+    with stage("cluster"):
+        clusters = cluster_hashes(hashes, read_aspect_ratios(paths), colors, args.threshold)
+
+    if not clusters:
+        print("\n✅ No near-duplicates found")
+        return
+
+    replacements, rows = choose_removals(paths, hashes, clusters, load_pinned_images())
+    saved_bytes = 0
+
+    print(f"\n{'Keep':<32s} {'Duplicate':<32s} {'Bits':>4s}")
+    print("-" * 70)
+    for keeper, path, distance in rows:
+        print(f"{keeper.name:<32s} {path.name:<32s} {distance:>4d}")
+        saved_bytes += os.path.getsize(path)
+
+    print("-" * 70)
+    print(f"\n📊 Summary:")
+    print(f"  Clusters:        {len(clusters)}")
+    print(f"  Duplicates:      {len(replacements)}")
+    print(f"  Reclaimable:     {saved_bytes / 1024:.1f} KB")
+
+    if not args.apply:
+        print(f"\n💡 Dry run. Re-run with --apply to remove duplicates.")
+        return
+
+    with stage("apply"):
+        apply_removals(replacements, gallery_data=load_gallery())
+
+if __name__ == "__main__":
+    with session("dedupe_gallery_images"):
+        main()
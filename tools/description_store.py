@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Description Store for Vyoma
+Compresses object descriptions one by one against a shared dictionary
+
+Descriptions and their "• " fact bullets repeat the same phrasing from
+object to object. Gzipping the whole file exploits that, but then the
+app must inflate everything to show one object. Here each description
+is compressed on its own, as raw deflate primed with a preset
+dictionary (zlib zdict) trained on the whole set, so the repeated
+phrasing is still shared and a single description is decoded from its
+offset alone. On Android, java.util.zip.Inflater(nowrap=true) with
+setDictionary() reads the same entries.
+
+The zlib dictionary is trained once at full size, then cut to the size
+that makes dictionary plus entries smallest. With the zstandard package
+installed, --codec zstd uses a zstd dictionary instead.
+
+Per-entry compression plus the id and offset tables always costs more
+than gzipping the whole file; the tool reports by how much. With few
+short descriptions, as in the current catalog, that is a large share.
+
+File layout (little-endian):
+  header   magic "VYDS", version, codec (0 zlib, 1 zstd), entry count,
+           then the offsets of the dictionary, ids and entries sections
+  dict     dictionary bytes
+  ids      count + 1 uint32 offsets, then the UTF-8 ids, sorted
+  entries  count + 1 uint32 offsets, then the compressed descriptions,
+           in id order
+"""
+
+import argparse
+import gzip
+import json
+import re
+import struct
+import sys
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+CATALOG_FILES = [Path("app/src/main/assets/astronomy_objects.json"), Path("app/src/main/assets/initial_data.json")]
+OUTPUT_FILE = Path("app/src/main/assets/descriptions.bin")
+MAGIC = b"VYDS"
+VERSION = 1
+CODEC_ZLIB, CODEC_ZSTD = 0, 1
+CODECS = {'zlib': CODEC_ZLIB, 'zstd': CODEC_ZSTD}
+HEADER = struct.Struct("<4sHHIIII")  # magic, version, codec, count, dict / ids / entries offsets
+ZDICT_MAX = 32 * 1024  # deflate cannot reach further back than its 32 KB window
+DICT_FRACTION = 0.1  # default zstd dictionary size, as a share of the raw description bytes
+MIN_DICT_SIZE = 256
+DICT_SIZE_STEP = 1.25  # ratio between the zlib dictionary sizes tried
+SIZING_SAMPLES = 2000  # descriptions compressed for each size tried
+MAX_NGRAM = 12  # longest run of words the trainer considers
+MIN_NGRAM_BYTES = 4
+TRAINING_SAMPLES = 20000  # descriptions the trainer looks at, at most
+
+def collect_descriptions(catalog_files):
+    """Object id -> description, keeping the longest one when files disagree"""
+    descriptions = {}
+    for catalog_file in catalog_files:
+        if not catalog_file.exists():
+            continue
+        with open(catalog_file, 'r', encoding='utf-8') as f:
+            for obj in json.load(f):
+                text = obj.get('description')
+                if text and len(text) > len(descriptions.get(obj['id'], '')):
+                    descriptions[obj['id']] = text
+    return descriptions
+
+def train_zdict(samples, size):
+    """
+    Build a zlib preset dictionary of at most size bytes
+
+    Word n-grams are scored by the bytes they would save, their length
+    times the number of other descriptions they occur in, and picked
+    greedily while they are not already inside a chosen one. deflate
+    codes nearby matches more cheaply, so the best strings go last,
+    nearest the data.
+    """
+    document_counts = Counter()
+    for text in samples[:TRAINING_SAMPLES]:
+        words = re.findall(r'\S+\s*', text)
+        grams = set()
+        for n in range(1, MAX_NGRAM + 1):
+            for i in range(len(words) - n + 1):
+                gram = ''.join(words[i:i + n])
+                if len(gram.encode('utf-8')) >= MIN_NGRAM_BYTES:
+                    grams.add(gram)
+        document_counts.update(grams)
+
+    scored = sorted(((count - 1) * len(gram.encode('utf-8')), gram)
+                    for gram, count in document_counts.items() if count > 1)
+    chosen = []
+    used = 0
+    for score, gram in reversed(scored):
+        encoded = gram.encode('utf-8')
+        if used + len(encoded) > size:
+            continue
+        if any(gram in other for other in chosen):
+            continue
+        # A new gram may swallow shorter ones already chosen
+        chosen = [other for other in chosen if other not in gram]
+        chosen.append(gram)
+        used = sum(len(g.encode('utf-8')) for g in chosen)
+    return ''.join(reversed(chosen)).encode('utf-8')
+
+def train_dictionary(samples, size, codec):
+    if codec == CODEC_ZSTD:
+        return zstandard.train_dictionary(size, [s.encode('utf-8') for s in samples[:TRAINING_SAMPLES]]).as_bytes()
+    return train_zdict(samples, min(size, ZDICT_MAX))
+
+def best_zdict(samples):
+    """
+    The zlib dictionary that makes the store smallest
+
+    deflate draws on the end of a preset dictionary first, and
+    train_zdict puts the best strings last, so each shorter dictionary
+    tried is the tail of one trained at full size. Each is scored by its
+    size plus the compressed size of up to SIZING_SAMPLES descriptions,
+    scaled to the whole set.
+    """
+    raw_bytes = sum(len(s.encode('utf-8')) for s in samples)
+    full = train_zdict(samples, min(ZDICT_MAX, max(MIN_DICT_SIZE, raw_bytes)))
+    sample = samples[::max(1, len(samples) // SIZING_SAMPLES)]
+    scale = len(samples) / max(1, len(sample))
+    best, best_bytes = b'', sum(len(compress_entry(s, b'', CODEC_ZLIB)) for s in sample) * scale
+    size = MIN_DICT_SIZE
+    while True:
+        dictionary = full[-size:]
+        total = len(dictionary) + sum(len(compress_entry(s, dictionary, CODEC_ZLIB)) for s in sample) * scale
+        if total < best_bytes:
+            best, best_bytes = dictionary, total
+        if size >= len(full):
+            return best
+        size = min(len(full), int(size * DICT_SIZE_STEP))
+
+def compress_entry(text, dictionary, codec):
+    data = text.encode('utf-8')
+    if codec == CODEC_ZSTD:
+        compressor = zstandard.ZstdCompressor(level=19, dict_data=zstandard.ZstdCompressionDict(dictionary),
+                                              write_checksum=False, write_dict_id=False)
+        return compressor.compress(data)
+    # Raw deflate: no zlib header or checksum per entry
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, dictionary)
+    return compressor.compress(data) + compressor.flush()
+
+def decompress_entry(data, dictionary, codec):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(dictionary)).decompress(data)
+    decompressor = zlib.decompressobj(-15, dictionary)
+    return decompressor.decompress(data) + decompressor.flush()
+
+def _offset_table(items):
+    offsets = [0]
+    for item in items:
+        offsets.append(offsets[-1] + len(item))
+    return struct.pack(f"<{len(offsets)}I", *offsets) + b''.join(items)
+
+def build_store(descriptions, dict_size=None, codec=CODEC_ZLIB):
+    """Encode id -> description as a store; returns (bytes, dictionary size)"""
+    ids = sorted(descriptions)
+    texts = [descriptions[i] for i in ids]
+    if not texts:
+        dictionary = b''
+    elif dict_size is None and codec == CODEC_ZLIB:
+        dictionary = best_zdict(texts)
+    else:
+        if dict_size is None:
+            raw_bytes = sum(len(t.encode('utf-8')) for t in texts)
+            dict_size = max(MIN_DICT_SIZE, int(raw_bytes * DICT_FRACTION))
+        dictionary = train_dictionary(texts, dict_size, codec)
+    entries = [compress_entry(text, dictionary, codec) for text in texts]
+
+    dict_offset = HEADER.size
+    ids_offset = dict_offset + len(dictionary)
+    ids_section = _offset_table([i.encode('utf-8') for i in ids])
+    entries_offset = ids_offset + len(ids_section)
+    data = (HEADER.pack(MAGIC, VERSION, codec, len(ids), dict_offset, ids_offset, entries_offset)
+            + dictionary + ids_section + _offset_table(entries))
+    return data, len(dictionary)
+
+class DescriptionStore:
+    """Reader over an encoded store in any buffer; only the requested entry is decompressed"""
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer)
+        magic, version, self.codec, self.count, dict_offset, ids_offset, entries_offset = \
+            HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a Vyoma description store")
+        if self.codec == CODEC_ZSTD and zstandard is None:
+            raise ValueError("store is zstd-compressed; pip install zstandard to read it")
+        self.dictionary = bytes(self._buffer[dict_offset:ids_offset])
+        self._ids = ids_offset
+        self._ids_data = ids_offset + 4 * (self.count + 1)
+        self._entries = entries_offset
+        self._entries_data = entries_offset + 4 * (self.count + 1)
+
+    @classmethod
+    def open(cls, path):
+        return cls(Path(path).read_bytes())
+
+    def _slice(self, table, data, number):
+        start, end = struct.unpack_from("<II", self._buffer, table + 4 * number)
+        return self._buffer[data + start:data + end]
+
+    def id(self, number):
+        return str(self._slice(self._ids, self._ids_data, number), 'utf-8')
+
+    def entry(self, number):
+        """Decompressed description at a position in id order"""
+        data = bytes(self._slice(self._entries, self._entries_data, number))
+        return decompress_entry(data, self.dictionary, self.codec).decode('utf-8')
+
+    def get(self, obj_id, default=None):
+        """The description of an object, by binary search of the ids"""
+        target = obj_id.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            found = self._slice(self._ids, self._ids_data, middle).tobytes()
+            if found == target:
+                return self.entry(middle)
+            if found < target:
+                low = middle + 1
+            else:
+                high = middle
+        return default
+
+    def items(self):
+        return ((self.id(n), self.entry(n)) for n in range(self.count))
+
+def size_report(descriptions, data, dictionary_size, codec):
+    """Byte counts of the store against the alternatives"""
+    texts = [descriptions[i] for i in sorted(descriptions)]
+    raw = sum(len(t.encode('utf-8')) for t in texts)
+    whole = len(gzip.compress(json.dumps(descriptions, ensure_ascii=False).encode('utf-8'), 9, mtime=0))
+    no_dict = sum(len(compress_entry(t, b'', CODEC_ZLIB)) for t in texts)
+    store = DescriptionStore(data)
+    entries = sum(len(store._slice(store._entries, store._entries_data, n)) for n in range(store.count))
+    return {
+        'descriptions': len(texts),
+        'raw': raw,
+        'whole_file_gzip': whole,
+        'per_entry_no_dict': no_dict,
+        'entries': entries,
+        'dictionary': dictionary_size,
+        'store': len(data),
+        'codec': codec,
+    }
+
+def verify_store(descriptions, data):
+    """Ids whose stored description does not decode to the source"""
+    store = DescriptionStore(data)
+    wrong = [obj_id for obj_id, text in descriptions.items() if store.get(obj_id) != text]
+    if store.get("\uffff") is not None:
+        wrong.append("<missing id>")
+    return wrong
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compress object descriptions with a shared dictionary")
+    parser.add_argument('--input', type=Path, action='append',
+                        help="catalog JSON to take descriptions from; repeatable "
+                             f"(default {', '.join(str(f) for f in CATALOG_FILES)})")
+    parser.add_argument('--synthetic', metavar='COUNT', help="use COUNT synthetic descriptions instead")
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE, help=f"store file (default {OUTPUT_FILE})")
+    parser.add_argument('--dict-size', type=int,
+                        help=f"dictionary bytes (default: zlib picks the size giving the smallest store, at most "
+                             f"{ZDICT_MAX}; zstd uses {DICT_FRACTION:.0%} of the raw text, at least {MIN_DICT_SIZE})")
+    parser.add_argument('--codec', choices=['auto'] + list(CODECS), default='auto',
+                        help="zstd needs the zstandard package; auto uses it when installed")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    if args.codec == 'zstd' and zstandard is None:
+        print("❌ zstandard not installed. Run: pip install zstandard")
+        sys.exit(1)
+    codec_name = args.codec if args.codec != 'auto' else 'zstd' if zstandard else 'zlib'
+    codec = CODECS[codec_name]
+
+    print("=" * 70)
+    print("📚 Vyoma Description Store")
+    print("=" * 70)
+
+    if args.synthetic:
+        from synthetic_data import migration_data, parse_count
+        descriptions = {}
+        for data in migration_data(parse_count(args.synthetic)).values():
+            while isinstance(data, dict):
+                data = next(iter(data.values()))
+            for record in data:
+                facts = record['interesting_facts']
+                descriptions[record['id']] = record['description'] + (
+                    "\n\n" + "\n".join(f"• {fact}" for fact in facts) if facts else "")
+    else:
+        descriptions = collect_descriptions(args.input or CATALOG_FILES)
+    if not descriptions:
+        print("❌ No descriptions found")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    with stage("build"):
+        data, dictionary_size = build_store(descriptions, args.dict_size, codec)
+    elapsed = time.perf_counter() - started
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_bytes(data)
+
+    report = size_report(descriptions, data, dictionary_size, codec)
+    raw = report['raw']
+    print(f"\n📊 {report['descriptions']} descriptions, built in {elapsed:.2f}s with {codec_name}")
+    print(f"  Raw text:                        {raw / 1024:8.1f} KB")
+    print(f"  Whole-file gzip -9:              {report['whole_file_gzip'] / 1024:8.1f} KB "
+          f"({report['whole_file_gzip'] / raw:.0%})")
+    print(f"  Each compressed alone, no dict:  {report['per_entry_no_dict'] / 1024:8.1f} KB "
+          f"({report['per_entry_no_dict'] / raw:.0%})")
+    print(f"  Each compressed with the dict:   {report['entries'] / 1024:8.1f} KB "
+          f"({report['entries'] / raw:.0%}) + {report['dictionary'] / 1024:.1f} KB dictionary")
+    print(f"  Store file (with ids, offsets):  {report['store'] / 1024:8.1f} KB ({report['store'] / raw:.0%}), "
+          f"{report['store'] / report['whole_file_gzip']:.2f}x whole-file gzip")
+
+    store = DescriptionStore(data)
+    sample = sorted(descriptions)[::max(1, len(descriptions) // 200)]
+    started = time.perf_counter()
+    for obj_id in sample:
+        store.get(obj_id)
+    print(f"  One description decoded in:      {(time.perf_counter() - started) / len(sample) * 1e6:8.1f} µs")
+    extra = report['store'] - report['whole_file_gzip']
+    if extra > 0:
+        print(f"\n⚠️  Decoding one description at a time costs {extra / 1024:.1f} KB over whole-file gzip")
+
+    with stage("verify"):
+        wrong = verify_store(descriptions, data)
+    if wrong:
+        print(f"\n❌ {len(wrong)} descriptions do not round-trip: {', '.join(wrong[:10])}")
+        sys.exit(1)
+    print(f"\n✅ All {len(descriptions)} descriptions decode individually")
+    print(f"📁 Saved to {args.output}")
+
+if __name__ == "__main__":
+    with session("description_store"):
+        main()
@@ -2,31 +2,116 @@
 """
 Download All Gallery Images for Vyoma
 Downloads all images from image_gallery.json with deduplication
+
+Images are stored content-addressed: each output is named after the
+SHA-256 of the downloaded source bytes, so the same photo served from
+several mirrors is encoded and shipped only once.
+
+Downloading and encoding run as a pipeline: fetcher threads feed a
+bounded queue, and a process pool encodes WebPs while the next images
+download, so wall time approaches the larger of network and CPU time
+rather than their sum.
+
+download_gallery() takes the gallery as a dict and returns the object to
+image mapping, so a full build can pass both in memory.
 """
 
+import argparse
 import json
 import os
-import sys
 import time
+import heapq
+import queue
+import threading
+import random
 import hashlib
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from urllib.parse import urlparse
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
-try:
-    from PIL import Image
-except ImportError:
-    print("❌ Pillow not installed. Run: pip install Pillow")
-    sys.exit(1)
+from canonical_json import write_json
+from imaging import compress_and_convert
+from instrumentation import add_arguments, configure_from_args, count_network_bytes, session, stage
 
 # Configuration
-MAX_WIDTH = 800
-WEBP_QUALITY = 75
-DOWNLOAD_DELAY = 1.5  # seconds between downloads
-MAX_RETRIES = 2
+DOWNLOAD_DELAY = 1.5  # seconds between downloads from the same host
+MAX_RETRIES = 4  # attempts per URL for transient failures
+BACKOFF_BASE = 0.5  # seconds, doubled on every retry
+BACKOFF_MAX = 20.0
+RETRY_AFTER_MAX = 60.0  # cap on server-requested Retry-After waits
+BREAKER_THRESHOLD = 3  # consecutive transient failures that open a host's circuit
+BREAKER_COOLDOWN = 15.0  # seconds, doubled every time the circuit re-opens
+BREAKER_MAX_TRIPS = 2  # after this many trips the host is abandoned for the run
+SNIFF_BYTES = 32  # leading bytes inspected before committing to a download
+CHUNK_SIZE = 64 * 1024
+CACHE_DIR = Path("Data/gallery_cache")
+NON_IMAGE_FILE = CACHE_DIR / "non_image_urls.json"
+CONTENT_INDEX_FILE = CACHE_DIR / "content_index.json"
+BLOB_HASH_LENGTH = 16  # hex digits of the SHA-256 kept in blob filenames
+FETCH_WORKERS = 4  # concurrent downloads, never more than one per host
+ENCODE_WORKERS = os.cpu_count() or 1
+FETCHED_QUEUE_SIZE = 8  # downloaded images waiting for an encoder
+GALLERY_FILE = Path("app/src/main/assets/image_gallery.json")
+MAPPING_FILE = Path("app/src/main/assets/object_images.json")
+OUTPUT_DIR = Path("app/src/main/assets/images")
+TEMP_DIR = Path("Data/temp_gallery")
+
+# Download outcomes
+DOWNLOAD_OK = "ok"
+DOWNLOAD_NOT_IMAGE = "not_image"
+DOWNLOAD_FAILED = "failed"  # permanent, e.g. 404
+DOWNLOAD_TRANSIENT = "transient"  # worth retrying, e.g. timeout, 429, 503
+
+# HTTP status codes that indicate a temporary condition
+TRANSIENT_HTTP_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Leading bytes of the formats Pillow can decode for us
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+    (b'BM', 'bmp'),
+)
+
+# Content types that can never be an image, rejected before reading the body
+NON_IMAGE_TYPES = ('text/', 'application/json', 'application/xml', 'application/xhtml')
+
+def detect_image_format(head):
+    """Identify an image format from its leading bytes, or None"""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    for signature, fmt in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return fmt
+    return None
+
+def is_non_image_content_type(content_type):
+    """Check whether a Content-Type header rules out an image body"""
+    if not content_type:
+        return False
+    mime = content_type.split(';')[0].strip().lower()
+    return mime.startswith(NON_IMAGE_TYPES)
 
 def download_image(url, output_path, timeout=30):
-    """Download image from URL"""
+    """
+    Download image from URL, aborting early on non-image responses
+    
+    The Content-Type header and the first SNIFF_BYTES of the body are
+    checked before the rest is read, so HTML catalog pages cost a single
+    round trip instead of a full download.
+    
+    Returns:
+        tuple: (status, retry_after) where status is one of the DOWNLOAD_*
+        constants and retry_after is the server's Retry-After in seconds
+    """
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -34,78 +119,351 @@ def download_image(url, output_path, timeout=30):
         request = Request(url, headers=headers)
         
         with urlopen(request, timeout=timeout) as response:
-            data = response.read()
+            if is_non_image_content_type(response.headers.get('Content-Type')):
+                return DOWNLOAD_NOT_IMAGE, None
             
-        with open(output_path, 'wb') as f:
-            f.write(data)
+            head = response.read(SNIFF_BYTES)
+            count_network_bytes(len(head))
+            if detect_image_format(head) is None:
+                return DOWNLOAD_NOT_IMAGE, None
             
-        return True
+            with open(output_path, 'wb') as f:
+                f.write(head)
+                while True:
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    count_network_bytes(len(chunk))
+                    f.write(chunk)
+            
+        return DOWNLOAD_OK, None
         
-    except (URLError, HTTPError) as e:
-        return False
+    except HTTPError as e:
+        if e.code in TRANSIENT_HTTP_CODES:
+            return DOWNLOAD_TRANSIENT, parse_retry_after(e.headers.get('Retry-After'))
+        return DOWNLOAD_FAILED, None
+    except (URLError, OSError) as e:
+        # Connection refused, DNS failure, timeout, reset mid-body
+        return DOWNLOAD_TRANSIENT, None
     except Exception as e:
-        return False
+        return DOWNLOAD_FAILED, None
 
-def compress_and_convert(input_path, output_path, max_width=MAX_WIDTH, quality=WEBP_QUALITY):
-    """Compress and convert image to WebP"""
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
     try:
-        img = Image.open(input_path)
-        original_size = os.path.getsize(input_path) / 1024
-        
-        # Resize if needed
-        if img.width > max_width:
-            ratio = max_width / img.width
-            new_height = int(img.height * ratio)
-            img = img.resize((max_width, new_height), Image.LANCZOS)
-        
-        # Convert to RGB if necessary
-        if img.mode in ('RGBA', 'LA'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[3])
-            else:
-                background.paste(img, mask=img.split()[1])
-            img = background
-        elif img.mode == 'P':
-            img = img.convert('RGB')
-        elif img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
-        
-        # Save as WebP
-        img.save(output_path, 'WEBP', quality=quality, method=6)
-        compressed_size = os.path.getsize(output_path) / 1024
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with full jitter, never shorter than Retry-After"""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, RETRY_AFTER_MAX))
+    return delay
+
+class HostCircuitBreaker:
+    """
+    Per-host circuit breaker
+    
+    A host's circuit opens after BREAKER_THRESHOLD consecutive transient
+    failures, and no requests are sent to it until the cooldown expires.
+    The next request is a half-open probe: success closes the circuit,
+    failure re-opens it with a doubled cooldown. Once a host has tripped
+    BREAKER_MAX_TRIPS times it is treated as down for the rest of the run.
+    """
+    
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN,
+                 max_trips=BREAKER_MAX_TRIPS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self.failures = defaultdict(int)
+        self.trips = defaultdict(int)
+        self.open_until = {}
+    
+    def is_dead(self, host):
+        """Check whether the host has been given up on"""
+        return self.trips[host] >= self.max_trips
+    
+    def available_at(self, host):
+        """Monotonic time at which the host may be contacted again"""
+        return self.open_until.get(host, 0.0)
+    
+    def record_success(self, host):
+        """Close the circuit after any response from the host"""
+        self.failures[host] = 0
+        self.trips[host] = 0
+        self.open_until.pop(host, None)
+    
+    def record_failure(self, host):
+        """Count a transient failure; returns True if the circuit opened"""
+        self.failures[host] += 1
+        if self.failures[host] < self.threshold:
+            return False
+        self.open_until[host] = time.monotonic() + self.cooldown * (2 ** self.trips[host])
+        self.trips[host] += 1
+        return True
+
+class DownloadScheduler:
+    """
+    Thread-safe queue of pending downloads for the fetcher threads
+    
+    Jobs are handed out in order of the time they may next be attempted,
+    taking into account retry backoff, per-host politeness and each host's
+    circuit breaker. At most one request per host is in flight at a time,
+    so parallel fetchers spread over hosts instead of piling onto one.
+    """
+    
+    def __init__(self, urls, breaker=None):
+        self.breaker = breaker or HostCircuitBreaker()
+        self.pending = [(0.0, seq, url, 0) for seq, url in enumerate(urls)]
+        heapq.heapify(self.pending)
+        self.parked = defaultdict(list)  # host -> jobs waiting for that host to be free
+        self.busy_hosts = set()
+        self.host_ready_at = {}  # host -> monotonic time of the next polite request
+        self.in_flight = 0
+        self.condition = threading.Condition()
+    
+    def next_job(self):
+        """
+        Block until a download may start
         
-        return True, original_size, compressed_size
+        Returns:
+            tuple: (seq, url, attempt, host_down), or None once all work is done
+        """
+        with self.condition:
+            while True:
+                if not self.pending:
+                    if self.in_flight == 0 and not any(self.parked.values()):
+                        return None
+                    self.condition.wait()
+                    continue
+                
+                ready_at, seq, url, attempt = self.pending[0]
+                host = urlparse(url).netloc
+                
+                if self.breaker.is_dead(host):
+                    heapq.heappop(self.pending)
+                    self.in_flight += 1
+                    return seq, url, attempt, True
+                
+                if host in self.busy_hosts:
+                    self.parked[host].append(heapq.heappop(self.pending))
+                    continue
+                
+                # A backing-off or rate-limited host must not hold up the others:
+                # requeue behind whatever else is ready sooner
+                earliest = max(ready_at, self.breaker.available_at(host), self.host_ready_at.get(host, 0.0))
+                if earliest > ready_at:
+                    heapq.heapreplace(self.pending, (earliest, seq, url, attempt))
+                    continue
+                
+                wait_time = ready_at - time.monotonic()
+                if wait_time > 0:
+                    self.condition.wait(wait_time)
+                    continue
+                
+                heapq.heappop(self.pending)
+                self.busy_hosts.add(host)
+                self.in_flight += 1
+                return seq, url, attempt, False
+    
+    def finish(self, seq, url, attempt, status, retry_after=None, host_down=False):
+        """
+        Record a download's outcome and release its host
         
-    except Exception as e:
-        return False, 0, 0
+        Returns:
+            tuple: (retrying, note) where note explains a retry
+        """
+        host = urlparse(url).netloc
+        retrying, note = False, ""
+        with self.condition:
+            self.in_flight -= 1
+            if not host_down:
+                self.busy_hosts.discard(host)
+                for job in self.parked.pop(host, []):
+                    heapq.heappush(self.pending, job)
+                
+                if status == DOWNLOAD_TRANSIENT:
+                    opened = self.breaker.record_failure(host)
+                    if attempt + 1 < MAX_RETRIES and not self.breaker.is_dead(host):
+                        delay = backoff_delay(attempt, retry_after)
+                        heapq.heappush(self.pending, (time.monotonic() + delay, seq, url, attempt + 1))
+                        retrying = True
+                        note = f"circuit open for {host}" if opened else f"retry {attempt + 2}/{MAX_RETRIES} in {delay:.1f}s"
+                else:
+                    self.breaker.record_success(host)
+                    if status == DOWNLOAD_OK:
+                        # Be nice to servers
+                        self.host_ready_at[host] = time.monotonic() + DOWNLOAD_DELAY
+            self.condition.notify_all()
+        return retrying, note
+
+def encode_image(input_path, output_path):
+    """Encoder process entry point: compress_and_convert plus its CPU time"""
+    started = time.perf_counter()
+    success, original_size, compressed_size = compress_and_convert(input_path, output_path)
+    return success, original_size, compressed_size, time.perf_counter() - started
 
 def get_url_hash(url):
     """Get short hash of URL for unique filename"""
     return hashlib.md5(url.encode()).hexdigest()[:8]
 
-def main():
-    """Main function"""
-    print("=" * 70)
-    print("🖼️  Vyoma Gallery Image Downloader")
-    print("=" * 70)
+def get_output_filename(url, obj_ids):
+    """Legacy filename scheme: first_object_id_hash.webp"""
+    return f"{obj_ids[0]}_{get_url_hash(url)}.webp"
+
+def hash_file(path):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_blob_filename(content_hash):
+    """Content-addressed filename for an encoded image"""
+    return f"{content_hash[:BLOB_HASH_LENGTH]}.webp"
+
+class ContentStore:
+    """
+    Content-addressed index of gallery images
     
-    # Setup directories
-    gallery_file = Path("app/src/main/assets/image_gallery.json")
-    temp_dir = Path("Data/temp_gallery")
-    output_dir = Path("app/src/main/assets/images")
+    Maps each URL to the SHA-256 of the bytes it served, and each hash to
+    the WebP blob encoded from them. URLs seen before are resolved without
+    network access, and a URL whose bytes match a known hash reuses the
+    existing blob instead of being encoded again.
+    """
     
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    output_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, path=CONTENT_INDEX_FILE):
+        self.path = path
+        self.urls = {}   # url -> sha256 of source bytes
+        self.blobs = {}  # sha256 -> blob filename
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.urls = data.get('urls', {})
+                self.blobs = data.get('blobs', {})
+            except (OSError, ValueError):
+                pass
     
-    # Load gallery data
-    if not gallery_file.exists():
-        print(f"\n❌ Gallery file not found: {gallery_file}")
-        print("Run: python tools/comprehensive_data_migration.py first")
-        return
+    def lookup_url(self, url, output_dir):
+        """Blob filename for a URL downloaded before, if the blob still exists"""
+        content_hash = self.urls.get(url)
+        if content_hash is None:
+            return None
+        return self.lookup_hash(content_hash, output_dir)
+    
+    def lookup_hash(self, content_hash, output_dir):
+        """Blob filename for already-encoded content, if the blob still exists"""
+        filename = self.blobs.get(content_hash)
+        if filename and (output_dir / filename).exists():
+            return filename
+        return None
+    
+    def add(self, url, content_hash, filename):
+        """Record a URL's content hash and the blob holding it"""
+        self.urls[url] = content_hash
+        self.blobs[content_hash] = filename
     
+    def save(self):
+        """Write the index back to disk"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'urls': self.urls, 'blobs': self.blobs}, f, indent=2, sort_keys=True)
+
+def format_object_names(obj_ids):
+    """Short label for the objects sharing a URL"""
+    obj_names = ', '.join(obj_ids[:2])
+    if len(obj_ids) > 2:
+        obj_names += f" +{len(obj_ids)-2}"
+    return obj_names
+
+def load_non_image_urls(path=NON_IMAGE_FILE):
+    """Load URLs previously found not to serve an image"""
+    if not path.exists():
+        return set()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return set(json.load(f))
+    except (OSError, ValueError):
+        return set()
+
+def save_non_image_urls(urls, path=NON_IMAGE_FILE):
+    """Persist non-image URLs so later runs skip them without network access"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(sorted(urls), f, indent=2)
+
+def fetch_worker(scheduler, fetched, temp_dir):
+    """
+    Fetcher thread: download scheduled URLs and hand them to the encoders
+    
+    Every outcome goes onto the fetched queue as (kind, url, payload,
+    seconds); a successful download carries (temp_file, content_hash).
+    """
+    while True:
+        job = scheduler.next_job()
+        if job is None:
+            return
+        seq, url, attempt, host_down = job
+        if host_down:
+            scheduler.finish(seq, url, attempt, None, host_down=True)
+            fetched.put(('failed', url, "host down", 0.0))
+            continue
+        
+        # Download to temp
+        temp_file = temp_dir / f"{get_url_hash(url)}_temp{Path(url).suffix}"
+        started = time.perf_counter()
+        with stage("fetch", url=url):
+            status, retry_after = download_image(url, temp_file)
+            content_hash = hash_file(temp_file) if status == DOWNLOAD_OK else None
+        seconds = time.perf_counter() - started
+        
+        retrying, note = scheduler.finish(seq, url, attempt, status, retry_after)
+        if retrying:
+            fetched.put(('retry', url, note, seconds))
+        elif status == DOWNLOAD_OK:
+            fetched.put((DOWNLOAD_OK, url, (temp_file, content_hash), seconds))
+        elif status == DOWNLOAD_NOT_IMAGE:
+            fetched.put((DOWNLOAD_NOT_IMAGE, url, None, seconds))
+        else:
+            fetched.put(('failed', url, "download", seconds))
+
+def load_gallery(gallery_file=GALLERY_FILE):
+    """image_gallery.json as written by comprehensive_data_migration.py, or None"""
+    if not gallery_file.exists():
+        return None
     with open(gallery_file, 'r', encoding='utf-8') as f:
-        gallery_data = json.load(f)
+        return json.load(f)
+
+def save_object_images(object_image_map, mapping_file=MAPPING_FILE):
+    """Write object_images.json"""
+    write_json(mapping_file, object_image_map)
+
+def download_gallery(gallery_data, output_dir=OUTPUT_DIR, fetch_workers=FETCH_WORKERS,
+                     encode_workers=ENCODE_WORKERS):
+    """
+    Download and encode every image in a gallery, skipping stored ones
+    
+    Args:
+        gallery_data: Dict of object id -> list of image URLs
+    
+    Returns:
+        tuple: (object_image_map, success_count, skip_count) where
+        object_image_map maps object id -> list of image filenames
+    """
+    temp_dir = TEMP_DIR
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
     
     # Collect all unique URLs
     url_to_objects = {}  # url -> list of object_ids
@@ -120,6 +478,11 @@ def main():
     print(f"  Total image URLs: {sum(len(urls) for urls in gallery_data.values())}")
     print(f"  Unique URLs: {len(url_to_objects)}")
     
+    non_image_urls = load_non_image_urls()
+    known_non_images = non_image_urls.intersection(url_to_objects)
+    if known_non_images:
+        print(f"  Known non-image URLs: {len(known_non_images)} (skipped)")
+    
     # Download and process images
     print(f"\n📥 Downloading and compressing images...")
     print(f"{'URL Hash':<12s} {'Objects':<30s} {'Status':<10s} {'Size':<15s}")
@@ -127,80 +490,152 @@ def main():
     
     success_count = 0
     skip_count = 0
+    dedup_count = 0
+    non_image_count = 0
     fail_count = 0
     total_original = 0
     total_compressed = 0
+    fetch_seconds = 0.0
+    encode_seconds = 0.0
+    started = time.perf_counter()
     
-    # Track which objects got images
-    object_image_map = {}  # obj_id -> list of image filenames
+    url_files = {}  # url -> image filename, for every URL that produced an image
+    
+    store = ContentStore()
+    to_download = []
     
     for url, obj_ids in url_to_objects.items():
         url_hash = get_url_hash(url)
-        obj_names = ', '.join(obj_ids[:2])
-        if len(obj_ids) > 2:
-            obj_names += f" +{len(obj_ids)-2}"
+        obj_names = format_object_names(obj_ids)
         
-        # Generate filename: first_object_id_hash.webp
-        primary_obj = obj_ids[0]
-        filename = f"{primary_obj}_{url_hash}.webp"
-        output_file = output_dir / filename
-        
-        # Skip if already exists
-        if output_file.exists():
+        # Skip if already stored, by content index or under the legacy name
+        filename = store.lookup_url(url, output_dir)
+        if filename is None and (output_dir / get_output_filename(url, obj_ids)).exists():
+            filename = get_output_filename(url, obj_ids)
+        if filename:
             print(f"{url_hash:<12s} {obj_names:<30s} {'SKIP':<10s} (exists)")
             skip_count += 1
-            # Track for all objects
-            for obj_id in obj_ids:
-                if obj_id not in object_image_map:
-                    object_image_map[obj_id] = []
-                object_image_map[obj_id].append(filename)
+            url_files[url] = filename
             continue
         
-        print(f"{url_hash:<12s} {obj_names:<30s} ", end='', flush=True)
-        
-        # Download to temp
-        temp_file = temp_dir / f"{url_hash}_temp{Path(url).suffix}"
-        
-        downloaded = False
-        for attempt in range(MAX_RETRIES):
-            if download_image(url, temp_file):
-                downloaded = True
-                break
-            time.sleep(1)
+        # Skip URLs an earlier run found to be HTML pages, without touching the network
+        if url in non_image_urls:
+            print(f"{url_hash:<12s} {obj_names:<30s} {'SKIP':<10s} (not an image)")
+            non_image_count += 1
+            continue
         
-        if downloaded:
-            # Compress and convert
-            success, orig_size, comp_size = compress_and_convert(temp_file, output_file)
-            
-            if success:
-                total_original += orig_size
-                total_compressed += comp_size
-                reduction = ((orig_size - comp_size) / orig_size) * 100 if orig_size > 0 else 0
-                print(f"{'OK':<10s} {orig_size:>6.1f}KB→{comp_size:>5.1f}KB")
-                success_count += 1
+        to_download.append(url)
+    
+    with stage("fetch and encode"):
+        # Stage 1: fetcher threads download into a bounded queue
+        scheduler = DownloadScheduler(to_download)
+        fetched = queue.Queue(maxsize=FETCHED_QUEUE_SIZE)
+        fetchers = [
+            threading.Thread(target=fetch_worker, args=(scheduler, fetched, temp_dir), daemon=True)
+            for _ in range(min(fetch_workers, len(to_download)))
+        ]
+        for fetcher in fetchers:
+            fetcher.start()
+    
+        # Stage 2: a process pool encodes whatever has been fetched.
+        # encoding: content_hash -> (future, urls waiting on that blob)
+        encoding = {}
+    
+        def report(url, status, detail=""):
+            url_hash = get_url_hash(url)
+            obj_names = format_object_names(url_to_objects[url])
+            print(f"{url_hash:<12s} {obj_names:<30s} {status:<10s} {detail}".rstrip())
+    
+        def collect(done):
+            nonlocal success_count, dedup_count, fail_count, total_original, total_compressed, encode_seconds
+            for content_hash, (future, urls, temp_file) in list(encoding.items()):
+                if future not in done:
+                    continue
+                del encoding[content_hash]
+                success, orig_size, comp_size, seconds = future.result()
+                encode_seconds += seconds
+                filename = get_blob_filename(content_hash)
+                if success:
+                    total_original += orig_size
+                    total_compressed += comp_size
+                    report(urls[0], 'OK', f"{orig_size:>6.1f}KB→{comp_size:>5.1f}KB")
+                    success_count += 1
+                    dedup_count += len(urls) - 1
+                    for url in urls:
+                        store.add(url, content_hash, filename)
+                        url_files[url] = filename
                 
-                # Track for all objects
-                for obj_id in obj_ids:
-                    if obj_id not in object_image_map:
-                        object_image_map[obj_id] = []
-                    object_image_map[obj_id].append(filename)
+                    # Clean up temp file
+                    temp_file.unlink()
+                else:
+                    report(urls[0], 'FAIL', "(compression)")
+                    fail_count += len(urls)
+    
+        # Spawned rather than forked: the fetcher threads are already running
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=encode_workers, mp_context=context) as encoders:
+            while True:
+                # Backpressure: with every encoder busy, stop draining the queue
+                # so fetchers block on it instead of filling the disk
+                if len(encoding) >= encode_workers * 2:
+                    collect(wait([job[0] for job in encoding.values()], return_when=FIRST_COMPLETED).done)
+            
+                try:
+                    event = fetched.get(timeout=0.1)
+                except queue.Empty:
+                    collect({job[0] for job in encoding.values() if job[0].done()})
+                    if not any(fetcher.is_alive() for fetcher in fetchers) and fetched.empty():
+                        break
+                    continue
+            
+                kind, url, payload, seconds = event
+                fetch_seconds += seconds
+            
+                if kind == 'retry':
+                    report(url, 'RETRY', f"({payload})")
+                elif kind == 'failed':
+                    report(url, 'FAIL', f"({payload})")
+                    fail_count += 1
+                elif kind == DOWNLOAD_NOT_IMAGE:
+                    report(url, 'SKIP', "(not an image)")
+                    non_image_urls.add(url)
+                    non_image_count += 1
+                else:
+                    temp_file, content_hash = payload
                 
-                # Clean up temp file
-                temp_file.unlink()
-            else:
-                print(f"{'FAIL':<10s} (compression)")
-                fail_count += 1
-        else:
-            print(f"{'FAIL':<10s} (download)")
-            fail_count += 1
+                    # Identical bytes from another URL: reuse that blob, skip the encode
+                    filename = store.lookup_hash(content_hash, output_dir)
+                    if filename:
+                        report(url, 'DEDUP', f"(same as {filename})")
+                        dedup_count += 1
+                        store.add(url, content_hash, filename)
+                        url_files[url] = filename
+                        temp_file.unlink()
+                    elif content_hash in encoding:
+                        report(url, 'DEDUP', "(same as an image being encoded)")
+                        encoding[content_hash][1].append(url)
+                        temp_file.unlink()
+                    else:
+                        output_file = output_dir / get_blob_filename(content_hash)
+                        future = encoders.submit(encode_image, temp_file, output_file)
+                        encoding[content_hash] = (future, [url], temp_file)
         
-        # Be nice to servers
-        time.sleep(DOWNLOAD_DELAY)
+            collect(wait([job[0] for job in encoding.values()]).done)
     
-    # Save object-to-images mapping
-    mapping_file = output_dir.parent / "object_images.json"
-    with open(mapping_file, 'w', encoding='utf-8') as f:
-        json.dump(object_image_map, f, indent=2)
+    # Track which objects got images, in gallery order regardless of retries;
+    # mirrors of the same image collapse onto one shared blob
+    object_image_map = {}  # obj_id -> list of image filenames
+    for url, obj_ids in url_to_objects.items():
+        if url not in url_files:
+            continue
+        for obj_id in obj_ids:
+            if obj_id not in object_image_map:
+                object_image_map[obj_id] = []
+            if url_files[url] not in object_image_map[obj_id]:
+                object_image_map[obj_id].append(url_files[url])
+    
+    store.save()
+    save_non_image_urls(non_image_urls)
     
     # Summary
     print("-" * 70)
@@ -211,9 +646,12 @@ def main():
     print(f"\n📊 Summary:")
     print(f"  ✓ Successfully processed: {success_count}")
     print(f"  ⊘ Skipped (existing):    {skip_count}")
+    print(f"  ⊘ Deduplicated:          {dedup_count}")
+    print(f"  ⊘ Skipped (not image):   {non_image_count}")
     print(f"  ✗ Failed:                {fail_count}")
+    print(f"  ⏱  Wall time:             {time.perf_counter() - started:.1f}s "
+          f"(download {fetch_seconds:.1f}s, encode {encode_seconds:.1f}s)")
     print(f"  📁 Output directory:     {output_dir}")
-    print(f"  📋 Image mapping:        {mapping_file}")
     
     # Clean up temp directory
     if temp_dir.exists():
@@ -221,6 +659,37 @@ def main():
             f.unlink()
         temp_dir.rmdir()
     
+    return object_image_map, success_count, skip_count
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Download and compress all gallery images")
+    parser.add_argument('--fetch-workers', type=int, default=FETCH_WORKERS,
+                        help=f"concurrent downloads (default {FETCH_WORKERS})")
+    parser.add_argument('--encode-workers', type=int, default=ENCODE_WORKERS,
+                        help=f"encoder processes (default {ENCODE_WORKERS})")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+    
+    print("=" * 70)
+    print("🖼️  Vyoma Gallery Image Downloader")
+    print("=" * 70)
+    
+    # Load gallery data
+    gallery_data = load_gallery()
+    if gallery_data is None:
+        print(f"\n❌ Gallery file not found: {GALLERY_FILE}")
+        print("Run: python tools/comprehensive_data_migration.py first")
+        return
+    
+    object_image_map, success_count, skip_count = download_gallery(
+        gallery_data, fetch_workers=args.fetch_workers, encode_workers=args.encode_workers)
+    
+    # Save object-to-images mapping
+    save_object_images(object_image_map)
+    print(f"  📋 Image mapping:        {MAPPING_FILE}")
+    
     if success_count > 0 or skip_count > 0:
         print(f"\n✅ Gallery images ready!")
         print(f"\n🎯 Next Steps:")
@@ -229,4 +698,5 @@ def main():
         print(f"  3. All objects now have multiple images!")
 
 if __name__ == "__main__":
-    main()
+    with session("download_all_gallery_images"):
+        main()
@@ -2,8 +2,14 @@
 """
 Download and Prepare Astronomy Images for Vyoma
 Downloads images from data sources, compresses them, and places in assets folder
+
+Outputs are tracked in the build cache (see build_cache.py), keyed by the
+source URL and the encoding parameters: an image this tool made is
+fetched again only when its URL, MAX_WIDTH, WEBP_QUALITY or the tool
+version changed. Existing images it did not make are left alone.
 """
 
+import argparse
 import json
 import os
 import sys
@@ -12,16 +18,14 @@ from pathlib import Path
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
-try:
-    from PIL import Image
-except ImportError:
-    print("❌ Pillow not installed. Run: pip install Pillow")
-    sys.exit(1)
+from build_cache import BuildCache, build_key
+from imaging import MAX_WIDTH, WEBP_METHOD, WEBP_QUALITY, convert_to_webp
+from instrumentation import add_arguments, configure_from_args, count_network_bytes, session, stage
 
 # Configuration
-MAX_WIDTH = 800
-WEBP_QUALITY = 75
 DOWNLOAD_DELAY = 1  # seconds between downloads (be nice to servers)
+TOOL_NAME = "download_and_prepare_images"
+TOOL_VERSION = 1  # bump when a code change alters the encoded output
 
 def download_image(url, output_path, timeout=30):
     """
@@ -44,6 +48,7 @@ def download_image(url, output_path, timeout=30):
         
         with urlopen(request, timeout=timeout) as response:
             data = response.read()
+        count_network_bytes(len(data))
             
         with open(output_path, 'wb') as f:
             f.write(data)
@@ -71,32 +76,7 @@ def compress_and_convert(input_path, output_path, max_width=MAX_WIDTH, quality=W
         tuple: (success, original_size_kb, compressed_size_kb)
     """
     try:
-        img = Image.open(input_path)
-        original_size = os.path.getsize(input_path) / 1024
-        
-        # Resize if needed
-        if img.width > max_width:
-            ratio = max_width / img.width
-            new_height = int(img.height * ratio)
-            img = img.resize((max_width, new_height), Image.LANCZOS)
-        
-        # Convert to RGB if necessary
-        if img.mode in ('RGBA', 'LA'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[3])
-            else:
-                background.paste(img, mask=img.split()[1])
-            img = background
-        elif img.mode == 'P':
-            img = img.convert('RGB')
-        elif img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
-        
-        # Save as WebP
-        img.save(output_path, 'WEBP', quality=quality, method=6)
-        compressed_size = os.path.getsize(output_path) / 1024
-        
+        original_size, compressed_size = convert_to_webp(input_path, output_path, max_width, quality)
         return True, original_size, compressed_size
         
     except Exception as e:
@@ -179,6 +159,13 @@ def extract_image_urls_from_json(json_file):
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Download, compress and place astronomy images")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every image, even if it exists and is up to date")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+    
     print("=" * 70)
     print("Vyoma Image Download & Preparation Tool")
     print("=" * 70)
@@ -202,12 +189,13 @@ def main():
     all_urls = []
     
     json_files = list(data_dir.glob("*.json"))
-    for json_file in json_files:
-        if json_file.name == "_index.json":
-            continue
-        print(f"  • {json_file.name}")
-        urls = extract_image_urls_from_json(json_file)
-        all_urls.extend(urls)
+    with stage("scan"):
+        for json_file in json_files:
+            if json_file.name == "_index.json":
+                continue
+            print(f"  • {json_file.name}")
+            urls = extract_image_urls_from_json(json_file)
+            all_urls.extend(urls)
     
     if not all_urls:
         print("\n❌ No image URLs found in data files")
@@ -220,6 +208,9 @@ def main():
     print(f"{'Object ID':<20s} {'Status':<10s} {'Original':>10s} {'Compressed':>10s} {'Reduction':>10s}")
     print("-" * 70)
     
+    cache = BuildCache()
+    params = {'max_width': MAX_WIDTH, 'quality': WEBP_QUALITY, 'method': WEBP_METHOD}
+    
     success_count = 0
     skip_count = 0
     fail_count = 0
@@ -228,10 +219,12 @@ def main():
     
     for obj_id, url in all_urls:
         output_file = output_dir / f"{obj_id}.webp"
+        key = build_key(url, TOOL_NAME, TOOL_VERSION, params)
         
-        # Skip if already exists
-        if output_file.exists():
-            print(f"{obj_id:<20s} {'SKIP':<10s} (already exists)")
+        # Skip if up to date, or if it is an image this tool did not make
+        if not args.force and not cache.needs_build(output_file, key, TOOL_NAME):
+            reason = "up to date" if cache.is_fresh(output_file, key) else "already exists"
+            print(f"{obj_id:<20s} {'SKIP':<10s} ({reason})")
             skip_count += 1
             continue
         
@@ -240,11 +233,16 @@ def main():
         # Download to temp
         temp_file = temp_dir / f"{obj_id}_temp{Path(url).suffix}"
         
-        if download_image(url, temp_file):
+        with stage("download", object=obj_id):
+            downloaded = download_image(url, temp_file)
+        if downloaded:
             # Compress and convert
-            success, orig_size, comp_size = compress_and_convert(temp_file, output_file)
+            with stage("encode", object=obj_id):
+                success, orig_size, comp_size = compress_and_convert(temp_file, output_file)
             
             if success:
+                cache.record(output_file, key, TOOL_NAME, params)
+                cache.save()
                 total_original += orig_size
                 total_compressed += comp_size
                 reduction = ((orig_size - comp_size) / orig_size) * 100 if orig_size > 0 else 0
@@ -291,4 +289,5 @@ def main():
         print(f"\n⚠️  No new images were downloaded.")
 
 if __name__ == "__main__":
-    main()
+    with session(TOOL_NAME):
+        main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Multi-Resolution Image Derivatives for Vyoma
+Decodes each image once and writes WebPs at several widths plus a manifest
+
+The app can read image_derivatives.json and load the smallest asset that
+covers the size it is drawing, e.g. a 128 px thumbnail for list rows on
+HomeScreen instead of the full 800 px image.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from canonical_json import write_json
+from imaging import WEBP_QUALITY, decode_for_width, flatten_to_rgb, read_size, resize_to_width, save_webp
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+DEFAULT_WIDTHS = (128, 320, 800, 1600)
+INPUT_DIR = Path("app/src/main/assets/images")
+ASSETS_DIR = Path("app/src/main/assets")
+MANIFEST_FILE = ASSETS_DIR / "image_derivatives.json"
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tif', '.tiff'}
+
+def asset_path(path):
+    """Path as the app's AssetManager sees it, e.g. images/w128/sun.webp"""
+    try:
+        return path.relative_to(ASSETS_DIR).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+def derivative_path(output_dir, width, stem):
+    """Where the derivative of an image at a given width lives"""
+    return output_dir / f"w{width}" / f"{stem}.webp"
+
+def generate_derivatives(input_path, output_dir, widths=DEFAULT_WIDTHS, quality=WEBP_QUALITY):
+    """
+    Decode an image once and write a WebP for every width it can fill
+
+    Widths larger than the source are skipped rather than upscaled.
+
+    Returns:
+        dict: Manifest entry with source size and per-width derivatives
+    """
+    widths = sorted(set(widths), reverse=True)
+    source_size = read_size(input_path)
+    with decode_for_width(input_path, widths[0]) as img:
+        base = flatten_to_rgb(img)
+
+    derivatives = []
+    for width in widths:
+        if width >= base.width:
+            continue
+        resized = resize_to_width(base, width)
+        path = derivative_path(output_dir, width, Path(input_path).stem)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        save_webp(resized, path, quality)
+        derivatives.append({
+            "width": resized.width,
+            "height": resized.height,
+            "bytes": os.path.getsize(path),
+            "path": asset_path(path),
+        })
+
+    return {
+        "source": asset_path(Path(input_path)),
+        "width": source_size[0],
+        "height": source_size[1],
+        "derivatives": sorted(derivatives, key=lambda d: d["width"]),
+    }
+
+def derivative_job(job):
+    """Process pool entry point"""
+    input_path, output_dir, widths, quality = job
+    try:
+        return generate_derivatives(input_path, output_dir, widths, quality), None
+    except Exception as e:
+        return None, str(e)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Generate multi-resolution WebP derivatives")
+    parser.add_argument('--input', type=Path, default=INPUT_DIR, help=f"source images (default {INPUT_DIR})")
+    parser.add_argument('--output', type=Path, default=INPUT_DIR, help=f"derivative root (default {INPUT_DIR})")
+    parser.add_argument('--widths', type=lambda v: [int(w) for w in v.split(',')], default=list(DEFAULT_WIDTHS),
+                        help="comma-separated widths (default 128,320,800,1600)")
+    parser.add_argument('--quality', type=int, default=WEBP_QUALITY)
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    print("=" * 70)
+    print("🖼️  Vyoma Image Derivative Generator")
+    print("=" * 70)
+
+    if not args.input.exists():
+        print(f"\n❌ Input directory not found: {args.input}")
+        return
+
+    # Only images wider than the smallest width yield any derivative; this
+    # also leaves out the small UI sprites sharing the images directory
+    min_width = min(args.widths)
+    image_files = []
+    stems = set()
+    for f in sorted(args.input.iterdir()):
+        if not f.is_file() or f.suffix.lower() not in IMAGE_EXTENSIONS:
+            continue
+        if read_size(f)[0] <= min_width:
+            continue
+        if f.stem in stems:
+            print(f"⚠️  Skipping {f.name}: another image already uses the name {f.stem}")
+            continue
+        stems.add(f.stem)
+        image_files.append(f)
+    
+    if not image_files:
+        print(f"\n❌ No images wider than {min_width}px found in {args.input}")
+        return
+
+    print(f"\n📂 {len(image_files)} images → widths {', '.join(map(str, sorted(args.widths)))}")
+    print(f"\n{'Image':<32s} {'Source':>11s} {'Derivatives':<25s}")
+    print("-" * 70)
+
+    jobs = [(f, args.output, args.widths, args.quality) for f in image_files]
+    manifest = {}
+    total_bytes = 0
+    started = time.perf_counter()
+
+    workers = args.workers or os.cpu_count() or 1
+    with stage("encode"), ProcessPoolExecutor(max_workers=workers) as pool:
+        for image_file, (entry, error) in zip(image_files, pool.map(derivative_job, jobs)):
+            if error:
+                print(f"{image_file.name:<32s} ✗ {error}")
+                continue
+            manifest[image_file.name] = entry
+            sizes = ' '.join(str(d["width"]) for d in entry["derivatives"])
+            total_bytes += sum(d["bytes"] for d in entry["derivatives"])
+            print(f"{image_file.name:<32s} {entry['width']:>5d}x{entry['height']:<5d} {sizes}")
+
+    write_json(MANIFEST_FILE, manifest)
+
+    print("-" * 70)
+    print(f"\n📊 Summary:")
+    print(f"  ✓ Images:        {len(manifest)}")
+    print(f"  ✓ Derivatives:   {sum(len(e['derivatives']) for e in manifest.values())} ({total_bytes / 1024:.1f} KB)")
+    print(f"  ⏱  Time:          {time.perf_counter() - started:.1f}s")
+    print(f"  📋 Manifest:      {MANIFEST_FILE}")
+
+if __name__ == "__main__":
+    with session("generate_image_derivatives"):
+        main()
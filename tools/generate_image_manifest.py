@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Image Manifest with Instant Previews for Vyoma
+Records each image's dimensions, byte size and a BlurHash preview
+
+Detail and gallery screens can read image_manifest.json to size their
+layouts before an image loads and paint its BlurHash (a ~30 character
+string decoding to a soft colour preview) or its average colour while
+the full WebP decodes.
+
+BlurHash is computed on a small thumbnail with the DCT basis applied as
+two matrix products in NumPy, instead of the usual per-pixel loops.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ NumPy not installed. Run: pip install numpy")
+    sys.exit(1)
+
+from canonical_json import write_json
+from imaging import Image, flatten_to_rgb
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+ASSETS_DIR = Path("app/src/main/assets")
+IMAGE_DIRS = [ASSETS_DIR / "images", ASSETS_DIR / "images" / "placeholders"]
+MANIFEST_FILE = ASSETS_DIR / "image_manifest.json"
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+BLURHASH_COMPONENTS = (4, 3)  # x, y for landscape; swapped for portrait
+THUMBNAIL_SIZE = 64  # BlurHash only keeps low frequencies, so a thumbnail suffices
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+SRGB_TO_LINEAR = np.where(
+    np.arange(256) / 255 <= 0.04045,
+    np.arange(256) / 255 / 12.92,
+    ((np.arange(256) / 255 + 0.055) / 1.055) ** 2.4)
+
+def base83(value, length):
+    """Encode an integer as length base-83 digits"""
+    return ''.join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+def linear_to_srgb(value):
+    """Linear light in 0..1 to an sRGB byte"""
+    v = min(1.0, max(0.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+def blurhash_factors(pixels, components_x, components_y):
+    """
+    DCT factors of an (h, w, 3) uint8 sRGB array, as (components_y, components_x, 3)
+
+    factor[j, i] = norm * mean over pixels of cos(pi*i*x/w) * cos(pi*j*y/h) * linear,
+    with norm 1 for the DC term and 2 otherwise.
+    """
+    height, width = pixels.shape[:2]
+    linear = SRGB_TO_LINEAR[pixels]
+    basis_x = np.cos(np.pi * np.arange(components_x)[:, None] * np.arange(width)[None, :] / width)
+    basis_y = np.cos(np.pi * np.arange(components_y)[:, None] * np.arange(height)[None, :] / height)
+    factors = np.einsum('jy,yxc,ix->jic', basis_y, linear, basis_x) / (width * height)
+    factors[1:, :] *= 2
+    factors[0, 1:] *= 2
+    return factors
+
+def encode_blurhash(pixels, components_x=4, components_y=3):
+    """BlurHash string of an (h, w, 3) uint8 sRGB array"""
+    factors = blurhash_factors(pixels, components_x, components_y).reshape(-1, 3)
+    dc, ac = factors[0], factors[1:]
+
+    result = base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if len(ac):
+        quantized_max = int(max(0, min(82, math.floor(np.abs(ac).max() * 166 - 0.5))))
+        result += base83(quantized_max, 1)
+        maximum = (quantized_max + 1) / 166
+    else:
+        result += base83(0, 1)
+        maximum = 1
+    result += base83((linear_to_srgb(dc[0]) << 16) + (linear_to_srgb(dc[1]) << 8) + linear_to_srgb(dc[2]), 4)
+
+    scaled = ac / maximum
+    quantized = np.clip(np.floor(np.sign(scaled) * np.abs(scaled) ** 0.5 * 9 + 9.5), 0, 18).astype(int)
+    for r, g, b in quantized:
+        result += base83(int(r) * 19 * 19 + int(g) * 19 + int(b), 2)
+    return result
+
+def describe_image(path):
+    """
+    Manifest entry for one image
+
+    Returns:
+        dict: width, height, bytes, blurhash and average colour
+    """
+    with Image.open(path) as img:
+        width, height = img.size
+        img.draft('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        thumbnail = flatten_to_rgb(img).convert('RGB')
+        thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        pixels = np.asarray(thumbnail)
+
+    components = BLURHASH_COMPONENTS if width >= height else BLURHASH_COMPONENTS[::-1]
+    average = pixels.reshape(-1, 3).mean(axis=0).round().astype(int)
+    return {
+        "width": width,
+        "height": height,
+        "bytes": os.path.getsize(path),
+        "blurhash": encode_blurhash(pixels, *components),
+        "color": "#{:02x}{:02x}{:02x}".format(*average),
+    }
+
+def describe_job(path):
+    """Process pool entry point"""
+    try:
+        return describe_image(path), None
+    except Exception as e:
+        return None, str(e)
+
+def asset_path(path):
+    """Path as the app's AssetManager sees it, e.g. images/sun.webp"""
+    try:
+        return path.relative_to(ASSETS_DIR).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+def find_images(image_dirs=IMAGE_DIRS):
+    """Image files directly inside each of image_dirs"""
+    images = []
+    for image_dir in image_dirs:
+        if image_dir.exists():
+            images.extend(sorted(f for f in image_dir.iterdir()
+                                 if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS))
+    return images
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Write image_manifest.json with sizes and BlurHash previews")
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    print("=" * 70)
+    print("🗂️  Vyoma Image Manifest")
+    print("=" * 70)
+
+    images = find_images()
+    if not images:
+        print(f"\n❌ No images found in {', '.join(map(str, IMAGE_DIRS))}")
+        return
+
+    print(f"\n📂 Describing {len(images)} images...")
+    started = time.perf_counter()
+    manifest = {}
+    failed = 0
+    workers = args.workers or os.cpu_count() or 1
+    with stage("describe"), ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, (entry, error) in zip(images, pool.map(describe_job, images, chunksize=8)):
+            if error:
+                print(f"  ✗ {path.name}: {error}")
+                failed += 1
+                continue
+            manifest[asset_path(path)] = entry
+
+    write_json(MANIFEST_FILE, manifest)
+
+    print(f"\n📊 Summary:")
+    print(f"  ✓ Images:   {len(manifest)}")
+    if failed:
+        print(f"  ✗ Failed:   {failed}")
+    print(f"  ⏱  Time:     {time.perf_counter() - started:.1f}s")
+    print(f"  📋 Manifest: {MANIFEST_FILE}")
+
+if __name__ == "__main__":
+    with session("generate_image_manifest"):
+        main()
@@ -2,6 +2,17 @@
 """
 Generate Placeholder Images for Missing Astronomy Objects
 Creates beautiful gradient placeholders with object initials
+
+Placeholders are tracked in the build cache (see build_cache.py): one is
+redrawn when its name, colours, size or quality change. Existing images
+this tool did not make, such as downloaded photos, are never replaced.
+
+With --catalog, a placeholder is made for every object in
+initial_data.json that has no image, coloured by spectral class (for
+stars whose class is known) or by object type. Placeholders are named by
+the hash of what they show, so objects that look the same share a file
+and reruns only render what is new. They are rendered in a process pool
+and mapped to objects in placeholder_images.json.
 """
 
 try:
@@ -10,9 +21,59 @@ except ImportError:
     print("❌ Pillow not installed. Run: pip install Pillow")
     exit(1)
 
+try:
+    import numpy as np
+except ImportError:
+    print("❌ NumPy not installed. Run: pip install numpy")
+    exit(1)
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import math
 
+from build_cache import BuildCache, build_key
+from canonical_json import write_json
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+WEBP_QUALITY = 75
+TOOL_NAME = "generate_placeholder_images"
+TOOL_VERSION = 1  # bump when a code change alters the drawn placeholders
+PLACEHOLDER_SIZE = (800, 800)
+ASSETS_DIR = Path("app/src/main/assets")
+CATALOG_FILE = ASSETS_DIR / "initial_data.json"
+OBJECTS_FILE = ASSETS_DIR / "astronomy_objects.json"
+CATALOG_PLACEHOLDER_DIR = ASSETS_DIR / "images" / "placeholders"
+PLACEHOLDER_MAP_FILE = ASSETS_DIR / "placeholder_images.json"
+
+# Catalog placeholder colours, inner to outer, by spectral class...
+SPECTRAL_COLORS = {
+    "O": [(170, 190, 255), (120, 150, 255), (70, 100, 230)],
+    "B": [(200, 220, 255), (160, 190, 255), (120, 160, 255)],
+    "A": [(220, 230, 255), (180, 200, 255), (140, 170, 255)],
+    "F": [(255, 240, 220), (255, 220, 180), (255, 200, 140)],
+    "G": [(255, 240, 170), (255, 210, 110), (235, 170, 60)],
+    "K": [(255, 180, 100), (255, 140, 60), (255, 100, 20)],
+    "M": [(255, 100, 50), (255, 60, 20), (200, 40, 10)],
+}
+
+# ...or by object type when the class is unknown
+TYPE_COLORS = {
+    "STAR": [(240, 240, 255), (200, 200, 235), (130, 130, 170)],
+    "PLANET": [(210, 180, 140), (160, 130, 100), (100, 80, 60)],
+    "MOON": [(200, 200, 200), (150, 150, 150), (100, 100, 100)],
+    "GALAXY": [(150, 100, 200), (100, 60, 150), (60, 30, 100)],
+    "NEBULA": [(255, 100, 150), (200, 60, 100), (150, 30, 60)],
+    "STAR_CLUSTER": [(180, 200, 255), (140, 160, 255), (100, 120, 255)],
+    "BLACK_HOLE": [(255, 170, 60), (120, 40, 20), (10, 5, 5)],
+}
+DEFAULT_COLORS = [(160, 170, 200), (100, 110, 150), (50, 55, 90)]
+
 # Objects that need placeholders
 PLACEHOLDERS = {
     "sun": {"name": "Sun", "colors": [(255, 200, 0), (255, 150, 0), (255, 100, 0)]},
@@ -30,8 +91,54 @@ PLACEHOLDERS = {
     "pleiades": {"name": "Pleiades", "colors": [(180, 200, 255), (140, 160, 255), (100, 120, 255)]},
 }
 
+@lru_cache(maxsize=8)
+def radial_distance_field(width, height):
+    """
+    Distance field of a width x height image, as (ratios, index)
+
+    ratios holds each distinct distance from the centre as a fraction of
+    the corner distance, and index maps every pixel to its entry; far
+    fewer distances than pixels exist, since many pixels share one. It is
+    computed once per size and shared by all placeholders of that size.
+    """
+    center_x, center_y = width // 2, height // 2
+    max_radius = math.sqrt(center_x**2 + center_y**2)
+    dx = np.arange(width, dtype=np.int64) - center_x
+    dy = np.arange(height, dtype=np.int64) - center_y
+    squared = dy[:, None] * dy[:, None] + dx[None, :] * dx[None, :]
+    distances, index = np.unique(squared, return_inverse=True)
+    ratios = np.sqrt(distances.astype(np.float64)) / max_radius
+    index = index.reshape(height, width).astype(np.int32)
+    ratios.setflags(write=False)
+    index.setflags(write=False)
+    return ratios, index
+
 def create_radial_gradient(size, colors):
-    """Create a radial gradient image"""
+    """
+    Create a radial gradient image
+
+    Colours are computed once per distinct distance with the same float64
+    arithmetic, in the same order, as the per-pixel reference below, so
+    the output is pixel-identical.
+    """
+    ratios, index = radial_distance_field(*size)
+    inner = ratios < 0.33
+    middle = ratios < 0.66
+    t_inner = ratios / 0.33
+    t_middle = (ratios - 0.33) / 0.33
+
+    # One RGBX pixel per distance, so each image pixel is a single uint32 lookup
+    palette = np.zeros((len(ratios), 4), dtype=np.uint8)
+    for channel in range(3):
+        c0, c1, c2 = (c[channel] for c in colors)
+        palette[:, channel] = np.where(
+            inner, c0 * (1 - t_inner) + c1 * t_inner,
+            np.where(middle, c1 * (1 - t_middle) + c2 * t_middle, c2))
+    pixels = palette.view(np.uint32).ravel().take(index)
+    return Image.frombytes('RGB', size, pixels.tobytes(), 'raw', 'RGBX')
+
+def create_radial_gradient_reference(size, colors):
+    """Per-pixel reference implementation of create_radial_gradient, kept for --benchmark"""
     img = Image.new('RGB', size)
     draw = ImageDraw.Draw(img)
     
@@ -98,34 +205,190 @@ def add_text_to_image(img, text, font_size=200):
     
     return img
 
-def generate_placeholder(obj_id, name, colors, size=(800, 800), output_dir=Path("app/src/main/assets/images")):
-    """Generate a placeholder image"""
+def initials(name):
+    """Up to two initials from the words of a name that start with a letter"""
+    words = [word for word in name.split() if word[:1].isalpha()]
+    return ''.join(word[0].upper() for word in words[:2])
+
+def render_placeholder(name, colors, size=PLACEHOLDER_SIZE):
+    """Gradient with the name's initials on top"""
+    img = create_radial_gradient(size, colors)
+    return add_text_to_image(img, initials(name), font_size=size[0] // 4)
+
+def generate_placeholder(obj_id, name, colors, size=PLACEHOLDER_SIZE, output_dir=Path("app/src/main/assets/images"),
+                         cache=None):
+    """Generate a placeholder image, returning False if it was skipped"""
     output_file = output_dir / f"{obj_id}.webp"
+    spec = {"name": name, "colors": [list(c) for c in colors], "size": list(size)}
+    params = {"quality": WEBP_QUALITY}
+    key = build_key(spec, TOOL_NAME, TOOL_VERSION, params)
     
-    # Skip if already exists
-    if output_file.exists():
+    # Skip if up to date, or if it is an image this tool did not make
+    if cache is None:
+        if output_file.exists():
+            return False
+    elif not cache.needs_build(output_file, key, TOOL_NAME):
         return False
     
-    # Create gradient
-    img = create_radial_gradient(size, colors)
-    
-    # Get initials
-    words = name.split()
-    initials = ''.join(word[0].upper() for word in words[:2])
-    
-    # Add text
-    img = add_text_to_image(img, initials)
-    
-    # Save as WebP
-    img.save(output_file, 'WEBP', quality=75)
+    # Create gradient with initials and save as WebP
+    img = render_placeholder(name, colors, size)
+    img.save(output_file, 'WEBP', quality=WEBP_QUALITY)
+    if cache is not None:
+        cache.record(output_file, key, TOOL_NAME, params)
     
     return True
 
-def main():
-    """Main function"""
+def load_spectral_classes(objects_file=OBJECTS_FILE):
+    """Spectral class letter (O, B, A, ...) by object id, where the data has one"""
+    try:
+        with open(objects_file, 'r', encoding='utf-8') as f:
+            objects = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    classes = {}
+    for obj in objects:
+        metadata = obj.get('metadata') or {}
+        spectral = metadata.get('spectral_type') or metadata.get('spectral_class') or ''
+        if spectral[:1].upper() in SPECTRAL_COLORS:
+            classes[obj['id']] = spectral[0].upper()
+    return classes
+
+def placeholder_colors(obj, spectral_classes):
+    """Colours for an object's placeholder"""
+    spectral = spectral_classes.get(obj['id'])
+    if obj.get('type') == 'STAR' and spectral:
+        return SPECTRAL_COLORS[spectral]
+    return TYPE_COLORS.get(obj.get('type'), DEFAULT_COLORS)
+
+def needs_placeholder(obj, images_dir):
+    """True for objects with no image of their own"""
+    url = obj.get('imageUrl')
+    if url and not url.startswith(asset_path(CATALOG_PLACEHOLDER_DIR) + '/'):
+        return False
+    return not (images_dir / f"{obj['id']}.webp").exists()
+
+def asset_path(path):
+    """Path as the app's AssetManager sees it, e.g. images/placeholders/ab12.webp"""
+    try:
+        return path.relative_to(ASSETS_DIR).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+def placeholder_job(job):
+    """Process pool entry point: render one (name, colors, size, path) placeholder"""
+    name, colors, size, path = job
+    img = render_placeholder(name, colors, size)
+    # Written under a temporary name first so an interrupted run never
+    # leaves a truncated file that looks cached
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    img.save(temp_path, 'WEBP', quality=WEBP_QUALITY)
+    os.replace(temp_path, path)
+    return path
+
+def generate_catalog_placeholders(catalog_file=CATALOG_FILE, output_dir=CATALOG_PLACEHOLDER_DIR,
+                                  size=PLACEHOLDER_SIZE, workers=None):
+    """
+    Make a placeholder for every catalog object lacking an image
+
+    Each placeholder file is named by the hash of its initials, colours,
+    size and quality, so it is shared by every object that would look the
+    same and is only rendered if that file does not exist yet.
+
+    Returns:
+        tuple: (mapping of object id to asset path, files rendered, files reused)
+    """
+    with open(catalog_file, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    spectral_classes = load_spectral_classes()
+    images_dir = output_dir.parent
+
+    mapping = {}
+    jobs = {}
+    for obj in catalog:
+        if not needs_placeholder(obj, images_dir):
+            continue
+        colors = placeholder_colors(obj, spectral_classes)
+        spec = {"initials": initials(obj['name']), "colors": [list(c) for c in colors], "size": list(size)}
+        key = build_key(spec, TOOL_NAME, TOOL_VERSION, {"quality": WEBP_QUALITY})
+        path = output_dir / f"{key}.webp"
+        mapping[obj['id']] = asset_path(path)
+        if path not in jobs and not path.exists():
+            jobs[path] = (obj['name'], colors, size, path)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if jobs:
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(placeholder_job, jobs.values()))
+
+    # The directory belongs to this tool; drop placeholders nothing uses now
+    used = {Path(p).name for p in mapping.values()}
+    for stale in output_dir.glob('*.webp'):
+        if stale.name not in used:
+            stale.unlink()
+
+    return mapping, len(jobs), len(used) - len(jobs)
+
+def benchmark(size=(800, 800), runs=5):
+    """Time create_radial_gradient against the per-pixel reference and check they match"""
+    print(f"\n⏱  Radial gradient, {size[0]}x{size[1]}, {len(PLACEHOLDERS)} colour sets")
+    reference_time = 0
+    vectorized_time = 0
+    mismatches = 0
+    for data in PLACEHOLDERS.values():
+        started = time.perf_counter()
+        expected = create_radial_gradient_reference(size, data['colors'])
+        reference_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(runs):
+            actual = create_radial_gradient(size, data['colors'])
+        vectorized_time += (time.perf_counter() - started) / runs
+
+        if actual.tobytes() != expected.tobytes():
+            mismatches += 1
+            print(f"  ✗ {data['name']}: output differs from the reference")
+
+    print(f"  putpixel reference: {reference_time / len(PLACEHOLDERS) * 1000:8.1f} ms per placeholder")
+    print(f"  NumPy:              {vectorized_time / len(PLACEHOLDERS) * 1000:8.1f} ms per placeholder")
+    print(f"  Speedup:            {reference_time / vectorized_time:8.0f}x")
+    if mismatches:
+        print(f"\n❌ {mismatches} gradients differ")
+        exit(1)
+    print(f"  ✓ All {len(PLACEHOLDERS)} gradients pixel-identical")
+
+def main(argv=None):
+    """Main function; argv defaults to the command line"""
+    parser = argparse.ArgumentParser(description="Generate gradient placeholder images")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="compare the NumPy gradient with the per-pixel reference and exit")
+    parser.add_argument('--catalog', action='store_true',
+                        help=f"make placeholders for every object in {CATALOG_FILE} without an image")
+    parser.add_argument('--workers', type=int, default=None, help="processes for --catalog (default: all cores)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_from_args(args)
+
     print("=" * 70)
     print("Vyoma Placeholder Image Generator")
     print("=" * 70)
+
+    if args.benchmark:
+        benchmark()
+        return
+    
+    if args.catalog:
+        started = time.perf_counter()
+        with stage("catalog placeholders"):
+            mapping, rendered, reused = generate_catalog_placeholders(workers=args.workers)
+        write_json(PLACEHOLDER_MAP_FILE, mapping)
+        print(f"\n📊 Summary:")
+        print(f"  ✓ Objects without an image: {len(mapping)}")
+        print(f"  ✓ Placeholder files:        {rendered + reused} ({rendered} rendered, {reused} cached)")
+        print(f"  ⏱  Time:                     {time.perf_counter() - started:.1f}s")
+        print(f"  📋 Mapping:                  {PLACEHOLDER_MAP_FILE}")
+        print(f"\nRun update_data_with_local_images.py to point the catalog at them.")
+        return
     
     output_dir = Path("app/src/main/assets/images")
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -137,18 +400,22 @@ def main():
     
     generated = 0
     skipped = 0
+    cache = BuildCache()
     
     for obj_id, data in PLACEHOLDERS.items():
         name = data['name']
         colors = data['colors']
         
-        if generate_placeholder(obj_id, name, colors, output_dir=output_dir):
+        with stage("render", object=obj_id):
+            created = generate_placeholder(obj_id, name, colors, output_dir=output_dir, cache=cache)
+        if created:
             print(f"{obj_id:<20s} {name:<20s} {'CREATED':<10s}")
             generated += 1
         else:
             print(f"{obj_id:<20s} {name:<20s} {'SKIP':<10s} (exists)")
             skipped += 1
     
+    cache.save()
     print("-" * 70)
     print(f"\n📊 Summary:")
     print(f"  ✓ Generated: {generated}")
@@ -159,4 +426,5 @@ def main():
         print(f"\nThese will be used as fallbacks until real images are downloaded.")
 
 if __name__ == "__main__":
-    main()
+    with session(TOOL_NAME):
+        main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Shared Imaging Core for Vyoma Tools
+Decoding, resizing and WebP encoding used by every image tool
+
+Large originals are never fully decoded just to be thrown away: JPEGs are
+decoded at a reduced DCT scale (Pillow draft mode) close to the target
+width, and other formats are box-reduced by an integer factor before the
+final LANCZOS pass.
+
+Decoding is bounded by MEMORY_LIMIT_MB. A source whose bitmap would not
+fit is decoded band by band when its pixels are stored uncompressed
+(TIFF, BMP, PPM, as most gigapixel survey originals are) and box-reduced
+as it goes, so the full-resolution bitmap is never held. The reduced
+image remembers the size and factors it came from, and resize_to_width
+samples the same fractional source area Pillow would, so the result is
+identical to resizing the whole decoded image, for any size. Images with
+alpha are the exception: Pillow's resize() skips box reduction for
+them, so a banded decode ends up a few levels off once flattened.
+Anything else that would not fit raises ImageTooLargeError instead of
+exhausting memory.
+"""
+
+import os
+import sys
+import tempfile
+
+try:
+    from PIL import Image, ImageChops
+except ImportError:
+    print("❌ Pillow not installed. Run: pip install Pillow")
+    sys.exit(1)
+
+# Configuration
+MAX_WIDTH = 800
+WEBP_QUALITY = 75
+WEBP_METHOD = 6  # slowest, smallest
+REDUCING_GAP = 2.0  # keep >= 2x the target size before LANCZOS, as Image.thumbnail does
+MEMORY_LIMIT_MB = 1024  # largest bitmap decode_for_width may hold at once
+REDUCED_FROM = 'reduced_from'  # info key of a banded decode: (width, height, factor_x, factor_y)
+
+# The memory ceiling above replaces Pillow's decompression bomb check,
+# which would refuse to even open gigapixel originals
+Image.MAX_IMAGE_PIXELS = None
+
+# Bits per pixel of the raw layouts banded decoding can slice into rows
+RAW_BITS = {
+    '1': 1, 'L': 8, 'P': 8, 'LA': 16, 'I;16': 16, 'I;16B': 16, 'I;16N': 16,
+    'RGB': 24, 'BGR': 24, 'RGBA': 32, 'RGBX': 32, 'BGRA': 32, 'BGRX': 32,
+    'CMYK': 32, 'I;32': 32, 'F;32F': 32, 'F;32BF': 32,
+}
+
+# Premultiplied modes a banded decode of an image with alpha is held in
+UNPREMULTIPLIED = {'RGBa': 'RGBA', 'La': 'LA'}
+
+class ImageTooLargeError(ValueError):
+    """The source cannot be decoded within the memory ceiling"""
+
+def target_size(width, height, max_width):
+    """Size after fitting width into max_width, preserving aspect ratio"""
+    if width <= max_width:
+        return width, height
+    ratio = max_width / width
+    return max_width, max(1, int(height * ratio))
+
+def read_size(input_path):
+    """Image dimensions from the file header, without decoding pixels"""
+    with Image.open(input_path) as img:
+        return img.size
+
+def open_for_width(input_path, max_width=MAX_WIDTH):
+    """
+    Open an image and decode it at the smallest scale that still covers max_width
+
+    JPEGs use draft mode, which makes libjpeg decode at 1/2, 1/4 or 1/8
+    scale directly, cutting decode time and peak memory several-fold.
+    """
+    img = Image.open(input_path)
+    if img.width > max_width:
+        size = target_size(img.width, img.height, max_width)
+        # Draft picks the largest reduction whose result is still >= size
+        img.draft(img.mode, (int(size[0] * REDUCING_GAP), int(size[1] * REDUCING_GAP)))
+    return img
+
+def bitmap_bytes(mode, width, height):
+    """Memory Pillow uses for a bitmap (multi-band 8-bit modes take 4 bytes per pixel)"""
+    if mode in ('1', 'L', 'P'):
+        per_pixel = 1
+    elif mode.startswith('I;16'):
+        per_pixel = 2
+    else:
+        per_pixel = 4
+    return width * height * per_pixel
+
+def reduction_factors(width, height, max_width):
+    """Integer box-reduction factors (x, y) resize(reducing_gap=REDUCING_GAP) would apply"""
+    if width <= max_width:
+        return 1, 1
+    size = target_size(width, height, max_width)
+    return int(width / size[0] / REDUCING_GAP) or 1, int(height / size[1] / REDUCING_GAP) or 1
+
+def _raw_row_tiles(img):
+    """
+    The image's tiles as (extents, offset, rawmode, stride, orientation)
+
+    Returns None unless every tile is stored uncompressed, which is what
+    allows a band of rows to be read at a computed file offset.
+    """
+    tiles = []
+    for tile in img.tile:
+        codec, extents, offset, args = tile[:4]
+        if codec != 'raw':
+            return None
+        if isinstance(args, str):
+            args = (args, 0, 1)
+        rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+        if rawmode not in RAW_BITS:
+            return None
+        if not stride:
+            stride = ((extents[2] - extents[0]) * RAW_BITS[rawmode] + 7) // 8
+        tiles.append((extents, offset, rawmode, stride, orientation or 1))
+    return tiles
+
+def _decode_band(input_path, tiles, top, bottom):
+    """Decode rows [top, bottom) of an uncompressed image"""
+    band = Image.open(input_path)
+    band_tiles = []
+    for (x0, y0, x1, y1), offset, rawmode, stride, orientation in tiles:
+        start, end = max(y0, top), min(y1, bottom, band.height)
+        if start >= end:
+            continue
+        # Rows are stored top-down (orientation 1) or bottom-up (-1)
+        first_row = start - y0 if orientation > 0 else y1 - end
+        band_tiles.append(('raw', (x0, start - top, min(x1, band.width), end - top),
+                           offset + first_row * stride, (rawmode, stride, orientation)))
+    # Pillow has no public region decode; narrowing the size and tile list
+    # of a freshly opened file makes load() read just these rows
+    band._size = (band.width, bottom - top)
+    band.tile = band_tiles
+    band.load()
+    return band
+
+def _decode_banded(input_path, img, tiles, max_width, limit):
+    """Box-reduce an uncompressed image band by band, within limit bytes"""
+    width, height = img.size
+    factor_x, factor_y = reduction_factors(width, height, max_width)
+    # Alpha is reduced premultiplied, as resize() itself does
+    mode = {'P': 'RGBa', '1': 'L', 'RGBA': 'RGBa', 'LA': 'La'}.get(img.mode, img.mode)
+    reduced_size = (-(-width // factor_x), -(-height // factor_y))
+    reduced_bytes = bitmap_bytes(mode, *reduced_size)
+    # Half of what the reduced image leaves is for the band, half for
+    # converting and reducing it
+    row_bytes = bitmap_bytes(mode, width, 1)
+    band_rows = (limit - reduced_bytes) // 2 // row_bytes // factor_y * factor_y
+    if band_rows < factor_y:
+        raise ImageTooLargeError(
+            f"{input_path}: {width}x{height} needs more than the {limit // 2**20} MB memory limit "
+            f"even when decoded {factor_y} rows at a time")
+
+    reduced = Image.new(mode, reduced_size)
+    for top in range(0, height, band_rows):
+        band = _decode_band(input_path, tiles, top, min(top + band_rows, height))
+        if band.mode != mode:
+            band = band.convert(mode)
+        if (factor_x, factor_y) != (1, 1):
+            band = band.reduce((factor_x, factor_y))
+        reduced.paste(band, (0, top // factor_y))
+        band.close()
+    reduced.info[REDUCED_FROM] = (width, height, factor_x, factor_y)
+    return reduced
+
+def decode_for_width(input_path, max_width=MAX_WIDTH, memory_limit_mb=MEMORY_LIMIT_MB):
+    """
+    Decode an image for resizing to max_width, never exceeding the memory limit
+
+    Small images and JPEGs whose draft fits the limit are decoded whole.
+    Oversized uncompressed images are decoded in bands and box-reduced to
+    what resize_to_width would have reduced them to anyway; such an image
+    is premultiplied if it has alpha, and records its source geometry
+    under info[REDUCED_FROM].
+
+    Returns:
+        Image: Loaded image, at most about REDUCING_GAP times max_width wide
+
+    Raises:
+        ImageTooLargeError: The image cannot be decoded within the limit
+    """
+    limit = memory_limit_mb * 2**20
+    img = open_for_width(input_path, max_width)
+    if bitmap_bytes(img.mode, *img.size) <= limit:
+        img.load()
+        return img
+
+    try:
+        tiles = _raw_row_tiles(img)
+        if tiles is None:
+            raise ImageTooLargeError(
+                f"{input_path}: {img.width}x{img.height} {img.format} would decode to "
+                f"{bitmap_bytes(img.mode, *img.size) / 2**20:.0f} MB, over the {memory_limit_mb} MB limit; "
+                f"only uncompressed TIFF/BMP/PPM can be decoded in bands, so convert it to one "
+                f"or raise the limit")
+        return _decode_banded(input_path, img, tiles, max_width, limit)
+    finally:
+        img.close()
+
+def resize_to_width(img, max_width=MAX_WIDTH):
+    """Downscale to max_width with LANCZOS, box-reducing first for big factors"""
+    # A banded decode is sized and sampled by the image it was reduced from
+    width, height, factor_x, factor_y = img.info.get(REDUCED_FROM, img.size + (1, 1))
+    if width <= max_width:
+        return img
+    size = target_size(width, height, max_width)
+    box = (0, 0, width / factor_x, height / factor_y)
+    resized = img.resize(size, Image.LANCZOS, box=box, reducing_gap=REDUCING_GAP)
+    return resized.convert(UNPREMULTIPLIED[resized.mode]) if resized.mode in UNPREMULTIPLIED else resized
+
+def flatten_to_rgb(img):
+    """Convert to a mode WebP handles, compositing transparency onto white"""
+    if img.mode in UNPREMULTIPLIED:
+        img = img.convert(UNPREMULTIPLIED[img.mode])
+    if img.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode == 'P':
+        return img.convert('RGB')
+    if img.mode not in ('RGB', 'L'):
+        return img.convert('RGB')
+    return img
+
+def save_webp(img, output_path, quality=WEBP_QUALITY):
+    """Encode as WebP"""
+    img.save(output_path, 'WEBP', quality=quality, method=WEBP_METHOD)
+
+def convert_to_webp(input_path, output_path, max_width=MAX_WIDTH, quality=WEBP_QUALITY,
+                    memory_limit_mb=MEMORY_LIMIT_MB):
+    """
+    Resize and convert an image to WebP, raising on failure
+
+    Returns:
+        tuple: (original_size_kb, compressed_size_kb)
+    """
+    original_size = os.path.getsize(input_path) / 1024
+    with decode_for_width(input_path, max_width, memory_limit_mb) as img:
+        img = flatten_to_rgb(resize_to_width(img, max_width))
+        save_webp(img, output_path, quality)
+    compressed_size = os.path.getsize(output_path) / 1024
+    return original_size, compressed_size
+
+def compress_and_convert(input_path, output_path, max_width=MAX_WIDTH, quality=WEBP_QUALITY):
+    """
+    Compress and convert image to WebP
+
+    Args:
+        input_path: Source image
+        output_path: Destination WebP file
+        max_width: Maximum width in pixels
+        quality: WebP quality (0-100)
+
+    Returns:
+        tuple: (success, original_size_kb, compressed_size_kb)
+    """
+    try:
+        original_size, compressed_size = convert_to_webp(input_path, output_path, max_width, quality)
+        return True, original_size, compressed_size
+    except Exception as e:
+        return False, 0, 0
+
+def _test_image(mode, size):
+    """Smooth noise in mode, at size"""
+    bands = [Image.effect_noise((60, 40), 80).resize(size, Image.BICUBIC) for _ in Image.new(mode, (1, 1)).getbands()]
+    return Image.merge(mode, bands)
+
+def self_test():
+    """Check banded decodes resize exactly like whole decodes, including sizes the reduction does not divide"""
+    cases = [((4003, 3001), 'RGB', 'tiff', 0), ((3999, 2001), 'L', 'bmp', 0), ((3203, 4007), 'RGB', 'ppm', 0),
+             ((6001, 1003), 'RGB', 'tiff', 0), ((4003, 3001), 'RGBA', 'tiff', 8)]
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size, mode, ext, tolerance in cases:
+            label = f"{size[0]}x{size[1]} {mode} {ext.upper()}"
+            path = os.path.join(tmp, f"source.{ext}")
+            _test_image(mode, size).save(path)
+            # Half the whole bitmap forces the banded path
+            limit_mb = bitmap_bytes(mode, *size) // 2**20 // 2
+            with decode_for_width(path, MAX_WIDTH) as img:
+                whole = flatten_to_rgb(resize_to_width(img, MAX_WIDTH))
+            with decode_for_width(path, MAX_WIDTH, limit_mb) as img:
+                if REDUCED_FROM not in img.info:
+                    problems.append(f"{label}: not decoded in bands under {limit_mb} MB")
+                    continue
+                banded = flatten_to_rgb(resize_to_width(img, MAX_WIDTH))
+            if banded.size != whole.size:
+                problems.append(f"{label}: banded {banded.size} != whole {whole.size}")
+                continue
+            extrema = ImageChops.difference(banded, whole).getextrema()
+            if whole.mode == 'L':
+                extrema = [extrema]
+            worst = max(high for _, high in extrema)
+            if worst > tolerance:
+                problems.append(f"{label}: banded differs from whole by up to {worst} levels")
+    return problems
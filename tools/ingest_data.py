@@ -1,21 +1,28 @@
+import argparse
 import json
 import re
 import os
 import sys
 
-# Paths
-ROOT_DIR = r"c:\Users\chait\Projects\Astronomy"
-DATA_DIR = os.path.join(ROOT_DIR, "Data")
-DATASETS_DIR = os.path.join(DATA_DIR, "datasets", "astronomy_data")
-STARDROID_DIR = os.path.join(DATA_DIR, "stardroid", "tools", "data")
-COMPLETE_DATA_FILE = os.path.join(DATA_DIR, "astronomy_data_complete.json")
-OUTPUT_FILE = os.path.join(ROOT_DIR, "app", "src", "main", "assets", "initial_data.json")
+from canonical_json import write_json
+from instrumentation import session, stage
 
-# Ensure output directory exists
-os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+# Paths: the project root is taken from --root, then $VYOMA_ROOT, then this checkout
+ROOT_DIR = os.environ.get("VYOMA_ROOT") or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def data_paths(root_dir):
+    """Input and output locations under a project root"""
+    data_dir = os.path.join(root_dir, "Data")
+    return {
+        "datasets": os.path.join(data_dir, "datasets", "astronomy_data"),
+        "stardroid": os.path.join(data_dir, "stardroid", "tools", "data"),
+        "complete": os.path.join(data_dir, "astronomy_data_complete.json"),
+        "output": os.path.join(root_dir, "app", "src", "main", "assets", "initial_data.json"),
+    }
 
 class DataIngestion:
-    def __init__(self):
+    def __init__(self, root_dir=ROOT_DIR):
+        self.paths = data_paths(root_dir)
         self.objects = {}  # id -> { ... }
 
     def normalize_id(self, raw_id):
@@ -24,8 +31,8 @@ class DataIngestion:
 
     def process_complete_json(self):
         print("Processing astronomy_data_complete.json...")
-        if not os.path.exists(COMPLETE_DATA_FILE): return
-        with open(COMPLETE_DATA_FILE, 'r', encoding='utf-8') as f:
+        if not os.path.exists(self.paths["complete"]): return
+        with open(self.paths["complete"], 'r', encoding='utf-8') as f:
             data = json.load(f)
             
             # 1. Solar System
@@ -115,7 +122,7 @@ class DataIngestion:
 
     def process_moons_json(self):
         print("Processing moons.json...")
-        path = os.path.join(DATASETS_DIR, "moons.json")
+        path = os.path.join(self.paths["datasets"], "moons.json")
         if not os.path.exists(path): return
         with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
@@ -144,7 +151,7 @@ class DataIngestion:
 
     def process_stars_ascii(self):
         print("Processing stars.ascii...")
-        stars_file = os.path.join(STARDROID_DIR, "stars.ascii")
+        stars_file = os.path.join(self.paths["stardroid"], "stars.ascii")
         if not os.path.exists(stars_file): return
         current_source = {}
         level = 0
@@ -192,7 +199,7 @@ class DataIngestion:
 
     def process_messier_ascii(self):
         print("Processing messier.ascii...")
-        messier_file = os.path.join(STARDROID_DIR, "messier.ascii")
+        messier_file = os.path.join(self.paths["stardroid"], "messier.ascii")
         if not os.path.exists(messier_file): return
         current_source = {}
         level = 0
@@ -247,16 +254,31 @@ class DataIngestion:
             updates["id"] = oid
             self.objects[oid] = updates
 
-    def save(self):
+    def ingest(self):
+        """Run every source in order and return the merged object list"""
+        with stage("astronomy_data_complete.json"):
+            self.process_complete_json()
+        with stage("moons.json"):
+            self.process_moons_json() # Call moons
+        with stage("stars.ascii"):
+            self.process_stars_ascii()
+        with stage("messier.ascii"):
+            self.process_messier_ascii()
+        return list(self.objects.values())
+
+    def save(self, output_file=None):
+        output_file = output_file or self.paths["output"]
         results = list(self.objects.values())
-        print(f"Saving {len(results)} objects to {OUTPUT_FILE}")
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2)
+        print(f"Saving {len(results)} objects to {output_file}")
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        write_json(output_file, results)
 
 if __name__ == "__main__":
-    di = DataIngestion()
-    di.process_complete_json()
-    di.process_moons_json() # Call moons
-    di.process_stars_ascii()
-    di.process_messier_ascii()
-    di.save()
+    parser = argparse.ArgumentParser(description="Build initial_data.json from the raw Data sources")
+    parser.add_argument('--root', default=ROOT_DIR, help=f"project root (default $VYOMA_ROOT or {ROOT_DIR})")
+    args = parser.parse_args()
+
+    with session("ingest_data"):
+        di = DataIngestion(args.root)
+        di.ingest()
+        di.save()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Build Instrumentation for Vyoma Tools
+Per-stage wall/CPU time, memory, file and network I/O, as a Chrome trace
+
+Tools wrap their entry point in session("tool") and their phases in
+stage("phase"). When tracing is on, the outermost session writes a
+Chrome trace-event file (open it in chrome://tracing or
+ui.perfetto.dev) and prints a summary table; when profiling is on, each
+top-level stage of the session's own thread also dumps a cProfile file.
+Stages on worker threads are timed but not profiled: one profiler per
+thread would write a dump per work item, and from Python 3.12 a second
+active profiler fails to start. A profiler that cannot start is skipped
+with a warning.
+
+Turned on by the --trace / --profile / --tracemalloc flags of tools that
+call add_arguments(), or for any tool through the environment:
+  VYOMA_TRACE=trace.json  VYOMA_PROFILE=profiles/  VYOMA_TRACEMALLOC=1
+
+CPU time, peak RSS and I/O are process-wide counters (CPU and RSS
+include finished worker processes), so stages running at the same time
+in different threads also see each other's work. Network bytes are
+counted by the download tools through count_network_bytes().
+"""
+
+import cProfile
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Configuration
+TRACE_ENV = "VYOMA_TRACE"
+PROFILE_ENV = "VYOMA_PROFILE"
+TRACEMALLOC_ENV = "VYOMA_TRACEMALLOC"
+PROC_IO = Path("/proc/self/io")
+MB = 1024 * 1024
+METRICS = ('wall', 'cpu', 'rss_mb', 'py_peak_mb', 'read_mb', 'written_mb', 'network_mb')
+PEAK_METRICS = ('rss_mb', 'py_peak_mb')  # combined with max() rather than summed
+
+_config = {
+    'trace': os.environ.get(TRACE_ENV) or None,
+    'profile': os.environ.get(PROFILE_ENV) or None,
+    'tracemalloc': os.environ.get(TRACEMALLOC_ENV, '') not in ('', '0'),
+}
+_lock = threading.Lock()
+_local = threading.local()
+_events = []  # finished stages of the current session, as dicts
+_sessions = 0  # nesting depth of session()
+_session_root = None  # id of the outermost session's stage
+_session_thread = None  # thread of the outermost session, the only one profiled
+_ids = itertools.count(1)
+_open_frames = {}  # id -> frame of every running stage, on any thread
+_owns_tracemalloc = False  # started by this module, so stopped with the session
+_origin = time.perf_counter()
+_network_bytes = 0
+_profile_names = set()
+
+def configure(trace=None, profile=None, tracemalloc_enabled=None):
+    """Turn instrumentation on; arguments left as None keep their setting"""
+    if trace is not None:
+        _config['trace'] = trace
+    if profile is not None:
+        _config['profile'] = profile
+    if tracemalloc_enabled is not None:
+        _config['tracemalloc'] = tracemalloc_enabled
+    # Tools parse their flags inside their session, which is already running
+    if _sessions:
+        _start_tracemalloc()
+
+def _start_tracemalloc():
+    """Start tracemalloc for the session if asked to and nobody else has"""
+    global _owns_tracemalloc
+    if _config['tracemalloc'] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _owns_tracemalloc = True
+
+def add_arguments(parser):
+    """Add --trace, --profile and --tracemalloc to a tool's argument parser"""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--trace', metavar='FILE', help=f"write a Chrome trace and print stage timings (or ${TRACE_ENV})")
+    group.add_argument('--profile', metavar='DIR', help=f"write a cProfile dump per stage into DIR (or ${PROFILE_ENV})")
+    group.add_argument('--tracemalloc', action='store_true',
+                       help=f"also record peak Python heap per stage; slows the run (or ${TRACEMALLOC_ENV}=1)")
+
+def configure_from_args(args):
+    """Apply the flags added by add_arguments"""
+    configure(args.trace, args.profile, args.tracemalloc or None)
+
+def count_network_bytes(count):
+    """Record bytes received from the network"""
+    global _network_bytes
+    with _lock:
+        _network_bytes += count
+
+def _io_bytes():
+    """(read, written) bytes of this process's I/O system calls, or (None, None)"""
+    try:
+        with open(PROC_IO, 'r') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def _cpu_seconds():
+    """CPU time of this process plus its finished children"""
+    seconds = time.process_time()
+    if resource:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        seconds += children.ru_utime + children.ru_stime
+    return seconds
+
+def _peak_rss_mb():
+    """Largest resident set of this process or any finished child, in MB"""
+    if not resource:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / MB if sys.platform == 'darwin' else peak / 1024
+
+def _bank_py_peak(peak):
+    """Raise the recorded Python heap peak of every running stage to peak"""
+    with _lock:
+        for frame in _open_frames.values():
+            frame['py_peak'] = max(frame['py_peak'], peak)
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+def _profile_path(name):
+    """Unused file name for a stage's cProfile dump"""
+    base = re.sub(r'[^A-Za-z0-9_.-]+', '_', name) or 'stage'
+    with _lock:
+        candidate, n = base, 1
+        while candidate in _profile_names:
+            n += 1
+            candidate = f"{base}_{n}"
+        _profile_names.add(candidate)
+    return Path(_config['profile']) / f"{candidate}.prof"
+
+def stage(name, **args):
+    """
+    Measure a block as one stage; nests, and may be used from any thread
+
+    Keyword arguments are attached to the trace event, so per-item stages
+    can share a name (and one summary row) and still be told apart.
+    """
+    return _measure(name, args, next(_ids))
+
+@contextmanager
+def _measure(name, args, stage_id, profile=True):
+    stack = _stack()
+    # Stages started on a worker thread belong to the session's stage
+    parent = stack[-1]['id'] if stack else _session_root
+    frame = {'id': stage_id, 'py_peak': 0}
+    if tracemalloc.is_tracing():
+        # One peak counter is shared by all stages: bank the running stages' peak before resetting it
+        _bank_py_peak(tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    profiler = None
+    profiled_thread = _session_thread or threading.main_thread().ident
+    if (profile and _config['profile'] and threading.get_ident() == profiled_thread
+            and not any(f.get('profiler') for f in stack)):
+        profiler = frame['profiler'] = cProfile.Profile()
+    stack.append(frame)
+    with _lock:
+        _open_frames[stage_id] = frame
+
+    read, written = _io_bytes()
+    network = _network_bytes
+    cpu = _cpu_seconds()
+    started = time.perf_counter()
+    try:
+        if profiler:
+            try:
+                profiler.enable()
+            except ValueError as e:  # another profiling tool is active (Python 3.12+)
+                print(f"⚠️  Not profiling stage {name}: {e}", file=sys.stderr)
+                profiler = frame['profiler'] = None
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        wall = time.perf_counter() - started
+        cpu = _cpu_seconds() - cpu
+        end_read, end_written = _io_bytes()
+        stack.pop()
+
+        if tracemalloc.is_tracing():
+            _bank_py_peak(tracemalloc.get_traced_memory()[1])
+            py_peak_mb = frame['py_peak'] / MB
+        else:
+            py_peak_mb = None
+
+        with _lock:
+            del _open_frames[stage_id]
+
+        if profiler:
+            path = _profile_path(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(path)
+
+        if _sessions:
+            event = {
+                'name': name,
+                'id': stage_id,
+                'parent': parent if parent != stage_id else None,
+                'args': args,
+                'start': started - _origin,
+                'wall': wall,
+                'cpu': cpu,
+                'rss_mb': _peak_rss_mb(),
+                'py_peak_mb': py_peak_mb,
+                'read_mb': (end_read - read) / MB if read is not None else None,
+                'written_mb': (end_written - written) / MB if written is not None else None,
+                'network_mb': (_network_bytes - network) / MB,
+                'thread': threading.current_thread().name,
+                'tid': threading.get_ident(),
+            }
+            with _lock:
+                _events.append(event)
+
+@contextmanager
+def session(name):
+    """
+    Top-level stage of a tool run
+
+    The outermost session writes the trace and summary on exit; a session
+    opened inside another (a tool run by setup_all_images.py) is just a
+    stage of the outer one.
+    """
+    global _sessions, _session_root, _session_thread, _owns_tracemalloc
+    with _lock:
+        outer = _sessions > 0
+        _sessions += 1
+    if outer:
+        try:
+            with stage(name):
+                yield
+        finally:
+            with _lock:
+                _sessions -= 1
+        return
+
+    with _lock:
+        _events.clear()
+        _profile_names.clear()
+        _session_root = next(_ids)
+        _session_thread = threading.get_ident()
+    _start_tracemalloc()
+    try:
+        # Never profiled itself, so its top-level stages each get a dump
+        with _measure(name, {}, _session_root, profile=False):
+            yield
+    finally:
+        with _lock:
+            _sessions -= 1
+            _session_root = None
+            _session_thread = None
+        if _owns_tracemalloc:
+            tracemalloc.stop()
+            _owns_tracemalloc = False
+        if _config['trace']:
+            write_trace(_config['trace'])
+            print_summary()
+        if _config['profile']:
+            print(f"\n🔬 cProfile dumps in {_config['profile']} (view with: python -m pstats FILE)")
+
+def trace_events():
+    """Finished stages as Chrome trace events, in start order"""
+    pid = os.getpid()
+    with _lock:
+        events = sorted(_events, key=lambda e: e['start'])
+    trace = []
+    for tid, thread in {e['tid']: e['thread'] for e in events}.items():
+        trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}})
+    for e in events:
+        args = {key: round(e[key], 3) for key in METRICS if e[key] is not None}
+        args.update(e['args'])
+        trace.append({
+            'name': e['name'],
+            'cat': 'stage',
+            'ph': 'X',
+            'ts': round(e['start'] * 1e6),
+            'dur': round(e['wall'] * 1e6),
+            'pid': pid,
+            'tid': e['tid'],
+            'args': args,
+        })
+    return trace
+
+def write_trace(path):
+    """Write the session's stages as a Chrome trace-event JSON file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': trace_events(), 'displayTimeUnit': 'ms'}, f, indent=1)
+
+def _summary_rows(events):
+    """
+    (depth, label, metrics) rows of the stage tree, depth first
+
+    Sibling stages with the same name (one per object, say) are folded
+    into one row with a count; their children are folded in turn.
+    """
+    children = {}
+    for e in sorted(events, key=lambda e: e['start']):
+        children.setdefault(e['parent'], []).append(e)
+
+    rows = []
+    def visit(group, depth):
+        by_name = {}
+        for e in group:
+            by_name.setdefault(e['name'], []).append(e)
+        for name, same in by_name.items():
+            metrics = {}
+            for key in METRICS:
+                values = [e[key] for e in same if e[key] is not None]
+                metrics[key] = (max(values) if key in PEAK_METRICS else sum(values)) if values else None
+            label = name if len(same) == 1 else f"{name} ×{len(same)}"
+            rows.append((depth, label, metrics))
+            visit([c for e in same for c in children.get(e['id'], [])], depth + 1)
+    visit(children.get(None, []), 0)
+    return rows
+
+def print_summary():
+    """Print the stage tree, one row per stage name under each parent"""
+    with _lock:
+        events = list(_events)
+
+    def cell(value, width, digits=1):
+        return f"{'-':>{width}s}" if value is None else f"{value:>{width}.{digits}f}"
+
+    print("\n" + "=" * 100)
+    print("⏱️  Stage Timings")
+    print("=" * 100)
+    print(f"{'Stage':<34s} {'Wall s':>8s} {'CPU s':>8s} {'RSS MB':>8s} {'Py MB':>8s} "
+          f"{'Read MB':>9s} {'Write MB':>9s} {'Net MB':>8s}")
+    print("-" * 100)
+    for depth, label, m in _summary_rows(events):
+        label = ("  " * depth + label)[:34]
+        print(f"{label:<34s} {cell(m['wall'], 8, 2)} {cell(m['cpu'], 8, 2)} {cell(m['rss_mb'], 8)} "
+              f"{cell(m['py_peak_mb'], 8)} {cell(m['read_mb'], 9)} {cell(m['written_mb'], 9)} "
+              f"{cell(m['network_mb'], 8)}")
+    print("-" * 100)
+    print("Wall and CPU of folded rows (×N) are summed; stages on other threads overlap their parent")
+    if _config['trace']:
+        print(f"📋 Trace: {_config['trace']} (open in chrome://tracing or ui.perfetto.dev)")
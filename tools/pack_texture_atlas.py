@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Texture Atlas Packer for Vyoma
+Packs the small UI and sky-map sprites into a few power-of-two atlases
+
+The images directory holds dozens of tiny PNGs (moon phases, playback
+buttons, category icons, planet markers), each a separate asset open and
+texture bind. This tool packs them with MaxRects (best short side fit)
+into as few power-of-two PNG atlases as fit ATLAS_MAX_SIZE, and writes
+sprite_atlas.json with each sprite's pixel rectangle and UV coordinates.
+
+Each sprite is surrounded by PADDING pixels copied from its own edges, so
+bilinear filtering at the sprite border never samples a neighbour.
+Atlases are lossless RGBA PNG and every run checks that each sprite
+comes back pixel-exact; --verify repeats that check on the files on disk.
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    print("❌ Pillow not installed. Run: pip install Pillow")
+    sys.exit(1)
+
+from canonical_json import write_json
+from instrumentation import add_arguments, configure_from_args, session, stage
+
+# Configuration
+ASSETS_DIR = Path("app/src/main/assets")
+INPUT_DIR = ASSETS_DIR / "images"
+ATLAS_DIR = INPUT_DIR / "atlas"
+ATLAS_NAME = "sprites"
+MANIFEST_FILE = ASSETS_DIR / "sprite_atlas.json"
+MAX_SPRITE_SIZE = 128   # larger images are pictures, not sprites
+ATLAS_MAX_SIZE = 1024   # safe texture size on every supported GPU
+PADDING = 1             # edge pixels extruded around each sprite
+
+class MaxRectsBin:
+    """One atlas page, tracking the maximal free rectangles left in it"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+
+    def insert(self, width, height):
+        """
+        Place a width x height rectangle
+
+        Returns:
+            tuple: (x, y), or None if it does not fit
+        """
+        best = None
+        for fx, fy, fw, fh in self.free:
+            if width <= fw and height <= fh:
+                leftover = sorted((fw - width, fh - height))
+                score = (leftover[0], leftover[1], fy, fx)
+                if best is None or score < best:
+                    best = score
+        if best is None:
+            return None
+        x, y = best[3], best[2]
+        self._split((x, y, width, height))
+        return x, y
+
+    def _split(self, used):
+        ux, uy, uw, uh = used
+        free = []
+        for fx, fy, fw, fh in self.free:
+            if ux >= fx + fw or ux + uw <= fx or uy >= fy + fh or uy + uh <= fy:
+                free.append((fx, fy, fw, fh))
+                continue
+            # Keep the parts of the free rectangle on each side of the used one
+            if ux > fx:
+                free.append((fx, fy, ux - fx, fh))
+            if ux + uw < fx + fw:
+                free.append((ux + uw, fy, fx + fw - ux - uw, fh))
+            if uy > fy:
+                free.append((fx, fy, fw, uy - fy))
+            if uy + uh < fy + fh:
+                free.append((fx, uy + uh, fw, fy + fh - uy - uh))
+        self.free = [r for i, r in enumerate(free) if not any(
+            i != j and _contains(other, r) and (other != r or j < i)
+            for j, other in enumerate(free))]
+
+def _contains(outer, inner):
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+def next_power_of_two(n):
+    return 1 << max(0, math.ceil(math.log2(max(1, n))))
+
+def candidate_sizes(cells, max_size):
+    """Power-of-two page sizes that could hold all cells, smallest first"""
+    area = sum(w * h for w, h in cells)
+    min_width = next_power_of_two(max(w for w, _ in cells))
+    min_height = next_power_of_two(max(h for _, h in cells))
+    sizes = []
+    width = min_width
+    while width <= max_size:
+        height = min_height
+        while height <= max_size:
+            if width * height >= area:
+                sizes.append((width, height))
+            height *= 2
+        width *= 2
+    return sorted(sizes, key=lambda s: (s[0] * s[1], abs(s[0] - s[1]), s[1]))
+
+def try_pack(cells, width, height):
+    """Positions for all cells on one page, or None"""
+    page = MaxRectsBin(width, height)
+    positions = []
+    for w, h in cells:
+        position = page.insert(w, h)
+        if position is None:
+            return None
+        positions.append(position)
+    return positions
+
+def pack(cells, max_size=ATLAS_MAX_SIZE):
+    """
+    Pack cells onto as few power-of-two pages as possible
+
+    Args:
+        cells: List of (width, height), already including padding
+
+    Returns:
+        tuple: (pages, placements) where pages is a list of (width, height)
+            and placements[i] is (page, x, y) for cells[i]
+    """
+    order = sorted(range(len(cells)), key=lambda i: (-max(cells[i]), -cells[i][0] * cells[i][1], i))
+    placements = [None] * len(cells)
+    pages = []
+    remaining = order
+    while remaining:
+        remaining_cells = [cells[i] for i in remaining]
+        for width, height in candidate_sizes(remaining_cells, max_size):
+            positions = try_pack(remaining_cells, width, height)
+            if positions is not None:
+                for i, (x, y) in zip(remaining, positions):
+                    placements[i] = (len(pages), x, y)
+                pages.append((width, height))
+                remaining = []
+                break
+        else:
+            # Does not fit on one page: fill a full-size page and carry on
+            page = MaxRectsBin(max_size, max_size)
+            left_over = []
+            for i in remaining:
+                position = page.insert(*cells[i])
+                if position is None:
+                    left_over.append(i)
+                else:
+                    placements[i] = (len(pages), *position)
+            if len(left_over) == len(remaining):
+                raise ValueError(f"Sprite cell {cells[remaining[0]]} exceeds {max_size}px atlas")
+            pages.append((max_size, max_size))
+            remaining = left_over
+    return pages, placements
+
+def paste_extruded(atlas, sprite, x, y, padding=PADDING):
+    """Paste a sprite at (x, y) and repeat its edge pixels into the padding"""
+    w, h = sprite.size
+    atlas.paste(sprite, (x, y))
+    for i in range(1, padding + 1):
+        atlas.paste(sprite.crop((0, 0, w, 1)), (x, y - i))
+        atlas.paste(sprite.crop((0, h - 1, w, h)), (x, y + h - 1 + i))
+    # Columns last, from the already extruded rows, so corners are filled too
+    for i in range(1, padding + 1):
+        atlas.paste(atlas.crop((x, y - padding, x + 1, y + h + padding)), (x - i, y - padding))
+        atlas.paste(atlas.crop((x + w - 1, y - padding, x + w, y + h + padding)), (x + w - 1 + i, y - padding))
+
+def find_sprites(input_dir, max_sprite_size=MAX_SPRITE_SIZE):
+    """PNG files in input_dir no larger than max_sprite_size on either side"""
+    sprites = []
+    for path in sorted(input_dir.glob('*.png')):
+        with Image.open(path) as img:
+            if max(img.size) <= max_sprite_size:
+                sprites.append(path)
+    return sprites
+
+def build_atlases(sprite_paths, atlas_dir=ATLAS_DIR, max_size=ATLAS_MAX_SIZE, padding=PADDING):
+    """
+    Pack sprites into atlases and write them as PNG
+
+    Returns:
+        dict: Manifest with the atlas pages and each sprite's rectangle and UVs
+    """
+    sprites = []
+    for path in sprite_paths:
+        with Image.open(path) as img:
+            sprites.append(img.convert('RGBA'))
+    cells = [(s.width + 2 * padding, s.height + 2 * padding) for s in sprites]
+    pages, placements = pack(cells, max_size)
+
+    atlas_dir.mkdir(parents=True, exist_ok=True)
+    images = [Image.new('RGBA', size, (0, 0, 0, 0)) for size in pages]
+    files = [atlas_dir / f"{ATLAS_NAME}_{index}.png" for index in range(len(pages))]
+    manifest = {"padding": padding, "atlases": [], "sprites": {}}
+    for file, (width, height) in zip(files, pages):
+        manifest["atlases"].append({
+            "file": asset_path(file),
+            "width": width,
+            "height": height,
+        })
+
+    for path, sprite, (page, cx, cy) in zip(sprite_paths, sprites, placements):
+        x, y = cx + padding, cy + padding
+        paste_extruded(images[page], sprite, x, y, padding)
+        width, height = pages[page]
+        manifest["sprites"][path.name] = {
+            "atlas": page,
+            "x": x,
+            "y": y,
+            "width": sprite.width,
+            "height": sprite.height,
+            "u0": x / width,
+            "v0": y / height,
+            "u1": (x + sprite.width) / width,
+            "v1": (y + sprite.height) / height,
+        }
+
+    for image, file in zip(images, files):
+        image.save(file, 'PNG', optimize=True)
+    # Pages left over from a previous run that needed more of them
+    for stale in set(atlas_dir.glob(f"{ATLAS_NAME}_*.png")) - set(files):
+        stale.unlink()
+    return manifest
+
+def asset_path(path):
+    """Path as the app's AssetManager sees it, e.g. images/atlas/sprites_0.png"""
+    try:
+        return path.relative_to(ASSETS_DIR).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+def resolve_asset(path):
+    """Inverse of asset_path"""
+    path = Path(path)
+    return path if path.is_absolute() or path.exists() else ASSETS_DIR / path
+
+def verify_atlases(manifest, input_dir=INPUT_DIR):
+    """
+    Check every sprite round-trips pixel-exact from the atlas files on disk
+
+    Also checks that sprites, with their padding, stay inside their page
+    and never overlap. Sprites whose source file is gone are only
+    checked for placement.
+
+    Returns:
+        list: Problems found (empty if the atlases are correct)
+    """
+    problems = []
+    pages = [Image.open(resolve_asset(a["file"])).convert('RGBA') for a in manifest["atlases"]]
+    padding = manifest["padding"]
+    boxes = []
+    for name, entry in sorted(manifest["sprites"].items()):
+        page = pages[entry["atlas"]]
+        box = (entry["x"], entry["y"], entry["x"] + entry["width"], entry["y"] + entry["height"])
+        cell = (box[0] - padding, box[1] - padding, box[2] + padding, box[3] + padding)
+        if cell[0] < 0 or cell[1] < 0 or cell[2] > page.width or cell[3] > page.height:
+            problems.append(f"{name}: outside atlas {entry['atlas']}")
+            continue
+        for other_name, other_page, other in boxes:
+            if other_page == entry["atlas"] and not (
+                    cell[2] <= other[0] or other[2] <= cell[0] or cell[3] <= other[1] or other[3] <= cell[1]):
+                problems.append(f"{name}: overlaps {other_name}")
+        boxes.append((name, entry["atlas"], cell))
+
+        source_path = input_dir / name
+        if not source_path.exists():
+            continue
+        with Image.open(source_path) as source:
+            expected = source.convert('RGBA')
+        if expected.size != (entry["width"], entry["height"]):
+            problems.append(f"{name}: size changed to {expected.size}")
+        elif page.crop(box).tobytes() != expected.tobytes():
+            problems.append(f"{name}: pixels differ")
+    return problems
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Pack small sprites into power-of-two texture atlases")
+    parser.add_argument('--input', type=Path, default=INPUT_DIR, help=f"sprite directory (default {INPUT_DIR})")
+    parser.add_argument('--max-sprite', type=int, default=MAX_SPRITE_SIZE,
+                        help=f"largest sprite side to pack (default {MAX_SPRITE_SIZE})")
+    parser.add_argument('--max-size', type=int, default=ATLAS_MAX_SIZE,
+                        help=f"largest atlas side, a power of two (default {ATLAS_MAX_SIZE})")
+    parser.add_argument('--verify', action='store_true', help="only check the existing atlases against the sprites")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    print("=" * 70)
+    print("🧩 Vyoma Texture Atlas Packer")
+    print("=" * 70)
+
+    if args.verify:
+        if not MANIFEST_FILE.exists():
+            print(f"\n❌ No atlas manifest at {MANIFEST_FILE}")
+            sys.exit(1)
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    else:
+        sprite_paths = find_sprites(args.input, args.max_sprite)
+        if not sprite_paths:
+            print(f"\n❌ No sprites up to {args.max_sprite}px found in {args.input}")
+            return
+        print(f"\n📂 Packing {len(sprite_paths)} sprites from {args.input}")
+        with stage("pack"):
+            manifest = build_atlases(sprite_paths, max_size=args.max_size)
+        write_json(MANIFEST_FILE, manifest)
+
+        print(f"\n{'Atlas':<36s} {'Size':>11s} {'Sprites':>8s} {'Fill':>6s}")
+        print("-" * 70)
+        for index, atlas in enumerate(manifest["atlases"]):
+            entries = [e for e in manifest["sprites"].values() if e["atlas"] == index]
+            used = sum(e["width"] * e["height"] for e in entries)
+            fill = used / (atlas["width"] * atlas["height"]) * 100
+            print(f"{atlas['file']:<36s} {atlas['width']:>5d}x{atlas['height']:<5d} {len(entries):>8d} {fill:>5.1f}%")
+
+    with stage("verify"):
+        problems = verify_atlases(manifest, args.input)
+    print(f"\n🔍 Round trip: {len(manifest['sprites'])} sprites checked")
+    for problem in problems:
+        print(f"  ✗ {problem}")
+    if problems:
+        print(f"\n❌ {len(problems)} problems found")
+        sys.exit(1)
+    print("  ✓ Every sprite matches its source pixel for pixel")
+
+    print(f"\n📊 Summary:")
+    print(f"  ✓ {len(manifest['sprites'])} sprite files → {len(manifest['atlases'])} atlas textures")
+    print(f"  📋 Manifest: {MANIFEST_FILE}")
+
+if __name__ == "__main__":
+    with session("pack_texture_atlas"):
+        main()
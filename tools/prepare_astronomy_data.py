@@ -8,6 +8,8 @@ import json
 import os
 from pathlib import Path
 
+from instrumentation import session
+
 # Coordinate data for major objects (RA in degrees, Dec in degrees)
 COORDINATES = {
     # Planets - approximate current positions (will need ephemeris for accuracy)
@@ -204,4 +206,5 @@ def main():
         print(f"  {cat}: {count} objects")
 
 if __name__ == "__main__":
-    main()
+    with session("prepare_astronomy_data"):
+        main()
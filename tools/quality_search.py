@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Size- and Quality-Targeted WebP Encoding for Vyoma
+Searches the WebP quality per image instead of using one fixed setting
+
+Two kinds of target are supported:
+- a byte budget: the highest quality whose output fits the budget
+- a fidelity floor (SSIM or PSNR against the resized source): the lowest
+  quality that still meets it
+
+Smooth nebula images reach the floor at low quality and shrink a lot,
+while detailed planet images keep the quality they need. Each search
+round encodes several candidate qualities in parallel threads (Pillow
+releases the GIL while encoding), and the metrics are vectorized NumPy.
+Under compress_batch's process pool each process gets only its share of
+the cores for these threads, and with one core or fewer it searches
+serially.
+"""
+
+import contextlib
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ NumPy not installed. Run: pip install numpy")
+    sys.exit(1)
+
+from imaging import (MAX_WIDTH, MEMORY_LIMIT_MB, WEBP_METHOD, Image, decode_for_width, flatten_to_rgb,
+                     resize_to_width)
+
+# Configuration
+QUALITY_MIN = 20
+QUALITY_MAX = 95
+SEARCH_WORKERS = 4  # candidate encodes per search round, at most
+SSIM_WINDOW = 8
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+def to_luma(img):
+    """Image as a float64 luma array"""
+    return np.asarray(img.convert('L'), dtype=np.float64)
+
+def box_mean(x, window):
+    """Mean over every window x window block, via a summed-area table"""
+    table = np.pad(x, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    sums = (table[window:, window:] - table[:-window, window:]
+            - table[window:, :-window] + table[:-window, :-window])
+    return sums / (window * window)
+
+def ssim(reference, candidate, window=SSIM_WINDOW):
+    """Mean structural similarity of two equally sized luma arrays"""
+    window = max(1, min(window, *reference.shape))
+    mu_a = box_mean(reference, window)
+    mu_b = box_mean(candidate, window)
+    var_a = box_mean(reference * reference, window) - mu_a * mu_a
+    var_b = box_mean(candidate * candidate, window) - mu_b * mu_b
+    cov = box_mean(reference * candidate, window) - mu_a * mu_b
+    numerator = (2 * mu_a * mu_b + SSIM_C1) * (2 * cov + SSIM_C2)
+    denominator = (mu_a * mu_a + mu_b * mu_b + SSIM_C1) * (var_a + var_b + SSIM_C2)
+    return float(np.mean(numerator / denominator))
+
+def psnr(reference, candidate):
+    """Peak signal-to-noise ratio in dB of two equally sized arrays"""
+    mse = np.mean((reference - candidate) ** 2)
+    if mse == 0:
+        return float('inf')
+    return float(10 * np.log10(255.0 ** 2 / mse))
+
+def encode_webp(img, quality):
+    """Encode to WebP in memory, safe to call from several threads at once"""
+    buffer = io.BytesIO()
+    # Image.save keeps its options on the image, so concurrent saves of the
+    # same object would race; a copy per encode keeps them apart
+    img.copy().save(buffer, 'WEBP', quality=quality, method=WEBP_METHOD)
+    return buffer.getvalue()
+
+def search_workers(processes=1):
+    """Search threads per process when `processes` encoders share the machine"""
+    return max(1, min(SEARCH_WORKERS, (os.cpu_count() or 1) // max(1, processes)))
+
+def first_passing(lo, hi, passes, workers=SEARCH_WORKERS):
+    """
+    Smallest quality in [lo, hi] for which passes(quality) holds
+
+    passes must be monotone (False ... False True ... True). Each round
+    evaluates up to `workers` evenly spaced qualities concurrently and
+    keeps the sub-interval where the answer lies, so the search takes
+    log base (workers + 1) rounds instead of log base 2. With one
+    worker it is a plain binary search on the calling thread.
+
+    Returns:
+        int: The quality, or hi + 1 if none passes
+    """
+    answer = hi + 1
+    workers = max(1, workers)
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    evaluate = pool.map if pool else map
+    with pool or contextlib.nullcontext():
+        while lo <= hi:
+            span = hi - lo + 1
+            count = min(workers, span)
+            probes = sorted({lo + (span * (i + 1)) // (count + 1) for i in range(count)})
+            next_lo, next_hi = lo, hi
+            for quality, ok in zip(probes, evaluate(passes, probes)):
+                if ok:
+                    answer = quality
+                    next_hi = quality - 1
+                    break
+                next_lo = quality + 1
+            lo, hi = next_lo, next_hi
+    return answer
+
+def search_quality(img, max_bytes=None, min_ssim=None, min_psnr=None,
+                   lo=QUALITY_MIN, hi=QUALITY_MAX, workers=SEARCH_WORKERS):
+    """
+    Pick a WebP quality for an already resized image
+
+    With a fidelity floor, returns the lowest quality meeting it; with a
+    byte budget, the highest quality that fits. With both, the floor is
+    met if it fits the budget, otherwise the budget wins.
+
+    Returns:
+        tuple: (quality, encoded_bytes)
+    """
+    img = flatten_to_rgb(img)
+    cache = {}
+
+    def encoded(quality):
+        if quality not in cache:
+            cache[quality] = encode_webp(img, quality)
+        return cache[quality]
+
+    quality = hi
+    if min_ssim is not None or min_psnr is not None:
+        reference = np.asarray(img.convert('RGB'), dtype=np.float64)
+        reference_luma = to_luma(img)
+
+        def meets_floor(q):
+            with Image.open(io.BytesIO(encoded(q))) as decoded:
+                if min_ssim is not None and ssim(reference_luma, to_luma(decoded)) < min_ssim:
+                    return False
+                if min_psnr is not None:
+                    candidate = np.asarray(decoded.convert('RGB'), dtype=np.float64)
+                    if psnr(reference, candidate) < min_psnr:
+                        return False
+            return True
+
+        quality = min(first_passing(lo, hi, meets_floor, workers), hi)
+
+    if max_bytes is not None and len(encoded(quality)) > max_bytes:
+        over_budget = first_passing(lo, quality, lambda q: len(encoded(q)) > max_bytes, workers)
+        quality = max(lo, over_budget - 1)
+
+    return quality, encoded(quality)
+
+def convert_to_webp_targeted(input_path, output_path, max_width=MAX_WIDTH, max_bytes=None, min_ssim=None,
+                             min_psnr=None, memory_limit_mb=MEMORY_LIMIT_MB, workers=None):
+    """
+    Resize and convert an image to WebP at a searched quality, raising on failure
+
+    workers is the number of search threads (default: search_workers()).
+
+    Returns:
+        tuple: (original_size_kb, compressed_size_kb, quality)
+    """
+    original_size = os.path.getsize(input_path) / 1024
+    with decode_for_width(input_path, max_width, memory_limit_mb) as img:
+        img = resize_to_width(img, max_width)
+        quality, data = search_quality(img, max_bytes, min_ssim, min_psnr,
+                                       workers=workers or search_workers())
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return original_size, len(data) / 1024, quality
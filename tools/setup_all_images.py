@@ -1,106 +1,356 @@
 #!/usr/bin/env python3
 """
 Master Script: Complete Image Setup for Vyoma
-Runs all image preparation steps in sequence
+Runs all image preparation steps as a dependency graph, in one process
+
+Each stage declares the files it reads and writes. A stage is skipped
+when the content hashes of its inputs match the last successful run and
+the outputs that run left behind still exist, so a rerun with nothing changed finishes almost
+immediately. Stages whose dependencies are done run in parallel threads,
+and every tool is imported lazily in this interpreter, so Pillow and
+NumPy are only loaded when a stage actually runs.
 """
 
-import subprocess
+import argparse
+import ast
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
-def run_script(script_name, description):
-    """Run a Python script and report results"""
-    print("\n" + "=" * 70)
-    print(f"📋 {description}")
-    print("=" * 70)
-    
-    try:
-        result = subprocess.run(
-            [sys.executable, script_name],
-            capture_output=False,
-            text=True
-        )
-        
-        if result.returncode == 0:
-            print(f"✅ {description} - SUCCESS")
-            return True
+from build_cache import hash_file
+from instrumentation import add_arguments, configure_from_args, session, stage as stage_timer
+
+# Configuration
+ASSETS = "app/src/main/assets"
+IMAGES = f"{ASSETS}/images"
+STAMP_FILE = Path("Data/setup_stamps.json")
+TOOLS_DIR = Path(__file__).resolve().parent
+DEFAULT_JOBS = 4
+
+class Stage:
+    """One step of the pipeline"""
+
+    def __init__(self, name, description, module, inputs, outputs=(), after=(), args=()):
+        self.name = name
+        self.description = description
+        self.module = module    # tool whose main() runs the stage
+        self.args = args        # command line passed to that main()
+        self.inputs = inputs    # glob patterns of files read
+        self.outputs = outputs  # glob patterns of files written
+        self.after = after      # stages that must finish first
+
+    def run(self):
+        # Imported here so that skipped stages never load their tool
+        tool = __import__(self.module)
+        if self.args:
+            tool.main(list(self.args))
         else:
-            print(f"⚠️  {description} - COMPLETED WITH WARNINGS")
-            return True
-    except Exception as e:
-        print(f"❌ {description} - FAILED: {e}")
-        return False
+            tool.main()
+
+def local_imports(module):
+    """Tool modules imported anywhere in a tool's source, lazy imports included"""
+    tree = ast.parse((TOOLS_DIR / f"{module}.py").read_text(encoding='utf-8'))
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+        elif isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+    return {name for name in names if (TOOLS_DIR / f"{name}.py").exists()}
+
+def tool_inputs(*modules):
+    """Source files of tools and of every tool module they import, so editing any of them reruns the stage"""
+    seen = set()
+    todo = list(modules)
+    while todo:
+        module = todo.pop()
+        if module not in seen:
+            seen.add(module)
+            todo.extend(local_imports(module))
+    return [f"tools/{module}.py" for module in sorted(seen)]
+
+STAGES = [
+    Stage("download", "Download & Compress Images", "download_and_prepare_images",
+          inputs=["Data/astronomy_data/*.json", *tool_inputs("download_and_prepare_images")],
+          outputs=[f"{IMAGES}/*.webp"]),
+    Stage("placeholders", "Generate Placeholder Images", "generate_placeholder_images",
+          inputs=tool_inputs("generate_placeholder_images"),
+          outputs=[f"{IMAGES}/*.webp"],
+          after=["download"]),
+    Stage("catalog_placeholders", "Generate Catalog Placeholders", "generate_placeholder_images",
+          inputs=[f"{ASSETS}/initial_data.json", f"{ASSETS}/astronomy_objects.json", f"{IMAGES}/*.webp",
+                  *tool_inputs("generate_placeholder_images")],
+          outputs=[f"{ASSETS}/placeholder_images.json", f"{IMAGES}/placeholders/*.webp"],
+          after=["placeholders"], args=["--catalog"]),
+    Stage("update_data", "Update Data with Local Paths", "update_data_with_local_images",
+          inputs=[f"{IMAGES}/*.webp", f"{ASSETS}/initial_data.json", f"{ASSETS}/placeholder_images.json",
+                  *tool_inputs("update_data_with_local_images")],
+          outputs=[f"{ASSETS}/initial_data.json"],
+          after=["catalog_placeholders"]),
+    Stage("manifest", "Write Image Manifest", "generate_image_manifest",
+          inputs=[f"{IMAGES}/*.webp", f"{IMAGES}/*.png", f"{IMAGES}/*.jpg", f"{IMAGES}/placeholders/*.webp",
+                  *tool_inputs("generate_image_manifest")],
+          outputs=[f"{ASSETS}/image_manifest.json"],
+          after=["catalog_placeholders"]),
+    Stage("derivatives", "Generate Image Derivatives", "generate_image_derivatives",
+          inputs=[f"{IMAGES}/*.webp", f"{IMAGES}/*.png", f"{IMAGES}/*.jpg",
+                  *tool_inputs("generate_image_derivatives")],
+          outputs=[f"{ASSETS}/image_derivatives.json"],
+          after=["placeholders"]),
+    Stage("atlas", "Pack Sprite Atlas", "pack_texture_atlas",
+          inputs=[f"{IMAGES}/*.png", *tool_inputs("pack_texture_atlas")],
+          outputs=[f"{ASSETS}/sprite_atlas.json"],
+          after=["placeholders"]),
+]
+
+class Stamps:
+    """Input digests and outputs of the last successful run of each stage"""
+
+    def __init__(self, path=STAMP_FILE):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.stages = data.get('stages', {})  # name -> {inputs: digest, outputs: [paths]}
+        self.files = data.get('files', {})  # path -> [size, mtime_ns, sha256]
+        self.lock = threading.Lock()
+
+    def file_hash(self, path):
+        """Content hash of a file, re-read only if its size or mtime changed"""
+        stat = os.stat(path)
+        with self.lock:
+            known = self.files.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = hash_file(path)
+        with self.lock:
+            self.files[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def digest(self, stage):
+        """Hash over the names and contents of all files matching the stage's inputs"""
+        paths = sorted({p for pattern in stage.inputs for p in glob.glob(pattern) if os.path.isfile(p)})
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(f"{Path(path).as_posix()}\0{self.file_hash(path)}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def is_fresh(self, stage):
+        """True if the inputs are unchanged and every output of the last run still exists"""
+        last = self.stages.get(stage.name)
+        return (last is not None and last['inputs'] == self.digest(stage)
+                and all(os.path.exists(p) for p in last['outputs']))
+
+    def record(self, stage):
+        """Remember a successful run; taken afterwards, as a stage may rewrite its own input"""
+        outputs = sorted({Path(p).as_posix() for pattern in stage.outputs for p in glob.glob(pattern)})
+        self.stages[stage.name] = {'inputs': self.digest(stage), 'outputs': outputs}
+
+    def save(self):
+        """Write atomically, dropping file hashes no stage uses any more"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            files = {p: v for p, v in self.files.items() if os.path.exists(p)}
+            fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'stages': self.stages, 'files': files}, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+class StageOutput:
+    """
+    Stand-in for sys.stdout that prefixes each line with the stage printing it
+
+    Stages share this interpreter and run in threads, so their prints are
+    told apart by thread. Every thread, the runner's included, is held to
+    whole lines written under a lock: print() writes a line's end
+    separately, and nothing may be spliced in between.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.pending = {}  # thread id -> text written since its last newline
+
+    def write(self, text):
+        name = getattr(self.local, 'name', None)
+        prefix = f"[{name}] " if name else ""
+        thread = threading.get_ident()
+        with self.lock:
+            *lines, rest = (self.pending.pop(thread, '') + text).split('\n')
+            if rest:
+                self.pending[thread] = rest
+            if lines:
+                self.stream.write(''.join(f"{prefix}{line}\n" for line in lines))
+        return len(text)
+
+    def end_line(self):
+        """Emit this thread's unterminated last line, if any"""
+        if threading.get_ident() in self.pending:
+            self.write('\n')
+
+    def end_stage(self):
+        """Emit any unterminated last line and stop prefixing this thread"""
+        self.end_line()
+        self.local.name = None
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, attr):
+        return getattr(self.stream, attr)
+
+def run_stage(stage, output):
+    """Thread entry point: run one stage with its output prefixed"""
+    output.local.name = stage.name
+    started = time.perf_counter()
+    try:
+        with stage_timer(stage.name):
+            stage.run()
+    except SystemExit as e:
+        # Tools exit(1) on missing dependencies or failed checks
+        if e.code not in (None, 0):
+            raise RuntimeError(f"exited with status {e.code}")
+    finally:
+        output.end_stage()
+    return time.perf_counter() - started
+
+def check_graph(stages):
+    """Every dependency must name an earlier stage, which also rules out cycles"""
+    seen = set()
+    for stage in stages:
+        missing = [dep for dep in stage.after if dep not in seen]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown or later stage(s): {', '.join(missing)}")
+        seen.add(stage.name)
+
+def run_pipeline(stages=STAGES, jobs=DEFAULT_JOBS, force=False, dry_run=False):
+    """
+    Run stale stages in dependency order, independent ones in parallel
+
+    Returns:
+        dict: Stage name -> 'ran', 'skipped', 'stale' (dry run), 'failed' or 'blocked'
+    """
+    check_graph(stages)
+    # The tools' process pools are spawned rather than forked: a fork while
+    # another stage's thread holds an import lock deadlocks the child
+    multiprocessing.set_start_method('spawn', force=True)
+    stamps = Stamps()
+    status = {}
+    pending = list(stages)
+    running = {}
+    output = StageOutput(sys.stdout)
+    sys.stdout = output
+
+    # The tools parse their own command lines; give them an empty one
+    saved_argv = sys.argv
+    sys.argv = sys.argv[:1]
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            while pending or running:
+                for stage in list(pending):
+                    deps = [status.get(dep) for dep in stage.after]
+                    if any(s in ('failed', 'blocked') for s in deps):
+                        status[stage.name] = 'blocked'
+                        pending.remove(stage)
+                        print(f"⊘ {stage.name:<12s} blocked by a failed dependency")
+                        continue
+                    if not all(s in ('ran', 'skipped', 'stale') for s in deps):
+                        continue
+                    pending.remove(stage)
+                    if not force and stamps.is_fresh(stage):
+                        status[stage.name] = 'skipped'
+                        print(f"✓ {stage.name:<12s} up to date")
+                    elif dry_run:
+                        status[stage.name] = 'stale'
+                        print(f"• {stage.name:<12s} would run: {stage.description}")
+                    else:
+                        print(f"▶ {stage.name:<12s} {stage.description}")
+                        running[pool.submit(run_stage, stage, output)] = stage
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        elapsed = future.result()
+                    except Exception as e:
+                        status[stage.name] = 'failed'
+                        print(f"❌ {stage.name:<12s} failed: {e}")
+                        continue
+                    status[stage.name] = 'ran'
+                    stamps.record(stage)
+                    stamps.save()
+                    print(f"✅ {stage.name:<12s} done in {elapsed:.1f}s")
+    finally:
+        output.end_line()
+        sys.argv = saved_argv
+        sys.stdout = output.stream
+    return status
 
 def main():
-    """Run all image setup scripts"""
+    """Run all image setup stages"""
+    parser = argparse.ArgumentParser(description="Run the image preparation pipeline")
+    parser.add_argument('--force', action='store_true', help="run every stage even if up to date")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help=f"stages run at once (default {DEFAULT_JOBS})")
+    parser.add_argument('--dry-run', action='store_true', help="only report which stages are out of date")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    started = time.perf_counter()
     print("=" * 70)
     print("🚀 Vyoma Complete Image Setup")
     print("=" * 70)
-    print("\nThis will:")
-    print("  1. Download images from astronomy data sources")
-    print("  2. Generate placeholders for missing images")
-    print("  3. Update data file with local image paths")
-    print("\n" + "=" * 70)
-    
-    tools_dir = Path("tools")
-    
+
     # Check if we're in the right directory
-    if not tools_dir.exists():
+    if not Path("tools").exists():
         print("\n❌ Error: Please run this script from the project root directory")
         return
-    
-    # Step 1: Download images
-    success = run_script(
-        tools_dir / "download_and_prepare_images.py",
-        "Step 1: Download & Compress Images"
-    )
-    
-    if not success:
-        print("\n⚠️  Download step had issues, but continuing...")
-    
-    # Step 2: Generate placeholders
-    success = run_script(
-        tools_dir / "generate_placeholder_images.py",
-        "Step 2: Generate Placeholder Images"
-    )
-    
-    if not success:
-        print("\n❌ Placeholder generation failed. Stopping.")
-        return
-    
-    # Step 3: Update data file
-    success = run_script(
-        tools_dir / "update_data_with_local_images.py",
-        "Step 3: Update Data with Local Paths"
-    )
-    
-    if not success:
-        print("\n❌ Data update failed. Stopping.")
-        return
-    
-    # Final summary
+
+    print()
+    status = run_pipeline(jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+
+    counts = {s: list(status.values()).count(s) for s in ('ran', 'skipped', 'stale', 'failed', 'blocked')}
     print("\n" + "=" * 70)
-    print("🎉 IMAGE SETUP COMPLETE!")
+    if counts['failed'] or counts['blocked']:
+        print(f"⚠️  IMAGE SETUP INCOMPLETE: {counts['failed']} failed, {counts['blocked']} blocked")
+    elif args.dry_run:
+        print(f"📋 {counts['stale']} stages out of date, {counts['skipped']} up to date")
+    else:
+        print("🎉 IMAGE SETUP COMPLETE!")
     print("=" * 70)
-    
-    images_dir = Path("app/src/main/assets/images")
-    if images_dir.exists():
-        image_count = len(list(images_dir.glob("*.webp")))
-        total_size = sum(f.stat().st_size for f in images_dir.glob("*.webp")) / 1024
-        
+    print(f"\n  Ran {counts['ran']}, skipped {counts['skipped']} up to date, in {time.perf_counter() - started:.2f}s")
+
+    images_dir = Path(IMAGES)
+    if images_dir.exists() and not args.dry_run:
+        webp_files = list(images_dir.glob("*.webp"))
+        total_size = sum(f.stat().st_size for f in webp_files) / 1024
         print(f"\n📊 Final Statistics:")
-        print(f"  • Total images: {image_count}")
+        print(f"  • Total images: {len(webp_files)}")
         print(f"  • Total size: {total_size:.1f} KB ({total_size/1024:.1f} MB)")
         print(f"  • Location: {images_dir}")
-    
+
+    if counts['failed'] or counts['blocked']:
+        sys.exit(1)
+
     print(f"\n✅ Next Steps:")
     print(f"  1. Build the app:")
     print(f"     ./gradlew assembleDebug")
     print(f"  2. Install on device")
     print(f"  3. Test offline mode (Airplane Mode)")
-    print(f"  4. All images should load instantly!")
-    
-    print("\n" + "=" * 70)
 
 if __name__ == "__main__":
-    main()
+    with session("setup_all_images"):
+        main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Generators for Vyoma Tools
+Seeded stand-ins for the raw sources, the catalog and source images
+
+The raw Data/ sources are not checked in, and the real catalog is a few
+thousand objects, so benchmarks and format experiments cannot measure
+how the tools scale. These generators produce inputs of any size with
+the same shape as the real thing: Stardroid .ascii sources for
+ingest_data.py, the astronomy_data/*.json files read by
+comprehensive_data_migration.py, initial_data.json-style catalogs, and
+starfield images. The same seed always gives the same output.
+
+The .ascii files are streamed to disk; catalogs and images are built in
+memory, so 10M objects needs several GB of RAM.
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    print("❌ NumPy/Pillow not installed. Run: pip install numpy Pillow")
+    sys.exit(1)
+
+# Configuration
+NAMED_STAR_FRACTION = 0.05  # the rest get a star_<ra>_<dec> id, as in stars.ascii
+CONSTELLATIONS = ["Andromeda", "Aquila", "Canis Major", "Carina", "Cassiopeia", "Centaurus", "Cygnus",
+                  "Gemini", "Leo", "Lyra", "Orion", "Perseus", "Sagittarius", "Scorpius", "Taurus",
+                  "Ursa Major", "Virgo"]
+DEEP_SKY_SHAPES = ["ELLIPTICAL_GALAXY", "SPIRAL_GALAXY", "DIFFUSE_NEBULA", "PLANETARY_NEBULA",
+                   "OPEN_CLUSTER", "GLOBULAR_CLUSTER"]
+WORDS = ("bright blue giant star system orbit cluster young old hydrogen cloud dust ring spiral arm "
+         "core light years distant visible naked eye telescope discovered ancient").split()
+
+# Share of each catalog type, roughly that of initial_data.json
+CATALOG_TYPES = [("STAR", 0.95), ("GALAXY", 0.017), ("STAR_CLUSTER", 0.017), ("NEBULA", 0.008),
+                 ("PLANET", 0.004), ("MOON", 0.003), ("BLACK_HOLE", 0.001)]
+
+# Share of the migration objects each astronomy_data file gets: (file, keys of its list, share)
+MIGRATION_FILES = [
+    ("stars.json", ["brightest_stars"], 0.40),
+    ("galaxies.json", ["notable_galaxies"], 0.15),
+    ("nebulae.json", ["notable_nebulae"], 0.10),
+    ("exoplanets.json", ["notable_systems"], 0.10),
+    ("small_bodies.json", ["asteroids", "notable_asteroids"], 0.10),
+    ("moons.json", ["major_moons"], 0.08),
+    ("constellations.json", ["major_constellations"], 0.05),
+    ("planets.json", ["planets"], 0.02),
+]
+
+def parse_count(text):
+    """'1k' -> 1000, '10M' -> 10000000, '500' -> 500"""
+    multipliers = {'k': 1000, 'K': 1000, 'M': 1000000, 'G': 1000000000}
+    text = text.strip()
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+def format_count(count):
+    """1000 -> '1k', 10000000 -> '10M'"""
+    for suffix, size in (('M', 1000000), ('k', 1000)):
+        if count >= size and count % size == 0:
+            return f"{count // size}{suffix}"
+    return str(count)
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def _ra_dec(rng):
+    return round(rng.uniform(0, 360), 4), round(rng.uniform(-90, 90), 4)
+
+def write_stars_ascii(path, count, seed=0):
+    """Write a Stardroid stars.ascii with count point sources"""
+    rng = random.Random(seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            ra, dec = _ra_dec(rng)
+            name = f'  strings_str_id: "star_{i}"\n' if rng.random() < NAMED_STAR_FRACTION else ""
+            f.write(f"source {{\n"
+                    f"  search_location {{\n    right_ascension: {ra}\n    declination: {dec}\n  }}\n"
+                    f"  point {{\n    location {{\n      right_ascension: {ra}\n      declination: {dec}\n    }}\n"
+                    f"    color: 4294967295\n    size: {rng.randint(1, 4)}\n  }}\n"
+                    f"{name}}}\n")
+
+def write_messier_ascii(path, count, seed=0):
+    """Write a Stardroid messier.ascii with count deep sky sources"""
+    rng = random.Random(seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            ra, dec = _ra_dec(rng)
+            f.write(f"source {{\n"
+                    f"  point {{\n    location {{\n      right_ascension: {ra}\n      declination: {dec}\n    }}\n"
+                    f"    size: {rng.randint(1, 3)}\n    shape: {rng.choice(DEEP_SKY_SHAPES)}\n  }}\n"
+                    f'  strings_str_id: "m{i + 1}"\n'
+                    f"}}\n")
+
+def _migration_record(rng, obj_id):
+    record = {
+        "id": obj_id,
+        "name": obj_id.replace('_', ' ').title(),
+        "description": _sentence(rng, rng.randint(8, 40)),
+        "interesting_facts": [_sentence(rng) for _ in range(rng.randint(0, 6))],
+        "constellation": rng.choice(CONSTELLATIONS),
+        "distance_ly": round(rng.lognormvariate(6, 2), 1),
+        "magnitude": round(rng.uniform(-1.5, 12), 2),
+        "apparent_magnitude": round(rng.uniform(-1.5, 6.5), 2),
+        "diameter_km": round(rng.lognormvariate(7, 2), 1),
+        "planet": rng.choice(["Jupiter", "Saturn", "Uranus", "Neptune"]),
+    }
+    if rng.random() < 0.6:
+        record["image_urls"] = {
+            "nasa": f"https://images.example.org/{obj_id}/{rng.getrandbits(32):08x}.jpg",
+            "wikimedia": f"https://upload.example.org/{obj_id}.jpg",
+        }
+    return record
+
+def migration_data(count, seed=0):
+    """astronomy_data file name -> contents, with count objects spread over the files"""
+    rng = random.Random(seed)
+    files = {}
+    start = 0
+    for filename, list_path, share in MIGRATION_FILES:
+        size = max(1, round(count * share))
+        records = [_migration_record(rng, f"{Path(filename).stem}_{start + i}") for i in range(size)]
+        start += size
+        data = records
+        for key in reversed(list_path):
+            data = {key: data}
+        files[filename] = data
+    return files
+
+def write_migration_data(data_dir, count, seed=0):
+    """Write the astronomy_data/*.json files migrate_all_data reads"""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for filename, data in migration_data(count, seed).items():
+        with open(data_dir / filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+def synthetic_catalog(count, seed=0):
+    """A list of count objects shaped like initial_data.json"""
+    rng = random.Random(seed)
+    types, weights = zip(*CATALOG_TYPES)
+    catalog = []
+    for i, obj_type in enumerate(rng.choices(types, weights, k=count)):
+        ra, dec = _ra_dec(rng)
+        if obj_type == "STAR" and rng.random() >= NAMED_STAR_FRACTION:
+            obj_id = f"star_{ra:.2f}_{dec:.2f}_{i}".replace(".", "_").replace("-", "m")
+            catalog.append({"type": obj_type, "rightAscension": ra, "declination": dec,
+                            "magnitude": float(rng.randint(2, 5)), "id": obj_id,
+                            "name": f"Star ({ra:.2f}, {dec:.2f})"})
+            continue
+        obj_id = f"{obj_type.lower()}_{i}"
+        obj = {"id": obj_id, "name": obj_id.replace('_', ' ').title(), "type": obj_type,
+               "rightAscension": ra, "declination": dec, "magnitude": round(rng.uniform(-1.5, 12), 2)}
+        if rng.random() < 0.5:
+            obj["description"] = _sentence(rng, rng.randint(8, 60))
+        if rng.random() < 0.4:
+            obj["imageUrl"] = f"images/{obj_id}.webp"
+        if rng.random() < 0.5:
+            obj["constellation"] = rng.choice(CONSTELLATIONS)
+            obj["distanceLy"] = round(rng.lognormvariate(6, 2), 1)
+        if obj_type in ("PLANET", "MOON"):
+            obj["radiusKm"] = round(rng.lognormvariate(7, 1), 1)
+            obj["parentId"] = "sun" if obj_type == "PLANET" else "jupiter"
+        catalog.append(obj)
+    return catalog
+
+def synthetic_image(pixels, seed=0):
+    """A 4:3 RGB starfield of about the given pixel count: dark sky gradient, noise and stars"""
+    rng = np.random.default_rng(seed)
+    height = max(1, int((pixels * 3 / 4) ** 0.5))
+    width = max(1, pixels // height)
+    sky = np.linspace(8, 40, height, dtype=np.float32)[:, None, None] * np.array([0.6, 0.7, 1.0], np.float32)
+    img = sky + rng.normal(0, 4, (height, width, 3)).astype(np.float32)
+    stars = max(1, pixels // 2000)
+    ys = rng.integers(0, height, stars)
+    xs = rng.integers(0, width, stars)
+    img[ys, xs] = rng.uniform(120, 255, (stars, 1))
+    return Image.fromarray(np.clip(img, 0, 255).astype(np.uint8), 'RGB')
@@ -1,37 +1,52 @@
 #!/usr/bin/env python3
 """
 Update initial_data.json to use local image paths where available
+
+Objects with neither a local image nor an image URL get the catalog
+placeholder from placeholder_images.json, if generate_placeholder_images.py
+--catalog has been run.
+
+apply_local_images() updates a catalog already in memory, so a full build
+can chain it after ingestion without writing initial_data.json twice.
 """
 
 import json
 from pathlib import Path
 
-def main():
-    """Update JSON data with local image paths"""
-    
-    # Paths
-    data_file = Path("app/src/main/assets/initial_data.json")
-    images_dir = Path("app/src/main/assets/images")
-    
-    if not data_file.exists():
-        print(f"❌ Data file not found: {data_file}")
-        return
-    
-    if not images_dir.exists():
-        print(f"❌ Images directory not found: {images_dir}")
-        return
-    
-    # Get list of available images
-    available_images = {f.stem for f in images_dir.glob("*.webp")}
-    
-    print(f"✓ Found {len(available_images)} local images")
-    
-    # Load data
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Update image URLs
+from canonical_json import write_json
+from instrumentation import session
+
+# Paths
+DATA_FILE = Path("app/src/main/assets/initial_data.json")
+IMAGES_DIR = Path("app/src/main/assets/images")
+PLACEHOLDER_FILE = Path("app/src/main/assets/placeholder_images.json")
+
+def local_image_ids(images_dir=IMAGES_DIR):
+    """Ids of the objects with an images/<id>.webp"""
+    return {f.stem for f in images_dir.glob("*.webp")}
+
+def load_placeholders(placeholder_file=PLACEHOLDER_FILE):
+    """Object id -> catalog placeholder path, or {} if none were generated"""
+    if not placeholder_file.exists():
+        return {}
+    with open(placeholder_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def apply_local_images(data, available_images, placeholders=None):
+    """
+    Point the objects of a catalog at local images, in place
+
+    Args:
+        data: List of catalog objects, as in initial_data.json
+        available_images: Ids with a local image (see local_image_ids)
+        placeholders: Object id -> placeholder path (see load_placeholders)
+
+    Returns:
+        tuple: (updated_count, placeholder_count)
+    """
+    placeholders = placeholders or {}
     updated_count = 0
+    placeholder_count = 0
     for obj in data:
         obj_id = obj['id']
         if obj_id in available_images:
@@ -41,13 +56,51 @@ def main():
             if old_url != f"images/{obj_id}.webp":
                 print(f"  ✓ {obj_id}: Updated to local image")
                 updated_count += 1
-    
+        elif obj_id in placeholders and (not obj.get('imageUrl') or obj['imageUrl'].startswith("images/placeholders/")):
+            if obj.get('imageUrl') != placeholders[obj_id]:
+                obj['imageUrl'] = placeholders[obj_id]
+                placeholder_count += 1
+    return updated_count, placeholder_count
+
+def save_data(data, data_file=DATA_FILE):
+    """Write initial_data.json"""
+    write_json(data_file, data)
+
+def main():
+    """Update JSON data with local image paths"""
+
+    if not DATA_FILE.exists():
+        print(f"❌ Data file not found: {DATA_FILE}")
+        return
+
+    if not IMAGES_DIR.exists():
+        print(f"❌ Images directory not found: {IMAGES_DIR}")
+        return
+
+    # Get list of available images
+    available_images = local_image_ids()
+
+    print(f"✓ Found {len(available_images)} local images")
+
+    placeholders = load_placeholders()
+    if placeholders:
+        print(f"✓ Found {len(placeholders)} catalog placeholders")
+
+    # Load data
+    with open(DATA_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    # Update image URLs
+    updated_count, placeholder_count = apply_local_images(data, available_images, placeholders)
+
     # Save updated data
-    with open(data_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
+    save_data(data)
+
     print(f"\n✅ Updated {updated_count} objects with local image paths")
-    print(f"📁 Saved to {data_file}")
+    if placeholder_count:
+        print(f"✅ Pointed {placeholder_count} objects at catalog placeholders")
+    print(f"📁 Saved to {DATA_FILE}")
 
 if __name__ == "__main__":
-    main()
+    with session("update_data_with_local_images"):
+        main()